@@ -9,6 +9,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
+
 def wait_for_db(max_retries=30, delay=2):
     """Wait for PostgreSQL to be ready inside Docker"""
     retries = 0
@@ -43,8 +44,10 @@ def init_database():
     if base_dir not in sys.path:
         sys.path.append(base_dir)
 
-    from datetime import datetime
-    from src.database import create_tables, SessionLocal, ModelMetrics
+    from src.aggregates import rebuild_aggregates
+    from src.database import create_tables, SessionLocal, ModelMetrics, PredictionAggregate, PredictionLog
+    from src.model_loader import read_active_version
+    from src.train import record_metrics, version_metrics
 
     print("creating database tables...")
     create_tables()
@@ -52,29 +55,28 @@ def init_database():
     db = SessionLocal()
 
     try:
-        existing = db.query(ModelMetrics).filter_by(model_version="1.0").first()
+        version = read_active_version()
+        existing = db.query(ModelMetrics).filter_by(model_version=version).first()
 
         if not existing:
-            initial_metrics = ModelMetrics(
-                model_version="1.0",
-                accuracy=0.852,
-                precision=0.830,
-                recall=0.810,
-                f1_score=0.820,
-                trained_at=datetime.utcnow(),
-                dataset_size=7043,
-                notes="Random Forest model for churn prediction in Docker setup",
-            )
-            db.add(initial_metrics)
-            db.commit()
-            print("initial model metrics inserted")
+            metrics = version_metrics(version)
+            if metrics:
+                record_metrics(version, metrics, metrics["dataset_size"], metrics["notes"])
+                print(f"model {version} metrics inserted (accuracy {metrics['accuracy']}, f1 {metrics['f1_score']})")
+            else:
+                print(f"no metrics.json or training data for model {version}, skipping metrics")
         else:
             print("model metrics already exist, skipping insert")
 
+        # backfill /stats aggregates for logs written before the aggregate table existed
+        if db.query(PredictionAggregate).first() is None and db.query(PredictionLog).first() is not None:
+            rebuilt = rebuild_aggregates(db)
+            print(f"rebuilt prediction aggregates from {rebuilt} logs")
+
         print("database initialization complete")
     finally:
         db.close()
 
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
@@ -8,8 +8,8 @@ python scripts/init_db_docker.py
 
 if [ $? -eq 0 ]; then
     echo "Database ready, starting API..."
-    # use Railway's PORT or default to 8000
-    uvicorn src.api:app --host 0.0.0.0 --port ${PORT:-8000}
+    # use Railway's PORT or default to 8000; SERVE_WORKERS forked workers share one loaded model
+    SERVE_WORKERS=${SERVE_WORKERS:-1} python -m src.serve --host 0.0.0.0 --port ${PORT:-8000}
 else
     echo "Database initialization failed!"
     exit 1
@@ -0,0 +1,207 @@
+import logging
+import os
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .archive import ARCHIVE_DIR, iter_archived
+from .database import PredictionAggregate, PredictionLog
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day")
+# bucket_start for the all-time rows
+TOTAL_BUCKET = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# every bucket is split over this many rows ("hour", "hour:1", ... in granularity). Each log write
+# adds to one of them picked at random, so concurrent writes rarely queue on the same row lock;
+# readers sum the shards. 1 keeps a single row per bucket
+SHARDS = int(os.getenv("AGGREGATE_SHARDS", "8"))
+
+COUNTERS = ("total", "churn_yes", "churn_no", "risk_high", "risk_medium", "risk_low", "probability_sum")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its UTC hour/day"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    ts = ts.astimezone(timezone.utc)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"granularity must be one of {GRANULARITIES}, got {granularity!r}")
+
+
+def _deltas(rows: list[dict]) -> dict[tuple, dict]:
+    """Fold log rows into counter increments per (granularity, bucket_start, model_version)"""
+    now = datetime.now(timezone.utc)
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in rows:
+        version = row.get("model_version") or "1.0"
+        ts = row.get("created_at") or now
+        keys = [("total", TOTAL_BUCKET, version)] + [(g, bucket_start(ts, g), version) for g in GRANULARITIES]
+
+        churn = "churn_yes" if row.get("churn_prediction") == "Yes" else "churn_no"
+        risk = {"High": "risk_high", "Medium": "risk_medium", "Low": "risk_low"}.get(row.get("risk_level"))
+        prob = row.get("churn_probability") or 0.0
+        for key in keys:
+            d = deltas[key]
+            d["total"] += 1
+            d[churn] += 1
+            if risk:
+                d[risk] += 1
+            d["probability_sum"] += prob
+    return deltas
+
+
+def _shard(granularity: str, shard: int) -> str:
+    return granularity if shard == 0 else f"{granularity}:{shard}"
+
+
+def _all_shards(granularity: str):
+    return or_(PredictionAggregate.granularity == granularity, PredictionAggregate.granularity.like(f"{granularity}:%"))
+
+
+def update_aggregates(db: Session, rows: list[dict], shard: int | None = None) -> None:
+    """Add freshly logged rows to the running aggregates (caller commits)"""
+    if shard is None:
+        shard = random.randrange(SHARDS) if SHARDS > 1 else 0
+    # always the same lock order, so two writers touching the same rows can't deadlock
+    for (granularity, start, version), delta in sorted(_deltas(rows).items()):
+        granularity = _shard(granularity, shard)
+        where = (
+            (PredictionAggregate.granularity == granularity)
+            & (PredictionAggregate.bucket_start == start)
+            & (PredictionAggregate.model_version == version)
+        )
+        increment = (
+            update(PredictionAggregate)
+            .where(where)
+            .values({name: getattr(PredictionAggregate, name) + delta[name] for name in COUNTERS})
+        )
+        if db.execute(increment).rowcount:
+            continue
+        # first row for this bucket; if another writer beat us to it, fall back to the update
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(PredictionAggregate).values(
+                        granularity=granularity, bucket_start=start, model_version=version, **delta
+                    )
+                )
+        except IntegrityError:
+            db.execute(increment)
+
+
+def _as_dict(totals: dict) -> dict:
+    total = totals["total"]
+    return {
+        "total_predictions": total,
+        "churn_predictions": {
+            "yes": totals["churn_yes"],
+            "no": totals["churn_no"],
+            "churn_rate": round((totals["churn_yes"] / total) * 100, 2) if total else 0.0,
+        },
+        "average_churn_probability": round(totals["probability_sum"] / total, 3) if total else 0.0,
+        "risk_distribution": {
+            "high": totals["risk_high"],
+            "medium": totals["risk_medium"],
+            "low": totals["risk_low"],
+        },
+    }
+
+
+def read_totals(db: Session, model_version: str | None = None) -> dict:
+    """All-time stats from the 'total' rows (one per model version), independent of log size"""
+    query = select(*[func.coalesce(func.sum(getattr(PredictionAggregate, c)), 0) for c in COUNTERS]).where(
+        _all_shards("total")
+    )
+    if model_version is not None:
+        query = query.where(PredictionAggregate.model_version == model_version)
+    return _as_dict(dict(zip(COUNTERS, db.execute(query).one())))
+
+
+def read_buckets(
+    db: Session,
+    granularity: str = "hour",
+    model_version: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 168,
+) -> list[dict]:
+    """Per-bucket stats, newest first"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, got {granularity!r}")
+    counters = [func.sum(getattr(PredictionAggregate, c)).label(c) for c in COUNTERS]
+    query = select(PredictionAggregate.bucket_start, PredictionAggregate.model_version, *counters).where(
+        _all_shards(granularity)
+    )
+    if model_version is not None:
+        query = query.where(PredictionAggregate.model_version == model_version)
+    if since is not None:
+        query = query.where(PredictionAggregate.bucket_start >= bucket_start(since, granularity))
+    if until is not None:
+        query = query.where(PredictionAggregate.bucket_start <= until)
+    query = (
+        query.group_by(PredictionAggregate.bucket_start, PredictionAggregate.model_version)
+        .order_by(PredictionAggregate.bucket_start.desc(), PredictionAggregate.model_version)
+        .limit(limit)
+    )
+
+    return [
+        {
+            "bucket_start": bucket_start(row.bucket_start, granularity).isoformat(),
+            "model_version": row.model_version,
+            **_as_dict({c: getattr(row, c) for c in COUNTERS}),
+        }
+        for row in db.execute(query)
+    ]
+
+
+def rebuild_aggregates(
+    db: Session, chunk_size: int = 10000, archive_dir=ARCHIVE_DIR, model_version: str | None = None
+) -> int:
+    """Recompute every aggregate from prediction_logs and its Parquet archive in fixed-size chunks (one-off backfill)
+
+    ``model_version`` limits the rebuild to that version's rows and leaves the others alone.
+    """
+    clear = delete(PredictionAggregate)
+    if model_version is not None:
+        clear = clear.where(PredictionAggregate.model_version == model_version)
+    db.execute(clear)
+    columns = (
+        PredictionLog.id,
+        PredictionLog.created_at,
+        PredictionLog.model_version,
+        PredictionLog.churn_prediction,
+        PredictionLog.risk_level,
+        PredictionLog.churn_probability,
+    )
+    seen = 0
+    # archived days first; retention removed them from the table but they still count
+    for chunk in iter_archived([c.key for c in columns], archive_dir, chunk_size):
+        if model_version is not None:
+            chunk = [r for r in chunk if r["model_version"] == model_version]
+        # a single transaction, so there's no contention to spread: one row per bucket
+        update_aggregates(db, chunk, shard=0)
+        seen += len(chunk)
+    last_id = 0
+    while True:
+        # keyset over the primary key so memory stays at one chunk
+        query = select(*columns).where(PredictionLog.id > last_id)
+        if model_version is not None:
+            query = query.where(PredictionLog.model_version == model_version)
+        chunk = db.execute(query.order_by(PredictionLog.id).limit(chunk_size)).all()
+        if not chunk:
+            break
+        update_aggregates(db, [dict(r._mapping) for r in chunk], shard=0)
+        seen += len(chunk)
+        last_id = chunk[-1].id
+    db.commit()
+    logger.info("rebuilt prediction aggregates from %d logs", seen)
+    return seen
@@ -1,35 +1,131 @@
+import asyncio
+import hmac
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal, Optional
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from .database import ModelMetrics, PredictionLog, get_db
+from . import columnar, metrics, workers
+from .aggregates import read_buckets, read_totals
+from .database import ModelMetrics, get_async_db, get_async_engine, get_engine
+from .db_pool import pool_stats
+from .drift import WINDOW_HOURS, DriftMonitors, ReferenceUnavailable
+from .explain import ExplanationUnavailable
+from .health import db_check
+from .history import InvalidCursor, query_history
+from .log_writer import PredictionLogWriter
+from .model_loader import ModelArtifacts, UnknownModelVersion
 from .predictor import ChurnPredictor
-from .schemas import CustomerInput, HealthResponse, PredictionOutput
+from .schemas import BatchInput, BatchPredictionOutput, CustomerInput, HealthResponse, PredictionOutput
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # model artifacts load here, before the server accepts requests, instead of at import time;
+    # without a lifespan (a bare TestClient) they load on the first request that needs them
+    start = time.perf_counter()
+    await run_in_threadpool(predictor.load, MODEL_WARMUP)
+    logger.info("model %s ready in %.3fs", predictor.loader.model_version, time.perf_counter() - start)
+    if log_writer is not None:
+        log_writer.start()
+    predictor.loader.start_watching(MODEL_WATCH_INTERVAL)
+    yield
+    # drain the queue so queued predictions aren't lost on shutdown
+    if log_writer is not None:
+        log_writer.stop()
+    if predictor.shadow is not None:
+        predictor.shadow.stop()
+    predictor.loader.stop_watching()
+
+
 app = FastAPI(
     title="Customer Churn Prediction API",
     description="Predict customer churn using machine learning with PostgreSQL logging",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  
+    allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-predictor = ChurnPredictor()
+# METRICS_ENABLED=0 turns off timing and the /metrics endpoint entirely
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+# per-worker request counts (shared across workers under src.serve)
+app.add_middleware(workers.RequestCounter)
+
+_VALIDATION = metrics.STAGE_SECONDS.labels(stage="validation")
+
+
+def _observe_validation(request: Request) -> None:
+    # middleware stamp -> handler entry covers body read, JSON parse and pydantic validation
+    start = request.scope.get("state", {}).get("request_start")
+    if start is not None:
+        _VALIDATION.observe(time.perf_counter() - start)
+
+
+# LOG_WRITER_ENABLED=1 moves PredictionLog inserts off the request path (see log_writer.py)
+log_writer = PredictionLogWriter.from_env() if os.getenv("LOG_WRITER_ENABLED", "0") == "1" else None
+# PREDICTION_CACHE_SIZE / PREDICTION_CACHE_TTL turn on the result cache,
+# SHADOW_MODEL_VERSIONS / AB_CANDIDATE_VERSION + AB_TRAFFIC_PERCENT compare candidate models
+predictor = ChurnPredictor.from_env(log_writer=log_writer)
+# drift histograms fed by incremental scans of prediction_logs (shared by all workers' logs)
+log_drift = DriftMonitors()
+# one scan at a time, so two refreshes can't count the same rows
+_drift_scan_lock = asyncio.Lock()
+
+
+# ADMIN_TOKEN must be sent as X-Admin-Token to the /admin endpoints; without it they're disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# MODEL_WATCH_INTERVAL > 0 polls models/ACTIVE and hot-swaps when it changes
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+# MODEL_WARMUP=1 (default) scores a dummy customer at startup so the first request isn't the cold one
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # fail closed: no configured token means nobody gets in
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+
+_MODEL_VERSION_QUERY = Query(None, description="serve with this model version instead of the active one")
+
+
+async def requested_artifacts(model_version: Optional[str] = _MODEL_VERSION_QUERY) -> Optional[ModelArtifacts]:
+    # only versions already in memory or listed in MODEL_REQUEST_VERSIONS; /admin loads the rest.
+    # handlers score with these artifacts instead of looking the version up again
+    if model_version is None:
+        return None
+    try:
+        return await run_in_threadpool(predictor.loader.get_requested, model_version)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+_EXPLAIN_QUERY = Query(False, description="add the top feature contributions to each prediction")
+_TOP_K_QUERY = Query(3, ge=1, le=50, description="number of contributions per prediction with explain=true")
 
 
 @app.get("/", tags=["Root"])
@@ -40,100 +136,328 @@ def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
             "predict": "/predict",
+            "predict_batch": "/predict/batch",
+            "predict_columnar": "/predict/columnar",
             "stats": "/stats",
+            "stats_timeseries": "/stats/timeseries",
             "history": "/history",
+            "logging_stats": "/logging-stats",
+            "cache_stats": "/cache-stats",
+            "batcher_stats": "/batcher-stats",
+            "shadow_stats": "/shadow-stats",
+            "db_pool_stats": "/db-pool-stats",
+            "worker_stats": "/worker-stats",
+            "drift": "/drift",
+            "metrics": "/metrics",
+            "model_info": "/model-info",
+            "admin_models": "/admin/models",
             "docs": "/docs",
         },
     }
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-def health_check(db: Session = Depends(get_db)):
-    # quick db ping
-    try:
-        db.execute(text("SELECT 1"))
-        db_ok = True
-    except Exception as e:
-        logger.error(f"db health check failed: {e}")
-        db_ok = False
-
+async def health_check():
+    # DB result cached for HEALTH_CHECK_TTL seconds, shared with /health/ready
+    db_ok, _ = await db_check.get()
     return HealthResponse(
         status="healthy" if db_ok else "degraded",
-        model_loaded=predictor.loader.model is not None,
+        model_loaded=predictor.loaded,
         timestamp=datetime.now(),
     )
 
 
-@app.post("/predict", response_model=PredictionOutput, tags=["Prediction"])
-def predict_churn(customer: CustomerInput, db: Session = Depends(get_db)):
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    # process is up and serving; never touches the DB
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness(response: Response):
+    # 503 until the model is loaded and the (cached) DB check passes
+    db_ok, age = await db_check.get()
+    if not predictor.loaded:
+        # no lifespan ran (bare TestClient, app mounted elsewhere): the first probe loads the model
+        try:
+            await run_in_threadpool(predictor.load)
+        except Exception:
+            logger.exception("model load failed")
+    model_ok = predictor.loaded
+    ready = db_ok and model_ok
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "not_ready",
+        "database": db_ok,
+        "model_loaded": model_ok,
+        "db_check_age_s": round(age, 3),
+    }
+
+
+# explanation is left out of the body unless it was asked for
+@app.post("/predict", response_model=PredictionOutput, response_model_exclude_none=True, tags=["Prediction"])
+async def predict_churn(
+    customer: CustomerInput,
+    request: Request,
+    requested: Optional[ModelArtifacts] = Depends(requested_artifacts),
+    explain: bool = _EXPLAIN_QUERY,
+    top_k: int = _TOP_K_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    _observe_validation(request)
     try:
-        return predictor.predict(customer, db=db)
+        # scoring runs in the threadpool, the log insert is awaited on the event loop
+        return await predictor.predict_async(
+            customer, db=db, model_version=requested, explain_top_k=top_k if explain else 0
+        )
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ExplanationUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception("prediction failed")
         raise HTTPException(status_code=500, detail=f"prediction failed: {e}")
 
 
-@app.get("/stats", tags=["Analytics"])
-def get_statistics(db: Session = Depends(get_db)):
-    total = db.query(PredictionLog).count()
-    yes = db.query(PredictionLog).filter(PredictionLog.churn_prediction == "Yes").count()
-    no = db.query(PredictionLog).filter(PredictionLog.churn_prediction == "No").count()
-
-    probs = db.query(PredictionLog.churn_probability).all()
-    avg_prob = (sum(p[0] for p in probs) / len(probs)) if probs else 0.0
+@app.post("/predict/batch", response_model=BatchPredictionOutput, response_model_exclude_none=True, tags=["Prediction"])
+async def predict_churn_batch(
+    batch: BatchInput,
+    request: Request,
+    requested: Optional[ModelArtifacts] = Depends(requested_artifacts),
+    explain: bool = _EXPLAIN_QUERY,
+    top_k: int = _TOP_K_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # up to MAX_BATCH_SIZE customers per call, results in input order
+    _observe_validation(request)
+    try:
+        predictions = await predictor.predict_many_async(
+            batch.customers, db=db, model_version=requested, explain_top_k=top_k if explain else 0
+        )
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ExplanationUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("batch prediction failed")
+        raise HTTPException(status_code=500, detail=f"batch prediction failed: {e}")
+    return BatchPredictionOutput(count=len(predictions), predictions=predictions)
 
-    high = db.query(PredictionLog).filter(PredictionLog.risk_level == "High").count()
-    med = db.query(PredictionLog).filter(PredictionLog.risk_level == "Medium").count()
-    low = db.query(PredictionLog).filter(PredictionLog.risk_level == "Low").count()
 
-    return {
-        "total_predictions": total,
-        "churn_predictions": {
-            "yes": yes,
-            "no": no,
-            "churn_rate": round((yes / total) * 100, 2) if total else 0.0,
+# the body is parsed by src.columnar, not pydantic, so describe it for /docs by hand
+_COLUMNAR_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            media_type: {
+                "schema": {
+                    "type": "object",
+                    "required": ["columns"],
+                    "properties": {
+                        "columns": {"type": "object", "additionalProperties": {"type": "array", "items": {}}},
+                        "dictionary_id": {"type": "string"},
+                    },
+                }
+            }
+            for media_type in ("application/json", columnar.MSGPACK)
         },
-        "average_churn_probability": round(avg_prob, 3),
-        "risk_distribution": {"high": high, "medium": med, "low": low},
     }
+}
 
 
-@app.get("/history", tags=["Analytics"])
-def get_history(limit: int = 10, db: Session = Depends(get_db)):
-    rows = (
-        db.query(PredictionLog)
-        .order_by(PredictionLog.created_at.desc())
-        .limit(limit)
-        .all()
+@app.post("/predict/columnar", tags=["Prediction"], openapi_extra=_COLUMNAR_BODY)
+async def predict_churn_columnar(
+    request: Request,
+    requested: Optional[ModelArtifacts] = Depends(requested_artifacts),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # column arrays with enum codes from /model-info "columnar"; JSON or msgpack, optionally gzipped
+    headers = request.headers
+    try:
+        body = await columnar.read_body(request.stream(), headers.get("content-length"))
+        columns, n_rows = await run_in_threadpool(
+            columnar.parse, body, headers.get("content-type", ""), headers.get("content-encoding", "")
+        )
+    except columnar.ColumnarError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.errors)
+    _observe_validation(request)
+    try:
+        result = await predictor.predict_columns_async(columns, n_rows, db=db, model_version=requested)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception("columnar prediction failed")
+        raise HTTPException(status_code=500, detail=f"columnar prediction failed: {e}")
+    content, response_headers = await run_in_threadpool(
+        columnar.encode_response, result, headers.get("accept", ""), headers.get("accept-encoding", "")
     )
+    return Response(content=content, headers=response_headers)
 
+
+@app.get("/stats", tags=["Analytics"])
+async def get_statistics(model_version: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    # served from the running aggregates, so the cost doesn't grow with prediction_logs
+    return await db.run_sync(read_totals, model_version=model_version)
+
+
+@app.get("/stats/timeseries", tags=["Analytics"])
+async def get_statistics_timeseries(
+    granularity: Literal["hour", "day"] = "hour",
+    model_version: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(168, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    buckets = await db.run_sync(
+        read_buckets, granularity, model_version=model_version, since=since, until=until, limit=limit
+    )
+    return {"granularity": granularity, "total_returned": len(buckets), "buckets": buckets}
+
+
+@app.get("/history", tags=["Analytics"])
+async def get_history(
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    risk_level: Optional[Literal["Low", "Medium", "High"]] = None,
+    churn_prediction: Optional[Literal["Yes", "No"]] = None,
+    contract: Optional[str] = None,
+    model_version: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        # the sync query helpers run inside the async session, so the DB round trip doesn't hold a thread
+        predictions, next_cursor = await db.run_sync(
+            query_history,
+            limit=limit,
+            cursor=cursor,
+            risk_level=risk_level,
+            churn_prediction=churn_prediction,
+            contract=contract,
+            model_version=model_version,
+            since=since,
+            until=until,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"total_returned": len(predictions), "next_cursor": next_cursor, "predictions": predictions}
+
+
+@app.get("/logging-stats", tags=["Info"])
+def logging_stats():
+    # queue depth, drop/spill counters and flush latency of the write-behind logger
+    if log_writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **log_writer.stats()}
+
+
+@app.get("/cache-stats", tags=["Info"])
+def cache_stats():
+    # hit/miss/eviction counters of the prediction result cache
+    if predictor.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.cache.stats()}
+
+
+@app.get("/batcher-stats", tags=["Info"])
+def batcher_stats():
+    # batches cut, requests per batch and the window of the /predict micro-batcher
+    if predictor.batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.batcher.stats()}
+
+
+@app.get("/shadow-stats", tags=["Info"])
+def shadow_stats():
+    # agreement and latency of shadow models vs the version that answered, plus the A/B split
+    split = predictor.traffic_split
     return {
-        "total_returned": len(rows),
-        "predictions": [
-            {
-                "prediction_id": r.prediction_id,
-                "churn_prediction": r.churn_prediction,
-                "churn_probability": r.churn_probability,
-                "risk_level": r.risk_level,
-                "tenure": r.tenure,
-                "monthly_charges": r.monthly_charges,
-                "contract": r.contract,
-                "created_at": r.created_at.isoformat(),
-            }
-            for r in rows
-        ],
+        "traffic_split": (
+            {"candidate_version": split.candidate_version, "percent": split.percent} if split is not None else None
+        ),
+        "shadow": {"enabled": True, **predictor.shadow.stats()} if predictor.shadow is not None else {"enabled": False},
     }
 
 
+@app.get("/db-pool-stats", tags=["Info"])
+def db_pool_stats():
+    # connections in use / overflow and checkout wait times for both engines
+    return {"sync": pool_stats(get_engine().pool), "async": pool_stats(get_async_engine().sync_engine.pool)}
+
+
+@app.get("/drift", tags=["Analytics"])
+async def drift(
+    requested: Optional[ModelArtifacts] = Depends(requested_artifacts),
+    source: Literal["logs", "stream"] = "logs",
+    hours: Optional[int] = Query(None, ge=1, le=WINDOW_HOURS, description="look back this many hours"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # PSI / binned KS per input feature and for churn_probability vs the training data
+    model_version = requested.version if requested is not None else None
+    try:
+        if source == "stream":
+            if predictor.drift is None:
+                raise HTTPException(status_code=404, detail="stream drift is disabled (DRIFT_STREAM=0)")
+            monitor = await run_in_threadpool(predictor.drift.get, model_version)
+            return {**monitor.report(hours), "source": "stream"}
+        # reference histograms load off the event loop the first time; the scan reads only new rows
+        await run_in_threadpool(log_drift.get, model_version)
+        async with _drift_scan_lock:
+            report = await db.run_sync(log_drift.refresh, model_version, hours)
+        return {**report, "source": "logs"}
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get("/worker-stats", tags=["Info"])
+def worker_stats():
+    # requests served by each worker process (python -m src.serve), and which one answered
+    return workers.stats()
+
+
+@app.get("/metrics", tags=["Info"], response_class=PlainTextResponse, include_in_schema=metrics.ENABLED)
+def prometheus_metrics():
+    # per-stage latency histograms and counters in Prometheus text format
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="metrics are disabled (METRICS_ENABLED=0)")
+    if log_writer is not None:
+        metrics.LOG_WRITER_QUEUE_DEPTH.set(log_writer.stats()["queue_depth"])
+    for name, pool in (("sync", get_engine().pool), ("async", get_async_engine().sync_engine.pool)):
+        stats = pool_stats(pool)
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in stats:
+                metrics.DB_POOL.labels(engine=name, state=state).set(stats[state])
+    if predictor.cache is not None:
+        cache_stats = predictor.cache.stats()
+        for stat in ("size", "hits", "misses", "evictions", "expirations"):
+            metrics.CACHE_STATS.labels(stat=stat).set(cache_stats[stat])
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/model-info", tags=["Info"])
-def model_info(db: Session = Depends(get_db)):
-    metrics = db.query(ModelMetrics).filter_by(model_version="1.0").first()
+async def model_info(
+    requested: Optional[ModelArtifacts] = Depends(requested_artifacts), db: AsyncSession = Depends(get_async_db)
+):
+    artifacts = requested if requested is not None else await run_in_threadpool(predictor.loader.get)
+    metrics = await db.scalar(select(ModelMetrics).filter_by(model_version=artifacts.version).limit(1))
     return {
-        "model_type": type(predictor.loader.model).__name__,
-        "model_version": "1.0",
-        "number_of_features": len(predictor.loader.feature_names),
-        "features": predictor.loader.feature_names,
+        "model_type": artifacts.model_type,
+        "artifact_format": artifacts.format,
+        "model_version": artifacts.version,
+        "active_version": predictor.loader.model_version,
+        "number_of_features": len(artifacts.feature_names),
+        "features": artifacts.feature_names,
+        # codes and limits for POST /predict/columnar
+        "columnar": columnar.schema(),
         "performance_metrics": (
             {
                 "accuracy": metrics.accuracy,
@@ -145,4 +469,38 @@ def model_info(db: Session = Depends(get_db)):
             if metrics
             else None
         ),
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/admin/models", tags=["Admin"], dependencies=[Depends(require_admin)])
+def list_models():
+    # active version, what's loaded in memory and what's on disk
+    return predictor.loader.status()
+
+
+@app.post("/admin/models/{version}/load", tags=["Admin"], dependencies=[Depends(require_admin)])
+def load_model(version: str):
+    # make a version resident so ?model_version= can use it, without activating it (this process only)
+    try:
+        predictor.loader.get(version)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return predictor.loader.status()
+
+
+@app.post("/admin/models/{version}/activate", tags=["Admin"], dependencies=[Depends(require_admin)])
+def activate_model(version: str):
+    # loads first, then swaps; requests already running finish on the old version.
+    # models/ACTIVE is rewritten too, so the other workers' watchers follow within MODEL_WATCH_INTERVAL
+    try:
+        predictor.loader.activate(version, persist=True)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return predictor.loader.status()
+
+
+@app.post("/admin/models/reload", tags=["Admin"], dependencies=[Depends(require_admin)])
+def reload_models():
+    # re-read the resident versions from disk (e.g. retrained in place); this process only
+    predictor.loader.reload()
+    return predictor.loader.status()
@@ -0,0 +1,301 @@
+# retention for prediction_logs: python -m src.archive --days 30
+#
+# Every UTC day older than the retention window is written to one zstd-compressed Parquet file
+# under LOG_ARCHIVE_DIR (YYYY-MM-DD.parquet; a later run for the same day adds YYYY-MM-DD.N.parquet),
+# then removed from the database: exactly the rows written to the file are deleted (on postgres the
+# day's partition is detached first and dropped once it holds nothing else). A row that commits
+# after the export stays in the table for the next run. The file is complete on disk (written to a
+# temp name, then renamed) before anything is removed.
+#
+# Reads: query_history continues into the archive once the hot rows of a page run out, and
+# rebuild_aggregates folds archived days back in. /stats is served from prediction_aggregates,
+# which retention never touches, so it keeps counting archived predictions.
+import argparse
+import logging
+import os
+from array import array
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from pathlib import Path
+
+from sqlalchemy import Float, Integer, String, and_, delete, func, or_, select, sql, text
+from sqlalchemy.orm import Session
+
+from . import partitions
+from .database import PredictionLog
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(os.getenv("LOG_ARCHIVE_DIR", "archive/prediction_logs"))
+RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+COMPRESSION = os.getenv("LOG_ARCHIVE_COMPRESSION", "zstd")
+CHUNK_SIZE = int(os.getenv("LOG_ARCHIVE_CHUNK_SIZE", "50000"))
+# archived days one /history page may open; a page that runs out returns a cursor below the last one
+PAGE_DAYS = int(os.getenv("LOG_ARCHIVE_PAGE_DAYS", "7"))
+# ids per DELETE ... WHERE id IN (...), under sqlite's bound-parameter limit
+_DELETE_BATCH = 500
+
+COLUMNS = [c.name for c in PredictionLog.__table__.columns]
+
+
+# pyarrow (which pulls in pandas) is imported by the functions that read or write files, so the
+# API and the aggregates module don't pay for it until the archive is actually used
+
+
+def _arrow_type(column):
+    import pyarrow as pa
+
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, String):
+        return pa.string()
+    return pa.timestamp("us", tz="UTC")
+
+
+@cache
+def arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([(c.name, _arrow_type(c)) for c in PredictionLog.__table__.columns])
+
+
+def _utc(value: datetime) -> datetime:
+    # sqlite hands back naive UTC datetimes, postgres aware ones
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def archived_files(archive_dir: Path = ARCHIVE_DIR) -> dict[datetime, list[Path]]:
+    """Archived day (UTC midnight) -> its Parquet files, oldest day first"""
+    days = {}
+    for path in sorted(Path(archive_dir).glob("*.parquet")):
+        day = datetime.strptime(path.name[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        days.setdefault(day, []).append(path)
+    return dict(sorted(days.items()))
+
+
+def _next_path(archive_dir: Path, day: datetime) -> Path:
+    stem = f"{day:%Y-%m-%d}"
+    path = archive_dir / f"{stem}.parquet"
+    n = 0
+    while path.exists():
+        n += 1
+        path = archive_dir / f"{stem}.{n}.parquet"
+    return path
+
+
+def export_day(db: Session, day: datetime, archive_dir: Path = ARCHIVE_DIR, chunk_size: int = CHUNK_SIZE) -> array:
+    """Write the log rows up to the end of `day` to a new Parquet file, one row group per chunk; returns their ids.
+
+    archive_logs calls this for the oldest day still in the table, so that is exactly the day's
+    rows. Only the upper bound is used: sqlite compares timestamps as text, and a row stored
+    without microseconds at exactly midnight would otherwise fall outside both neighbouring days.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    end = day + timedelta(days=1)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = _next_path(archive_dir, day)
+    tmp = path.with_suffix(".tmp")
+    columns = [getattr(PredictionLog, c) for c in COLUMNS]
+    ids = array("q")
+    last = None
+    with pq.ParquetWriter(tmp, arrow_schema(), compression=COMPRESSION) as writer:
+        while True:
+            # keyset over (created_at, id) inside the day, so memory stays at one chunk
+            query = select(*columns).where(PredictionLog.created_at < end)
+            if last is not None:
+                query = query.where(
+                    or_(
+                        PredictionLog.created_at > last[0],
+                        and_(PredictionLog.created_at == last[0], PredictionLog.id > last[1]),
+                    )
+                )
+            rows = db.execute(query.order_by(PredictionLog.created_at, PredictionLog.id).limit(chunk_size)).all()
+            if not rows:
+                break
+            records = [dict(r._mapping) for r in rows]
+            for record in records:
+                record["created_at"] = _utc(record["created_at"])
+            writer.write_table(pa.Table.from_pylist(records, schema=arrow_schema()))
+            ids.extend(r.id for r in rows)
+            last = (rows[-1].created_at, rows[-1].id)
+    if ids:
+        os.replace(tmp, path)
+    else:
+        tmp.unlink()
+    return ids
+
+
+def _delete_ids(db: Session, logs, ids: array, end: datetime) -> int:
+    deleted = 0
+    for start in range(0, len(ids), _DELETE_BATCH):
+        batch = ids[start : start + _DELETE_BATCH].tolist()
+        deleted += db.execute(delete(logs).where(logs.c.created_at < end, logs.c.id.in_(batch))).rowcount
+    return deleted
+
+
+def _log_table(name: str):
+    return sql.table(name, sql.column("id"), sql.column("created_at"))
+
+
+def _drop_day(db: Session, day: datetime, ids: array) -> None:
+    """Delete the exported rows of `day`, in the transaction the caller commits"""
+    end = day + timedelta(days=1)
+    if not partitions.enabled(db.get_bind()):
+        _delete_ids(db, PredictionLog.__table__, ids, end)
+        return
+    # rows that went to the default partition first: detaching locks the whole table until commit
+    deleted = _delete_ids(db, _log_table(partitions.DEFAULT_PARTITION), ids, end)
+    detached = partitions.detach_partition(db.connection(), day)
+    if detached is None:
+        return
+    day_logs = _log_table(detached)
+    if db.scalar(select(func.count()).select_from(day_logs)) == len(ids) - deleted:
+        # everything in the partition was exported
+        db.execute(text(f"DROP TABLE {detached}"))
+    else:
+        # rows committed after the export: drop_detached keeps them in the default partition
+        _delete_ids(db, day_logs, ids, end)
+        partitions.drop_detached(db.connection(), detached)
+
+
+def archive_logs(
+    db: Session,
+    days: int = RETENTION_DAYS,
+    archive_dir: Path = ARCHIVE_DIR,
+    now: datetime | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> list[dict]:
+    """Move every whole UTC day older than `days` out of prediction_logs into Parquet, oldest first"""
+    cutoff = partitions.day_start(now or datetime.now(timezone.utc)) - timedelta(days=days)
+    archive_dir = Path(archive_dir)
+    moved = []
+    while True:
+        # the oldest remaining row picks the next day, so only days that hold rows are visited
+        oldest = db.scalar(select(func.min(PredictionLog.created_at)).where(PredictionLog.created_at < cutoff))
+        if oldest is None:
+            break
+        day = partitions.day_start(oldest)
+        ids = export_day(db, day, archive_dir, chunk_size)
+        _drop_day(db, day, ids)
+        db.commit()
+        logger.info("archived %d prediction logs of %s", len(ids), f"{day:%Y-%m-%d}")
+        moved.append({"day": f"{day:%Y-%m-%d}", "rows": len(ids)})
+
+    if partitions.enabled(db.get_bind()):
+        # partitions that never received a row still have to go
+        conn = db.connection()
+        for name in partitions.list_partitions(conn):
+            day = partitions.partition_day(name)
+            if day is not None and day < cutoff:
+                partitions.drop_partition(conn, day)
+        db.commit()
+        partitions.ensure_partitions(db.get_bind(), now=now)
+    return moved
+
+
+def _matches(table, filters: dict, since, until, before):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    mask = pc.is_valid(table["id"])
+    for column, value in filters.items():
+        if value is not None:
+            mask = pc.and_(mask, pc.equal(table[column], value))
+    created_at = table["created_at"]
+    if since is not None:
+        mask = pc.and_(mask, pc.greater_equal(created_at, pa.scalar(_utc(since), created_at.type)))
+    if until is not None:
+        mask = pc.and_(mask, pc.less(created_at, pa.scalar(_utc(until), created_at.type)))
+    if before is not None:
+        at = pa.scalar(_utc(before[0]), created_at.type)
+        older = pc.or_(pc.less(created_at, at), pc.and_(pc.equal(created_at, at), pc.less(table["id"], before[1])))
+        mask = pc.and_(mask, older)
+    return mask
+
+
+def _pushdown(filters: dict, since, upper) -> list[tuple] | None:
+    # handed to pq.read_table, which skips row groups whose min/max statistics can't match and
+    # drops the other rows while decoding; _matches still applies the exact (created_at, id) keyset
+    expression = [(column, "=", value) for column, value in filters.items() if value is not None]
+    if since is not None:
+        expression.append(("created_at", ">=", _utc(since)))
+    if upper is not None:
+        expression.append(("created_at", "<=", upper))
+    return expression or None
+
+
+def read_history(
+    limit: int,
+    columns: list[str],
+    filters: dict,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    before: tuple[datetime, int] | None = None,
+    archive_dir: Path = ARCHIVE_DIR,
+    max_days: int = PAGE_DAYS,
+) -> tuple[list[dict], tuple[datetime, int] | None]:
+    """Up to `limit` archived rows newest first on (created_at, id), strictly older than `before`.
+
+    Only the files of days inside [since, min(until, before)] are opened, newest day first, with
+    the filters pushed into the Parquet reader. Reading stops once `limit` rows are collected or
+    `max_days` days were opened; in the latter case the second value is the keyset position to
+    resume from (below the last day opened), else None.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    upper = min((_utc(t) for t in (until, before and before[0]) if t is not None), default=None)
+    pushdown = _pushdown(filters, since, upper)
+    days = [
+        (day, paths)
+        for day, paths in reversed(archived_files(archive_dir).items())
+        if (upper is None or day <= upper) and (since is None or day + timedelta(days=1) > _utc(since))
+    ]
+    found = []
+    for opened, (day, paths) in enumerate(days):
+        if opened == max_days:
+            # everything from the last opened day's midnight up has been read
+            return found, (days[opened - 1][0], 0)
+        table = pa.concat_tables(pq.read_table(p, columns=columns, filters=pushdown) for p in paths)
+        table = table.filter(_matches(table, filters, since, until, before))
+        table = table.sort_by([("created_at", "descending"), ("id", "descending")])
+        found.extend(table.slice(0, limit - len(found)).to_pylist())
+        if len(found) >= limit:
+            break
+    return found, None
+
+
+def iter_archived(columns: list[str], archive_dir: Path = ARCHIVE_DIR, batch_size: int = CHUNK_SIZE):
+    """Every archived row as dicts, in batches, oldest day first"""
+    import pyarrow.parquet as pq
+
+    for paths in archived_files(archive_dir).values():
+        for path in paths:
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pylist()
+
+
+def main():
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="move prediction_logs older than N days to Parquet")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="keep this many whole days hot")
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        moved = archive_logs(db, args.days, args.archive_dir, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"archived {sum(m['rows'] for m in moved)} rows over {len(moved)} days into {args.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
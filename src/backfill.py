@@ -0,0 +1,139 @@
+# backfill prediction_logs from a file of scored rows
+#
+# python -m src.backfill scores.parquet --model-version 1.0 --chunk-size 50000 --method copy
+#
+# The file is CSV or Parquet. Columns may use PredictionLog names (contract, monthly_charges, ...)
+# or CustomerInput names (Contract, MonthlyCharges, ...), so a churn.csv-shaped file joined with
+# src.score_file output loads as is. churn_probability is required. churn_prediction and
+# risk_level are derived from it when missing. prediction_id is generated when missing.
+# created_at / model_version columns win over --created-at / --model-version. Missing customer
+# columns are stored as NULL. Each chunk is one transaction (rows + /stats aggregates), so an
+# interrupted run can be resumed by skipping the chunks already loaded (--skip-rows).
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .bulk_ingest import COLUMNS, METHODS
+from .database import SessionLocal, get_engine
+from .log_writer import write_prediction_logs
+from .model_loader import read_active_version
+from .partitions import enabled as partitions_enabled
+from .partitions import ensure_days
+from .predictor import LOG_COLUMNS, new_prediction_id
+
+logger = logging.getLogger(__name__)
+
+# CustomerInput field -> PredictionLog column
+_RENAMES = {field: column for column, field in LOG_COLUMNS.items()}
+
+
+class BackfillError(ValueError):
+    pass
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Stream a CSV or Parquet file in chunks of at most chunk_size rows"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def rows_from_frame(df: pd.DataFrame, model_version: str, created_at: datetime) -> list[dict]:
+    """One chunk of the input file -> PredictionLog row dicts"""
+    df = df.rename(columns=_RENAMES)
+    if "churn_probability" not in df.columns:
+        raise BackfillError("input needs a churn_probability column")
+    if "total_charges" in df.columns:
+        # churn.csv keeps blanks as " "
+        df["total_charges"] = pd.to_numeric(df["total_charges"], errors="coerce")
+    p = df["churn_probability"].to_numpy(dtype=float)
+    # same rules as prediction_for / risk_level_for
+    if "churn_prediction" not in df.columns:
+        df["churn_prediction"] = np.where(p > 0.5, "Yes", "No")
+    if "risk_level" not in df.columns:
+        df["risk_level"] = np.where(p < 0.3, "Low", np.where(p < 0.7, "Medium", "High"))
+    if "prediction_id" not in df.columns:
+        df["prediction_id"] = [new_prediction_id() for _ in range(len(df))]
+    if "model_version" not in df.columns:
+        df["model_version"] = model_version
+    if "created_at" in df.columns:
+        df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    else:
+        df["created_at"] = created_at
+    df = df.reindex(columns=COLUMNS)
+    # NaN -> None so both COPY and executemany write NULL
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def backfill(
+    path: Path,
+    chunk_size: int = 50000,
+    method: str = "copy",
+    model_version: str | None = None,
+    created_at: datetime | None = None,
+    skip_rows: int = 0,
+    session_factory=SessionLocal,
+) -> dict:
+    """Load the file chunk by chunk; returns rows loaded, seconds and rows/sec"""
+    model_version = model_version or read_active_version()
+    created_at = created_at or datetime.now(timezone.utc)
+    loaded = seen = 0
+    start = time.perf_counter()
+    for chunk in read_chunks(path, chunk_size):
+        offset, seen = seen, seen + len(chunk)
+        if seen <= skip_rows:
+            continue
+        chunk = chunk.iloc[max(skip_rows - offset, 0) :]
+        chunk_start = time.perf_counter()
+        rows = rows_from_frame(chunk, model_version, created_at)
+        db = session_factory()
+        try:
+            if partitions_enabled(db.get_bind()):
+                # past days would otherwise all land in the default partition
+                ensure_days(db.get_bind(), {row["created_at"] for row in rows})
+            write_prediction_logs(db, rows, method)
+        finally:
+            db.close()
+        loaded += len(rows)
+        elapsed = time.perf_counter() - chunk_start
+        logger.info("loaded %d rows (%d total), %.0f rows/s", len(rows), loaded, len(rows) / elapsed)
+    seconds = time.perf_counter() - start
+    return {
+        "rows": loaded,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(loaded / seconds, 1) if seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backfill prediction_logs from a CSV / Parquet file of scored rows")
+    parser.add_argument("input", help="CSV or Parquet with churn_probability (+ customer fields)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per COPY / transaction (default 50000)")
+    parser.add_argument("--method", choices=METHODS, default="copy", help="copy needs postgres, else insert is used")
+    parser.add_argument("--model-version", default=None, help="for rows without one (default: the active version)")
+    parser.add_argument("--created-at", type=datetime.fromisoformat, default=None, help="for rows without one")
+    parser.add_argument("--skip-rows", type=int, default=0, help="resume after this many input rows")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    dialect = get_engine().dialect.name
+    method = args.method if dialect == "postgresql" else "insert"
+    if method != args.method:
+        logger.info("COPY needs postgres; %s gets executemany INSERTs", dialect)
+    result = backfill(args.input, args.chunk_size, method, args.model_version, args.created_at, args.skip_rows)
+    print(f"{result['rows']} rows in {result['seconds']}s ({result['rows_per_sec']} rows/s, {method})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# micro-batching of concurrent single predictions (MICROBATCH_WINDOW_MS > 0)
+#
+# /predict calls are queued on the event loop and scored together through
+# ChurnPredictor._predict_batch, one encode + one model call per batch, and each caller gets its
+# own output (and log row) back. A batch is cut when its first request has waited the window or
+# MICROBATCH_MAX_SIZE requests are queued, whichever comes first. Requests are grouped by the
+# version that will serve them, so pinned versions and the A/B split still apply per request.
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING
+
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+from .schemas import CustomerInput, PredictionOutput
+
+if TYPE_CHECKING:
+    from .model_loader import ModelArtifacts
+    from .predictor import ChurnPredictor
+
+WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "0"))
+MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+
+# batch key of the A/B control group. Its version is resolved when the batch is scored, in the
+# threadpool: reading it on the event loop could load the model there
+_ACTIVE = object()
+
+_BATCH_SIZE = metrics.MICROBATCH_SIZE.labels()
+_QUEUE_WAIT = metrics.MICROBATCH_WAIT_SECONDS.labels()
+
+
+class _Batch:
+    def __init__(self, model_version: "str | ModelArtifacts | object | None"):
+        self.model_version = model_version
+        self.customers: list[CustomerInput] = []
+        self.futures: list[asyncio.Future] = []
+        self.enqueued: list[float] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent single predictions into one matrix per window"""
+
+    def __init__(self, predictor: "ChurnPredictor", window: float = WINDOW_MS / 1000, max_size: int = MAX_SIZE):
+        self.predictor = predictor
+        self.window = window
+        self.max_size = max_size
+        # model version (name or resolved artifacts) -> the batch still collecting; only touched on the event loop
+        self._open: dict["str | ModelArtifacts | object | None", _Batch] = {}
+        # scoring tasks, held so they aren't garbage collected mid-flight
+        self._running: set[asyncio.Task] = set()
+        self._batches = 0
+        self._requests = 0
+        self._full = 0
+
+    @classmethod
+    def from_env(cls, predictor: "ChurnPredictor") -> "MicroBatcher | None":
+        # MICROBATCH_WINDOW_MS=0 (default) scores every request on its own
+        return cls(predictor) if WINDOW_MS > 0 else None
+
+    async def submit(
+        self, customer: CustomerInput, model_version: "str | ModelArtifacts | None" = None
+    ) -> tuple[PredictionOutput, dict | None]:
+        """Score one customer in the next batch; returns its output and its log row (None when already queued)"""
+        # draw the A/B split per request, not once per batch; the control group is pinned to the
+        # active version so _predict_batch doesn't draw again for the whole batch
+        split = self.predictor.traffic_split
+        if model_version is None and split is not None:
+            model_version = split.choose() or _ACTIVE
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(model_version)
+        if batch is None:
+            batch = self._open[model_version] = _Batch(model_version)
+            batch.timer = loop.call_later(self.window, self._cut, batch)
+        future = loop.create_future()
+        batch.customers.append(customer)
+        batch.futures.append(future)
+        batch.enqueued.append(time.perf_counter())
+        if len(batch.customers) >= self.max_size:
+            batch.timer.cancel()
+            self._full += 1
+            self._cut(batch)
+        return await future
+
+    def _cut(self, batch: _Batch) -> None:
+        if self._open.get(batch.model_version) is batch:
+            del self._open[batch.model_version]
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    def _score(self, batch: _Batch) -> tuple[list[PredictionOutput], list[dict]]:
+        # waits end when scoring starts, so time spent queued for the threadpool counts too
+        start = time.perf_counter()
+        for enqueued in batch.enqueued:
+            _QUEUE_WAIT.observe(start - enqueued)
+        _BATCH_SIZE.observe(len(batch.customers))
+        model_version = batch.model_version
+        if model_version is _ACTIVE:
+            model_version = self.predictor.loader.get()
+        return self.predictor._predict_batch(batch.customers, model_version, True)
+
+    async def _run(self, batch: _Batch) -> None:
+        self._batches += 1
+        self._requests += len(batch.customers)
+        try:
+            outputs, rows = await run_in_threadpool(self._score, batch)
+        except Exception as e:
+            # every request in a batch shares the version, so they share the failure too
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # no rows back when the write-behind logger already took them
+        for future, output, row in zip(batch.futures, outputs, rows or [None] * len(outputs)):
+            if not future.done():
+                future.set_result((output, row))
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+            "batches": self._batches,
+            "requests": self._requests,
+            "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "full_batches": self._full,
+            "collecting": sum(len(b.customers) for b in self._open.values()),
+        }
@@ -0,0 +1,6 @@
+# benchmarks for the serving stack, run with `python -m src.benchmarks.<name>`
+import os
+import tempfile
+
+# src.database needs a URL at import time; benchmarks use a throwaway SQLite file as the local stand-in
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'churn_bench.db')}")
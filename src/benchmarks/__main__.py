@@ -0,0 +1,41 @@
+# python -m src.benchmarks [--stages ...] [--output run.json] [--compare baseline.json --threshold 0.2]
+import argparse
+import sys
+import warnings
+
+from . import report
+from .suite import STAGES, run
+from .timing import print_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serving stack benchmark suite")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=2000, help="calls per single-row case (others scale down)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --output run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed regression vs baseline, 0.2 = 20%% (default)"
+    )
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    results = run(args.stages, repeat=args.repeat)
+    print_table("benchmark results", results)
+
+    if args.output:
+        report.save(results, args.output)
+        print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        regressions = report.compare(report.load(args.compare), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.threshold:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
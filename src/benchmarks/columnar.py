@@ -0,0 +1,114 @@
+# per-record JSON (/predict/batch) vs the columnar format (/predict/columnar)
+#
+# python -m src.benchmarks.columnar
+# python -m src.benchmarks.columnar --rows 10000 --repeat 5
+#
+# Payload bytes for the same customers in each encoding, raw and gzipped, and server CPU per
+# request split into decode + validate, scoring and response encoding (time.process_time, no DB).
+# Per-record batches are capped at MAX_BATCH_SIZE, so the 10k rows go in as several calls.
+import argparse
+import gzip
+import json
+import time
+import warnings
+
+import msgpack
+
+from .. import columnar
+from ..predictor import ChurnPredictor
+from ..schemas import MAX_BATCH_SIZE, BatchInput, BatchPredictionOutput
+from .suite import _customers
+
+
+def payloads(customers) -> dict[str, bytes]:
+    records = [c.model_dump() for c in customers]
+    columns = {"columns": columnar.to_columns(customers), "dictionary_id": columnar.DICTIONARY_ID}
+    return {
+        "records json": json.dumps({"customers": records}).encode(),
+        "columnar json": json.dumps(columns).encode(),
+        "columnar msgpack": msgpack.packb(columns),
+    }
+
+
+def _cpu(fn, repeat: int) -> float:
+    # best of `repeat`, in ms: process_time counts this process only, so I/O waits don't show up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1e3
+
+
+def run(rows: int = 10000, repeat: int = 5) -> dict:
+    predictor = ChurnPredictor()
+    customers = _customers(rows)
+    sizes = {name: {"raw": len(b), "gzip": len(gzip.compress(b, 6))} for name, b in payloads(customers).items()}
+
+    chunks = [customers[i : i + MAX_BATCH_SIZE] for i in range(0, rows, MAX_BATCH_SIZE)]
+    record_bodies = [payloads(chunk)["records json"] for chunk in chunks]
+    columnar_body = payloads(customers)["columnar msgpack"]
+    columnar_json = payloads(customers)["columnar json"]
+
+    def records_decode():
+        return [BatchInput.model_validate(json.loads(b)) for b in record_bodies]
+
+    batches = records_decode()
+    outputs = [predictor.predict_many(b.customers) for b in batches]
+    columns, n_rows = columnar.parse(columnar_body, columnar.MSGPACK)
+    result = predictor.predict_columns(columns, n_rows)
+
+    cpu = {
+        "records json": {
+            "decode+validate": _cpu(records_decode, repeat),
+            "score": _cpu(lambda: [predictor.predict_many(b.customers) for b in batches], repeat),
+            "encode": _cpu(
+                lambda: [
+                    BatchPredictionOutput(count=len(o), predictions=o).model_dump_json(exclude_none=True)
+                    for o in outputs
+                ],
+                repeat,
+            ),
+        },
+        "columnar json": {
+            "decode+validate": _cpu(lambda: columnar.parse(columnar_json), repeat),
+            "score": _cpu(lambda: predictor.predict_columns(columns, n_rows), repeat),
+            "encode": _cpu(lambda: columnar.encode_response(result), repeat),
+        },
+        "columnar msgpack": {
+            "decode+validate": _cpu(lambda: columnar.parse(columnar_body, columnar.MSGPACK), repeat),
+            "score": _cpu(lambda: predictor.predict_columns(columns, n_rows), repeat),
+            "encode": _cpu(lambda: columnar.encode_response(result, columnar.MSGPACK), repeat),
+        },
+    }
+    for stages in cpu.values():
+        stages["total"] = sum(stages.values())
+    return {"rows": rows, "bytes": sizes, "cpu_ms": cpu}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-record JSON vs columnar payload size and server CPU")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    results = run(args.rows, args.repeat)
+    print(f"\nrequest body for {results['rows']} rows")
+    print(f"{'format':<20}{'raw KB':>12}{'gzip KB':>12}")
+    for name, size in results["bytes"].items():
+        print(f"{name:<20}{size['raw'] / 1024:>12.1f}{size['gzip'] / 1024:>12.1f}")
+    print(f"\nserver CPU ms per {results['rows']} rows (best of {args.repeat})")
+    print(f"{'format':<20}{'decode+validate':>16}{'score':>10}{'encode':>10}{'total':>10}")
+    for name, stages in results["cpu_ms"].items():
+        print(
+            f"{name:<20}{stages['decode+validate']:>16.1f}{stages['score']:>10.1f}"
+            f"{stages['encode']:>10.1f}{stages['total']:>10.1f}"
+        )
+    base = results["cpu_ms"]["records json"]["total"]
+    for name, stages in results["cpu_ms"].items():
+        print(f"  {name:<18}{base / stages['total']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# batch scoring with and without ?explain=true
+#
+# python -m src.benchmarks.explain
+# python -m src.benchmarks.explain --synthetic-forest 100   (tree path attribution)
+#
+# Times predict_many (no DB) at each batch size, scoring only vs scoring plus top-k
+# contributions, and reports the relative overhead of explain. The "math" rows time only the
+# encoded matrix -> scores (+ contributions and top-k) step, without building response objects.
+import argparse
+import tempfile
+import warnings
+from pathlib import Path
+
+from ..model_loader import MODEL_DIR, ModelArtifacts, ModelLoader, read_active_version, version_dir
+from ..predictor import ChurnPredictor
+from .startup import _synthetic_forest
+from .suite import BATCH_SIZES, _customers
+from .timing import measure, print_table
+
+
+def run(sizes=BATCH_SIZES, top_k: int = 3, synthetic_forest: int = 0, repeat: int = 200) -> dict:
+    predictor = ChurnPredictor()
+    customers = _customers(max(sizes))
+    with tempfile.TemporaryDirectory() as tmp:
+        version = None
+        if synthetic_forest:
+            active = read_active_version()
+            base = ModelArtifacts(active, version_dir(active, MODEL_DIR), fmt="pickle")
+            _synthetic_forest(base, Path(tmp) / "forest", synthetic_forest)
+            # a throwaway registry so the shared singleton stays on the real model
+            predictor.loader = ModelLoader.from_dir(Path(tmp))
+            predictor.loader.get("forest")
+            version = "forest"
+
+        results = {}
+        for size in sizes:
+            batch = customers[:size]
+            calls = max(3, min(repeat, 20000 // size))
+            off = measure(
+                lambda: predictor.predict_many(batch, model_version=version), repeat=calls, warmup=2, rows=size
+            )
+            on = measure(
+                lambda: predictor.predict_many(batch, model_version=version, explain_top_k=top_k),
+                repeat=calls,
+                warmup=2,
+                rows=size,
+            )
+            on["overhead_ms"] = round((on["mean_us"] - off["mean_us"]) / 1000, 3)
+            on["overhead_pct"] = round((on["mean_us"] / off["mean_us"] - 1) * 100, 1)
+            results[f"batch={size} explain off"] = off
+            results[f"batch={size} explain on"] = on
+
+            artifacts = predictor.loader.get(version)
+            X = artifacts.encoder.encode_many(batch, scaled=artifacts.inference.expects_scaled)
+            explainer = artifacts.explainer
+            math_off = measure(lambda: artifacts.inference.churn_proba(X), repeat=calls, warmup=2, rows=size)
+            math_on = measure(
+                lambda: (artifacts.inference.churn_proba(X), explainer.top_k(explainer.contributions(X), top_k)),
+                repeat=calls,
+                warmup=2,
+                rows=size,
+            )
+            math_on["overhead_ms"] = round((math_on["mean_us"] - math_off["mean_us"]) / 1000, 3)
+            math_on["overhead_pct"] = round((math_on["mean_us"] / math_off["mean_us"] - 1) * 100, 1)
+            results[f"batch={size} math off"] = math_off
+            results[f"batch={size} math on"] = math_on
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="predict_many latency with and without explanations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--synthetic-forest", type=int, default=0, metavar="N_TREES", help="benchmark a random forest")
+    parser.add_argument("--repeat", type=int, default=200, help="max calls per case")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    results = run(args.sizes, args.top_k, args.synthetic_forest, args.repeat)
+    print_table(f"explain top_k={args.top_k}", results)
+    print("\nadded mean latency per call with explain")
+    for name, r in results.items():
+        if "overhead_pct" in r:
+            print(f"  {name.replace(' on', ''):<24}{r['overhead_ms']:>+12} ms{r['overhead_pct']:>+10}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# API import time, startup and first-request latency
+#
+# python -m src.benchmarks.imports
+# python -m src.benchmarks.imports --runs 5 --top 15
+#
+# Each case runs in a fresh interpreter against a throwaway SQLite file:
+#   import     `import src.api` alone (no DB connection, no model load)
+#   lifespan   app startup under TestClient, i.e. model load (+ warm-up with MODEL_WARMUP=1)
+#   first      the first POST /predict after startup, then the median of the next 20
+#   bare       no lifespan at all (TestClient without `with`): the first request pays the load
+# The import breakdown comes from `python -X importtime -c "import src.api"`, largest
+# cumulative first, counting only src modules and the top-level packages they pull in.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+_CHILD = """
+import json, os, statistics, sys, time
+start = time.perf_counter()
+import src.api
+imported = time.perf_counter() - start
+modules = sorted(m for m in ("pandas", "pyarrow", "sklearn", "scipy") if m in sys.modules)
+from fastapi.testclient import TestClient
+from src.benchmarks.inference import SAMPLE
+from src.database import create_tables
+create_tables()
+loaded_at_import = src.api.predictor.loaded
+client = TestClient(src.api.app)
+if sys.argv[1] == "bare":
+    lifespan = 0.0
+else:
+    start = time.perf_counter()
+    client.__enter__()
+    lifespan = time.perf_counter() - start
+times = []
+for _ in range(21):
+    start = time.perf_counter()
+    assert client.post("/predict", json=SAMPLE.model_dump()).status_code == 200
+    times.append(time.perf_counter() - start)
+if sys.argv[1] != "bare":
+    client.__exit__(None, None, None)
+print(json.dumps({"import_s": imported, "lifespan_s": lifespan, "first_ms": times[0] * 1000,
+                  "next_ms": statistics.median(times[1:]) * 1000, "loaded_at_import": loaded_at_import,
+                  "modules": modules}))
+"""
+
+
+def _env(db_path: Path, **extra) -> dict:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "LOG_WRITER_ENABLED": "0", **extra}
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def import_breakdown(top: int = 12) -> list[tuple[str, float]]:
+    """(module, cumulative ms) for the slowest imports under `import src.api`"""
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "import src.api"],
+            cwd=ROOT,
+            env=_env(Path(tmp) / "bench.db"),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        # the app's own modules, plus the top-level packages they import
+        if name.startswith("src") or (depth <= 1 and "." not in name):
+            rows.append((name, int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def _case(mode: str, warm_up: bool, runs: int) -> dict:
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = subprocess.run(
+                [sys.executable, "-W", "ignore", "-c", _CHILD, mode],
+                cwd=ROOT,
+                env=_env(Path(tmp) / "bench.db", MODEL_WARMUP="1" if warm_up else "0"),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    summary = {
+        k: round(float(np.median([r[k] for r in results])), 3)
+        for k in ("import_s", "lifespan_s", "first_ms", "next_ms")
+    }
+    summary["loaded_at_import"] = any(r["loaded_at_import"] for r in results)
+    summary["heavy_modules_at_import"] = results[0]["modules"]
+    return summary
+
+
+def run(runs: int = 3, top: int = 12) -> dict:
+    return {
+        "breakdown": import_breakdown(top),
+        "cases": {
+            "lifespan, warm-up on": _case("lifespan", True, runs),
+            "lifespan, warm-up off": _case("lifespan", False, runs),
+            "no lifespan (lazy)": _case("bare", False, runs),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API import time, startup and first-request latency")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per case (medians reported)")
+    parser.add_argument("--top", type=int, default=12, help="modules in the import breakdown")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.top)
+    print("\nimport src.api, cumulative (python -X importtime)")
+    for name, ms in result["breakdown"]:
+        print(f"  {name:<40}{ms:>10.1f} ms")
+    print(f"\n{'case':<24}{'import s':>10}{'startup s':>11}{'1st req ms':>12}{'next ms':>10}")
+    for name, r in result["cases"].items():
+        print(f"{name:<24}{r['import_s']:>10}{r['lifespan_s']:>11}{r['first_ms']:>12}{r['next_ms']:>10}")
+    first = next(iter(result["cases"].values()))
+    loaded = any(r["loaded_at_import"] for r in result["cases"].values())
+    print(f"\nmodel loaded at import: {loaded}; heavy modules at import: {first['heavy_modules_at_import'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# per-call latency: legacy sklearn path vs compiled encoder vs native linear engine
+import argparse
+import warnings
+
+from ..predictor import ChurnPredictor
+from ..schemas import CustomerInput
+from .timing import measure, print_table
+
+SAMPLE = CustomerInput(
+    gender="Male",
+    SeniorCitizen=0,
+    Partner="Yes",
+    Dependents="No",
+    tenure=24,
+    PhoneService="Yes",
+    MultipleLines="No",
+    InternetService="Fiber optic",
+    OnlineSecurity="No",
+    OnlineBackup="Yes",
+    DeviceProtection="No",
+    TechSupport="No",
+    StreamingTV="Yes",
+    StreamingMovies="No",
+    Contract="Month-to-month",
+    PaperlessBilling="Yes",
+    PaymentMethod="Electronic check",
+    MonthlyCharges=70.5,
+    TotalCharges=1692.0,
+)
+
+
+def run(repeat: int = 2000) -> dict:
+    predictor = ChurnPredictor()
+    loader = predictor.loader
+    model = loader.model
+
+    def legacy():
+        # what predict() used to do: DataFrame preprocessing, then predict + predict_proba
+        X = predictor._preprocess_input(SAMPLE)
+        model.predict(X)
+        model.predict_proba(X)
+
+    def encoder_sklearn():
+        X = loader.encoder.encode(SAMPLE)
+        model.predict_proba(X)
+
+    def native():
+        loader.inference.score(SAMPLE)
+
+    results = {
+        "legacy pandas + predict/predict_proba": measure(legacy, repeat=max(repeat // 10, 50)),
+        "compiled encoder + predict_proba": measure(encoder_sklearn, repeat=repeat),
+    }
+    if loader.inference.native:
+        results["native engine (dot + sigmoid)"] = measure(native, repeat=repeat)
+    else:
+        print("model is not linear; native engine falls back to sklearn")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="single-row inference latency")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    results = run(args.repeat)
+    print_table("single-row scoring latency", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# prediction_logs bulk load: ORM objects vs executemany vs COPY
+#
+# python -m src.benchmarks.ingest --rows 50000 --chunk-size 10000
+# DATABASE_URL=postgresql://... python -m src.benchmarks.ingest   (COPY needs postgres + psycopg2)
+#
+# Loads the same scored rows into prediction_logs of the current DATABASE_URL once per method,
+# one transaction per chunk, and reports rows/s. /stats aggregates are left out so only the
+# table load is timed. "orm per row" is the old request path (db.add + commit per prediction)
+# and runs on at most --orm-row-limit rows. Rows are tagged with their own model_version and
+# deleted again after each method.
+import argparse
+import time
+import warnings
+
+from sqlalchemy import delete
+
+from ..backfill import rows_from_frame
+from ..bulk_ingest import copy_supported, ingest_rows
+from ..database import PredictionLog, SessionLocal, create_tables
+from ..predictor import ChurnPredictor
+from .suite import _customers
+
+VERSION = "ingest-bench"
+
+
+def _rows(n: int) -> list[dict]:
+    import pandas as pd
+
+    customers = _customers(n)
+    frame = pd.DataFrame([c.model_dump() for c in customers])
+    frame["churn_probability"] = ChurnPredictor().loader.get().inference.score_many(customers)
+    return rows_from_frame(frame, VERSION, pd.Timestamp.now(tz="UTC"))
+
+
+def _load(rows: list[dict], chunk_size: int, method: str) -> None:
+    for i in range(0, len(rows), chunk_size):
+        chunk = [dict(row) for row in rows[i : i + chunk_size]]
+        db = SessionLocal()
+        try:
+            if method == "orm per row":
+                for row in chunk:
+                    db.add(PredictionLog(**row))
+                    db.commit()
+            elif method == "orm":
+                db.add_all([PredictionLog(**row) for row in chunk])
+                db.commit()
+            else:
+                ingest_rows(db, chunk, method)
+                db.commit()
+        finally:
+            db.close()
+
+
+def _cleanup() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(PredictionLog).where(PredictionLog.model_version == VERSION))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(rows: int = 50000, chunk_size: int = 10000, orm_row_limit: int = 2000) -> dict:
+    create_tables()
+    data = _rows(rows)
+    db = SessionLocal()
+    try:
+        methods = ["orm per row", "orm", "insert"] + (["copy"] if copy_supported(db) else [])
+        dialect = db.get_bind().dialect.name
+    finally:
+        db.close()
+    results = {}
+    for method in methods:
+        batch = data[:orm_row_limit] if method == "orm per row" else data
+        _cleanup()
+        start = time.perf_counter()
+        _load(batch, chunk_size, method)
+        seconds = time.perf_counter() - start
+        results[method] = {
+            "rows": len(batch),
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(len(batch) / seconds),
+        }
+    _cleanup()
+    return {"dialect": dialect, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prediction_logs bulk load throughput by method")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--orm-row-limit", type=int, default=2000, help="rows for the commit-per-row baseline")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    report = run(args.rows, args.chunk_size, args.orm_row_limit)
+    results = report["results"]
+    print(f"\nprediction_logs load on {report['dialect']}, chunks of {args.chunk_size}")
+    print(f"{'method':<14}{'rows':>10}{'seconds':>10}{'rows/s':>10}{'vs orm':>10}")
+    for name, r in results.items():
+        speedup = r["rows_per_sec"] / results["orm"]["rows_per_sec"]
+        print(f"{name:<14}{r['rows']:>10}{r['seconds']:>10}{r['rows_per_sec']:>10}{speedup:>9.2f}x")
+    if "copy" not in results:
+        print("(copy skipped: needs postgres through psycopg2)")
+
+
+if __name__ == "__main__":
+    main()
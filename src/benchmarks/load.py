@@ -0,0 +1,158 @@
+# concurrent-request load test: sync handlers + threadpool vs async handlers + async DB
+#
+# python -m src.benchmarks.load --endpoint predict --requests 2000 --concurrency 64
+#
+# Both apps run under uvicorn in a subprocess against the same DATABASE_URL (a throwaway
+# SQLite file by default, through aiosqlite on the async side). "sync" reproduces the old
+# `def` handlers on SessionLocal, where every request holds one of the threadpool slots
+# (anyio's default is 40) for its whole DB wait. "async" is src.api:app. The gap grows with
+# real network round trips, so point DATABASE_URL at Postgres for representative numbers.
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy.orm import Session
+
+from ..aggregates import read_totals
+from ..database import create_tables, get_db
+from ..history import query_history
+from ..predictor import ChurnPredictor
+from ..schemas import CustomerInput, PredictionOutput
+from .inference import SAMPLE
+
+# the handlers as they were before the async DB layer
+sync_app = FastAPI()
+_sync_predictor = None
+
+
+def _predictor() -> ChurnPredictor:
+    global _sync_predictor
+    if _sync_predictor is None:
+        _sync_predictor = ChurnPredictor()
+    return _sync_predictor
+
+
+@sync_app.post("/predict", response_model=PredictionOutput)
+def sync_predict(customer: CustomerInput, db: Session = Depends(get_db)):
+    return _predictor().predict(customer, db=db)
+
+
+@sync_app.get("/stats")
+def sync_stats(model_version: Optional[str] = None, db: Session = Depends(get_db)):
+    return read_totals(db, model_version=model_version)
+
+
+@sync_app.get("/history")
+def sync_history(limit: int = Query(10, ge=1, le=1000), db: Session = Depends(get_db)):
+    predictions, next_cursor = query_history(db, limit=limit)
+    return {"total_returned": len(predictions), "next_cursor": next_cursor, "predictions": predictions}
+
+
+APPS = {"sync": "src.benchmarks.load:sync_app", "async": "src.api:app"}
+ENDPOINTS = {
+    "predict": ("POST", "/predict"),
+    "stats": ("GET", "/stats"),
+    "history": ("GET", "/history?limit=50"),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app_path: str, port: int, env: dict | None = None) -> subprocess.Popen:
+    root = Path(__file__).resolve().parents[2]
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        cwd=root,
+        env={**os.environ, "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "0"), **(env or {})},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1.0)
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{app_path} did not start on port {port}")
+
+
+async def _fire(base_url: str, endpoint: str, requests: int, concurrency: int) -> dict:
+    method, path = ENDPOINTS[endpoint]
+    payload = SAMPLE.model_dump() if method == "POST" else None
+    latencies = []
+    errors = 0
+    queue = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker():
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                r = await client.request(method, path, json=payload)
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code != 200
+
+        # warm up connections and lazy imports
+        await asyncio.gather(*(client.request(method, path, json=payload) for _ in range(min(concurrency, 20))))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "req_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def run(endpoint: str = "predict", requests: int = 2000, concurrency: int = 64, apps=("sync", "async")) -> dict:
+    create_tables()
+    results = {}
+    for name in apps:
+        port = _free_port()
+        proc = _start_server(APPS[name], port)
+        try:
+            results[name] = asyncio.run(_fire(f"http://127.0.0.1:{port}", endpoint, requests, concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="concurrent-request throughput, sync vs async handlers")
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="predict")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--apps", nargs="+", choices=list(APPS), default=list(APPS))
+    args = parser.parse_args()
+
+    results = run(args.endpoint, args.requests, args.concurrency, args.apps)
+    print(f"\n{args.endpoint}: {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'handlers':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['req_per_sec']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# /predict under concurrent load with and without the micro-batcher
+#
+# python -m src.benchmarks.microbatch --requests 4000 --concurrency 64 --windows 0 1 2 5
+#
+# Starts src.api:app under uvicorn once per MICROBATCH_WINDOW_MS value (0 = off) and fires the
+# same single-customer /predict load at it, reporting throughput, latency percentiles and the
+# batch sizes the batcher actually formed. Logs go through the write-behind logger by default so
+# the comparison is about scoring; --sync-logs keeps one INSERT per request on the request path.
+# --synthetic-forest N serves a random forest instead, where each model call has a fixed cost
+# that batching spreads over the batch.
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from ..database import create_tables
+from ..model_loader import ACTIVE_FILE, MODEL_DIR, ModelArtifacts, read_active_version, version_dir
+from .load import _fire, _free_port, _start_server
+from .startup import _synthetic_forest
+
+
+def run(
+    windows=(0, 1, 2, 5),
+    requests: int = 4000,
+    concurrency: int = 64,
+    max_size: int = 64,
+    sync_logs: bool = False,
+    synthetic_forest: int = 0,
+) -> dict:
+    create_tables()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {}
+        if synthetic_forest:
+            # a throwaway registry whose active version is the forest
+            active = read_active_version()
+            base = ModelArtifacts(active, version_dir(active, MODEL_DIR), fmt="pickle")
+            _synthetic_forest(base, Path(tmp) / "forest", synthetic_forest)
+            (Path(tmp) / ACTIVE_FILE).write_text("forest")
+            env["MODEL_DIR"] = tmp
+        if not sync_logs:
+            env["LOG_WRITER_ENABLED"] = "1"
+        results = {}
+        for window in windows:
+            server_env = {**env, "MICROBATCH_WINDOW_MS": str(window), "MICROBATCH_MAX_SIZE": str(max_size)}
+            port = _free_port()
+            proc = _start_server("src.api:app", port, server_env)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                result = asyncio.run(_fire(base_url, "predict", requests, concurrency))
+                stats = httpx.get(f"{base_url}/batcher-stats").json()
+                result["mean_batch"] = stats.get("mean_batch_size", 1.0)
+                results[f"window={window:g}ms" if window else "off"] = result
+            finally:
+                proc.terminate()
+                proc.wait()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/predict throughput and tail latency with the micro-batcher")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 2, 5], help="MICROBATCH_WINDOW_MS values")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--sync-logs", action="store_true", help="log inline instead of via the write-behind logger")
+    parser.add_argument("--synthetic-forest", type=int, default=0, metavar="N_TREES", help="serve a random forest")
+    args = parser.parse_args()
+
+    results = run(args.windows, args.requests, args.concurrency, args.max_size, args.sync_logs, args.synthetic_forest)
+    model = f"{args.synthetic_forest}-tree forest" if args.synthetic_forest else "active model"
+    print(f"\n/predict ({model}): {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'batcher':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'batch':>8}{'errors':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<14}{r['req_per_sec']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+            f"{r['mean_batch']:>8}{r['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
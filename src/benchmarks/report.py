@@ -0,0 +1,43 @@
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# lower is better for latencies, higher is better for throughput
+LATENCY_METRICS = ("p50_us", "p95_us")
+THROUGHPUT_METRICS = ("rows_per_sec",)
+
+
+def save(results: dict[str, dict], path: str | Path) -> None:
+    payload = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(payload, indent=2))
+
+
+def load(path: str | Path) -> dict[str, dict]:
+    return json.loads(Path(path).read_text())["results"]
+
+
+def compare(baseline: dict[str, dict], current: dict[str, dict], threshold: float) -> list[str]:
+    """Return a line per case/metric that got worse than ``threshold`` (0.2 == 20%)"""
+    regressions = []
+    for case, new in current.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if metric in old and metric in new and old[metric] > 0 and new[metric] > old[metric] * (1 + threshold):
+                change = new[metric] / old[metric] - 1
+                regressions.append(f"{case}: {metric} {old[metric]} -> {new[metric]} (+{change:.0%})")
+        for metric in THROUGHPUT_METRICS:
+            if metric in old and metric in new and old[metric] > 0 and new[metric] < old[metric] * (1 - threshold):
+                change = 1 - new[metric] / old[metric]
+                regressions.append(f"{case}: {metric} {old[metric]} -> {new[metric]} (-{change:.0%})")
+    return regressions
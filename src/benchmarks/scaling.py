@@ -0,0 +1,102 @@
+# throughput vs number of pre-forked workers (python -m src.serve)
+#
+# python -m src.benchmarks.scaling --workers 1 2 4 8 --endpoint predict --requests 4000
+#
+# For each worker count a fresh `src.serve` is started, warmed up and loaded with the same
+# concurrent httpx client as src.benchmarks.load. Reported per run: req/s, speedup over the
+# first run, latency percentiles, how evenly the kernel spread requests over the workers
+# (from /worker-stats) and the workers' summed PSS, which stays well below N x one worker's
+# RSS because the model pages are shared copy-on-write. The load generator runs on the same
+# host and takes a core of its own; set LOG_WRITER_ENABLED=1 so SQLite writes don't serialize
+# the workers, or point DATABASE_URL at Postgres.
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from ..database import create_tables
+from .load import ENDPOINTS, _fire, _free_port
+
+
+def _start(workers: int, port: int) -> subprocess.Popen:
+    root = Path(__file__).resolve().parents[2]
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "src.serve", "--workers", str(workers), "--port", str(port)]
+        + ["--host", "127.0.0.1", "--log-level", "warning"],
+        cwd=root,
+        env={**os.environ, "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "0")},
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            stats = httpx.get(f"http://127.0.0.1:{port}/worker-stats", timeout=1.0).json()
+            if all(w["pid"] for w in stats["workers"]):
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"src.serve --workers {workers} did not start on port {port}")
+
+
+def _pss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def run(worker_counts=(1, 2, 4), endpoint: str = "predict", requests: int = 4000, concurrency: int = 64) -> dict:
+    create_tables()
+    results = {}
+    for workers in worker_counts:
+        port = _free_port()
+        proc = _start(workers, port)
+        try:
+            result = asyncio.run(_fire(f"http://127.0.0.1:{port}", endpoint, requests, concurrency))
+            stats = httpx.get(f"http://127.0.0.1:{port}/worker-stats").json()["workers"]
+            counts = [w["requests"] for w in stats]
+            result["requests_per_worker"] = counts
+            result["pss_mb_total"] = round(sum(_pss_mb(w["pid"]) for w in stats) + _pss_mb(proc.pid), 1)
+            results[workers] = result
+        finally:
+            proc.terminate()
+            proc.wait()
+    base = results[worker_counts[0]]["req_per_sec"]
+    for result in results.values():
+        result["speedup"] = round(result["req_per_sec"] / base, 2)
+    return results
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cpus), cpus})
+    parser = argparse.ArgumentParser(description="throughput scaling of src.serve over worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=default)
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="predict")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    results = run(args.workers, args.endpoint, args.requests, args.concurrency)
+    print(f"\n{args.endpoint}: {args.requests} requests, concurrency {args.concurrency}, {cpus} cores")
+    print(f"{'workers':<9}{'req/s':>10}{'speedup':>9}{'p50 ms':>9}{'p95 ms':>9}{'PSS MB':>9}  requests per worker")
+    for workers, r in results.items():
+        print(
+            f"{workers:<9}{r['req_per_sec']:>10}{r['speedup']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+            f"{r['pss_mb_total']:>9}  {r['requests_per_worker']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
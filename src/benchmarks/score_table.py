@@ -0,0 +1,73 @@
+# precomputed score tables vs encode + dot product (SCORE_TABLE=1)
+#
+# python -m src.benchmarks.score_table
+# python -m src.benchmarks.score_table --source domain   (random inputs, mostly index misses)
+#
+# For each batch size, times predict_many (no DB) with the tables off and on, and the bare
+# scoring step: encoder.encode_many + churn_proba vs ScoreTable.score_many. Batch size 1 is
+# also timed through predict / inference.score vs ScoreTable.score, the single-row path.
+import argparse
+import warnings
+
+from ..predictor import ChurnPredictor
+from ..score_table import ScoreTable, _domain_sample
+from .suite import BATCH_SIZES, _customers
+from .timing import measure, print_table
+
+
+def run(sizes=BATCH_SIZES, source: str = "train", repeat: int = 2000) -> dict:
+    predictor = ChurnPredictor()
+    artifacts = predictor.loader.get()
+    inference = artifacts.inference
+    customers = _customers(max(sizes)) if source == "train" else _domain_sample(max(sizes))
+    table = ScoreTable.from_artifacts(artifacts)
+
+    results = {}
+    single = customers[0]
+    predictor.score_tables = False
+    results["single predict tables off"] = measure(lambda: predictor.predict(single), repeat=repeat)
+    predictor.score_tables = True
+    results["single predict tables on"] = measure(lambda: predictor.predict(single), repeat=repeat)
+    results["single math engine.score"] = measure(lambda: inference.score(single), repeat=repeat)
+    results["single math table.score"] = measure(lambda: table.score(single), repeat=repeat)
+
+    for size in sizes:
+        batch = customers[:size]
+        calls = max(3, min(repeat, 20000 // size))
+        predictor.score_tables = False
+        results[f"batch={size} tables off"] = measure(lambda: predictor.predict_many(batch), repeat=calls, rows=size)
+        predictor.score_tables = True
+        results[f"batch={size} tables on"] = measure(lambda: predictor.predict_many(batch), repeat=calls, rows=size)
+        results[f"batch={size} math engine"] = measure(lambda: inference.score_many(batch), repeat=calls, rows=size)
+        results[f"batch={size} math table"] = measure(lambda: table.score_many(batch), repeat=calls, rows=size)
+    predictor.score_tables = False
+    results["index"] = table.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="score table vs encode + dot product throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--source", choices=["train", "domain"], default="train")
+    parser.add_argument("--repeat", type=int, default=2000, help="max calls per case")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    results = run(args.sizes, args.source, args.repeat)
+    index = results.pop("index")
+    print_table(f"score tables, {args.source} inputs", results)
+    print(f"\ncombo index: {index['index_size']} of {index['index_capacity']} entries")
+    print("speedup with tables (p50)")
+    for name, r in results.items():
+        for on, off in (
+            (" tables on", " tables off"),
+            (" math table", " math engine"),
+            ("table.score", "engine.score"),
+        ):
+            if name.endswith(on):
+                base = results[name[: -len(on)] + off]
+                print(f"  {name:<32}{base['p50_us'] / r['p50_us']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# worker startup time and memory: pickle artifacts vs mmap bundle
+#
+# python -m src.benchmarks.startup --workers 4
+# python -m src.benchmarks.startup --workers 4 --synthetic-forest 300   (RandomForest-sized artifacts)
+#
+# Starts N fresh interpreters per format at the same time, like uvicorn workers. Each one
+# imports the loader, loads the artifacts and scores a batch, then reports its wall time,
+# RSS and PSS. PSS splits shared pages between the processes that map them, so it shows
+# the saving from the bundle's shared mmap, which RSS alone does not.
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from ..bundle import export_bundle
+from ..model_loader import MODEL_DIR, ModelArtifacts, read_active_version, version_dir
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src.model_loader import ModelArtifacts
+from pathlib import Path
+artifacts = ModelArtifacts("bench", Path(sys.argv[1]), fmt=sys.argv[2])
+import numpy as np
+artifacts.inference.churn_proba(np.zeros((256, artifacts.encoder.n_features)))
+seconds = time.perf_counter() - start
+
+def kb(path, key):
+    try:
+        for line in open(path):
+            if line.startswith(key):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+print(json.dumps({"seconds": seconds, "rss_kb": kb("/proc/self/status", "VmRSS:"),
+                  "pss_kb": kb("/proc/self/smaps_rollup", "Pss:")}), flush=True)
+sys.stdin.read()  # stay alive until every worker has measured, so shared pages are counted once
+"""
+
+
+def _workers(path: Path, fmt: str, n: int) -> list[dict]:
+    root = Path(__file__).resolve().parent.parent.parent
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-W", "ignore", "-c", _CHILD, str(path), fmt],
+            cwd=root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(n)
+    ]
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return results
+
+
+def _synthetic_forest(base: ModelArtifacts, out: Path, n_trees: int) -> Path:
+    # a RandomForest on random rows with the real feature layout; big enough to see RSS differences
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.RandomState(0)
+    X = rng.randn(20000, len(base.feature_names))
+    y = (X[:, 0] + rng.randn(len(X)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=n_trees, random_state=0, n_jobs=-1).fit(X, y)
+    out.mkdir(parents=True, exist_ok=True)
+    for name in ("scaler.pkl", "feature_names.pkl", "label_encoders.pkl"):
+        shutil.copy(base.path / name, out / name)
+    joblib.dump(model, out / "model.pkl")
+    return out
+
+
+def _summary(results: list[dict]) -> dict:
+    return {
+        "workers": len(results),
+        "startup_s_avg": round(float(np.mean([r["seconds"] for r in results])), 3),
+        "startup_s_max": round(float(np.max([r["seconds"] for r in results])), 3),
+        "rss_mb_per_worker": round(float(np.mean([r["rss_kb"] or 0 for r in results])) / 1024, 1),
+        "pss_mb_per_worker": round(float(np.mean([r["pss_kb"] or 0 for r in results])) / 1024, 1),
+    }
+
+
+def run(version: str | None = None, workers: int = 4, synthetic_forest: int = 0) -> dict:
+    version = version or read_active_version()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "artifacts"
+        base = ModelArtifacts(version, version_dir(version, MODEL_DIR), fmt="pickle")
+        if synthetic_forest:
+            _synthetic_forest(base, path, synthetic_forest)
+        else:
+            shutil.copytree(base.path, path, ignore=shutil.ignore_patterns("*.bin", "*.json", "*.tmp", "ACTIVE"))
+        export_bundle(ModelArtifacts(version, path, fmt="pickle"), path)
+        sizes = {
+            "pickle_kb": round(sum((path / f).stat().st_size for f in path.glob("*.pkl")) / 1024, 1),
+            "bundle_kb": round(
+                sum(f.stat().st_size for f in [path / "bundle.json", *path.glob("arrays*.bin")]) / 1024, 1
+            ),
+        }
+        return {
+            "model": "RandomForest (synthetic)" if synthetic_forest else version,
+            **sizes,
+            "pickle": _summary(_workers(path, "pickle", workers)),
+            "bundle": _summary(_workers(path, "bundle", workers)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="worker startup time and memory, pickle vs mmap bundle")
+    parser.add_argument("--version", default=None, help="model version (default: the active one)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent worker processes per format")
+    parser.add_argument("--synthetic-forest", type=int, default=0, metavar="N_TREES", help="benchmark a random forest")
+    args = parser.parse_args()
+
+    result = run(args.version, args.workers, args.synthetic_forest)
+    print(f"\nstartup + memory per worker ({result['model']}, {args.workers} workers)")
+    print(f"artifact size: pickle {result['pickle_kb']} KB, bundle {result['bundle_kb']} KB")
+    print(f"{'format':<10}{'avg s':>10}{'max s':>10}{'RSS MB':>10}{'PSS MB':>10}")
+    for fmt in ("pickle", "bundle"):
+        r = result[fmt]
+        print(
+            f"{fmt:<10}{r['startup_s_avg']:>10}{r['startup_s_max']:>10}{r['rss_mb_per_worker']:>10}{r['pss_mb_per_worker']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
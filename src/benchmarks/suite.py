@@ -0,0 +1,127 @@
+# stage-by-stage benchmark of the serving stack
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..database import Base, create_tables
+from ..log_writer import write_prediction_logs
+from ..model_loader import ModelLoader
+from ..predictor import ChurnPredictor, log_row, new_prediction_id
+from ..preprocessing import clean_frame
+from ..schemas import CustomerInput
+from .inference import SAMPLE
+from .timing import measure
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def _customers(n: int) -> list[CustomerInput]:
+    """n customers cycled from data/churn.csv"""
+    df = clean_frame(pd.read_csv(Path(__file__).parents[2] / "data" / "churn.csv"))
+    records = df[list(CustomerInput.model_fields)].to_dict(orient="records")
+    return [CustomerInput(**records[i % len(records)]) for i in range(n)]
+
+
+def bench_cold_start(repeat: int) -> dict:
+    # drop the singleton so every call unpickles the artifacts and rebuilds the encoder/engine
+    original = ModelLoader._instance
+
+    def load():
+        ModelLoader._instance = None
+        ModelLoader()
+
+    try:
+        return {"model_loader cold start": measure(load, repeat=max(repeat // 200, 3), warmup=1)}
+    finally:
+        ModelLoader._instance = original
+
+
+def bench_preprocess(repeat: int) -> dict:
+    predictor = ChurnPredictor()
+    return {
+        "preprocess _preprocess_input (pandas)": measure(
+            lambda: predictor._preprocess_input(SAMPLE), repeat=max(repeat // 10, 20)
+        ),
+        "preprocess encoder.encode": measure(lambda: predictor.loader.encoder.encode(SAMPLE), repeat=repeat),
+    }
+
+
+def bench_inference(repeat: int) -> dict:
+    loader = ModelLoader()
+    X_scaled = loader.encoder.encode(SAMPLE)
+    X_raw = loader.encoder.encode(SAMPLE, scaled=False)
+    X = X_scaled if loader.inference.expects_scaled else X_raw
+    return {
+        "inference model.predict_proba": measure(lambda: loader.model.predict_proba(X_scaled), repeat=repeat),
+        "inference engine.churn_proba": measure(lambda: loader.inference.churn_proba(X), repeat=repeat),
+    }
+
+
+def bench_db_logging(repeat: int) -> dict:
+    # local SQLite stand-in so the numbers don't depend on a running Postgres
+    tmp = tempfile.mkdtemp(prefix="churn_bench_")
+    engine = create_engine(f"sqlite:///{tmp}/logs.db", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, future=True)
+
+    def write(n):
+        db = Session()
+        try:
+            write_prediction_logs(db, [log_row(SAMPLE, new_prediction_id(), "No", 0.2, "Low") for _ in range(n)])
+        finally:
+            db.close()
+
+    results = {}
+    for n in (1, 100):
+        results[f"db log write_prediction_logs x{n}"] = measure(
+            lambda n=n: write(n), repeat=max(repeat // (10 * n), 20), warmup=5, rows=n
+        )
+    engine.dispose()
+    return results
+
+
+def bench_end_to_end(repeat: int) -> dict:
+    from ..api import app
+
+    create_tables()
+    payload = SAMPLE.model_dump()
+    with TestClient(app) as client:
+        return {
+            "end-to-end POST /predict": measure(
+                lambda: client.post("/predict", json=payload), repeat=max(repeat // 10, 50), warmup=10
+            )
+        }
+
+
+def bench_batches(repeat: int, sizes=BATCH_SIZES) -> dict:
+    predictor = ChurnPredictor()
+    customers = _customers(max(sizes))
+    results = {}
+    for size in sizes:
+        batch = customers[:size]
+        calls = max(3, min(repeat // 10, 20000 // size))
+        results[f"predict_many batch={size}"] = measure(
+            lambda batch=batch: predictor.predict_many(batch), repeat=calls, warmup=2, rows=size
+        )
+    return results
+
+
+STAGES = {
+    "cold_start": bench_cold_start,
+    "preprocess": bench_preprocess,
+    "inference": bench_inference,
+    "db_logging": bench_db_logging,
+    "end_to_end": bench_end_to_end,
+    "batch": bench_batches,
+}
+
+
+def run(stages=None, repeat: int = 2000) -> dict[str, dict]:
+    results = {}
+    for name in stages or STAGES:
+        results.update(STAGES[name](repeat))
+    return results
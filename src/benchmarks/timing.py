@@ -0,0 +1,42 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+
+def measure(fn: Callable[[], object], repeat: int = 2000, warmup: int = 50, rows: int = 1) -> dict:
+    """Call fn repeatedly and summarise per-call latency in microseconds.
+
+    ``rows`` is how many rows one call handles, used for the rows/sec figure.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+
+    samples *= 1e6
+    mean = float(samples.mean())
+    return {
+        "calls": repeat,
+        "rows_per_call": rows,
+        "mean_us": round(mean, 2),
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p95_us": round(float(np.percentile(samples, 95)), 2),
+        "p99_us": round(float(np.percentile(samples, 99)), 2),
+        "calls_per_sec": round(1e6 / mean, 1),
+        "rows_per_sec": round(rows * 1e6 / mean, 1),
+    }
+
+
+def print_table(title: str, results: dict[str, dict]) -> None:
+    print(f"\n{title}")
+    print(f"{'case':<40}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}{'calls/s':>12}{'rows/s':>14}")
+    for name, r in results.items():
+        rows_per_sec = r.get("rows_per_sec", r["calls_per_sec"])
+        print(
+            f"{name:<40}{r['p50_us']:>12}{r['p95_us']:>12}{r['p99_us']:>12}{r['calls_per_sec']:>12}{rows_per_sec:>14}"
+        )
@@ -0,0 +1,64 @@
+# bulk loading of prediction_logs rows
+#
+# postgres (psycopg2): COPY prediction_logs (...) FROM STDIN in CSV, one streamed buffer per
+#   chunk, inside the caller's transaction. Rows reach a partitioned prediction_logs through the
+#   parent, which routes them to their day (or the default partition).
+# everything else: a single executemany INSERT, which is what the ORM would batch to at best.
+# Used by the write-behind logger (LOG_WRITER_METHOD=copy) and by python -m src.backfill.
+import csv
+import io
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .database import PredictionLog
+
+TABLE = PredictionLog.__tablename__
+# every column but the serial id, in table order
+COLUMNS = [c.name for c in PredictionLog.__table__.columns if c.name != "id"]
+COPY_SQL = f"COPY {TABLE} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+METHODS = ("insert", "copy")
+
+
+def copy_supported(db: Session) -> bool:
+    """COPY needs postgres through psycopg2 (asyncpg and sqlite take the INSERT path)"""
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def _csv_value(value):
+    # None -> empty unquoted field, which COPY's CSV format reads as NULL
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_buffer(rows: Iterable[dict]) -> io.StringIO:
+    """Rows as COPY-ready CSV in COLUMNS order"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_csv_value(row.get(column)) for column in COLUMNS] for row in rows)
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(db: Session, rows: list[dict]) -> None:
+    """COPY rows into prediction_logs on the session's connection (caller commits)"""
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_SQL, csv_buffer(rows))
+    finally:
+        cursor.close()
+
+
+def ingest_rows(db: Session, rows: list[dict], method: str = "insert") -> str:
+    """Add rows to prediction_logs with COPY when asked and possible, else executemany; returns the method used"""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    if method == "copy" and copy_supported(db):
+        copy_rows(db, rows)
+        return "copy"
+    db.execute(insert(PredictionLog), rows)
+    return "insert"
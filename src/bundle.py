@@ -0,0 +1,271 @@
+# fast-start artifact bundle: python -m src.bundle export --version 1.0
+#
+# bundle.json:        small header (format, model kind, feature names, encoder classes, array index)
+# arrays-<hash>.bin:  every numeric array back to back, 64-byte aligned, little-endian; named by its
+#                     content and referenced from the header, so renaming the header swaps the bundle
+#
+# load_bundle() maps the arrays file read-only, so uvicorn workers on one host share those pages
+# through the page cache instead of each unpickling its own copy. It doesn't import sklearn
+# at all: scaler, encoders and model are replaced by the minimal objects the serving path uses.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+HEADER_FILE = "bundle.json"
+# headers written before arrays files were content-named don't carry "arrays_file"
+ARRAYS_FILE = "arrays.bin"
+_ARRAYS_GLOB = "arrays*.bin"
+_ALIGN = 64
+# averaged per-tree class probabilities, which is exactly what the numpy evaluator reproduces
+_TREE_TYPES = ("DecisionTreeClassifier", "RandomForestClassifier", "ExtraTreesClassifier")
+
+
+class BundleScaler:
+    """StandardScaler stand-in: mean_/scale_ plus transform"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class BundleLabelEncoder:
+    """LabelEncoder stand-in: sorted classes_ plus transform"""
+
+    def __init__(self, classes: list[str]):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self._codes = {value: code for code, value in enumerate(classes)}
+
+    def transform(self, values) -> np.ndarray:
+        try:
+            return np.array([self._codes[str(v)] for v in values])
+        except KeyError as e:
+            # same exception type as sklearn for unseen labels
+            raise ValueError(f"y contains previously unseen labels: {e}") from None
+
+
+class BundleLinearModel:
+    """Binary linear classifier, predict_proba = sigmoid(link * (X @ coef + intercept))"""
+
+    def __init__(self, coef, intercept: float, link: float, model_type: str):
+        self.coef_ = coef.reshape(1, -1)
+        self.intercept_ = np.array([intercept])
+        self.classes_ = np.array([0, 1])
+        self.link = link
+        self.model_type = model_type
+
+    def predict_proba(self, X) -> np.ndarray:
+        from scipy.special import expit
+
+        p = expit(self.link * (np.asarray(X, dtype=float) @ self.coef_[0] + self.intercept_[0]))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+class BundleForestModel:
+    """Tree ensemble evaluated with numpy over flattened node arrays.
+
+    All trees' nodes live in one set of arrays; ``roots`` holds each tree's first node and
+    children are global indices (-1 marks a leaf). ``value`` is P(class 1) at every node.
+    """
+
+    def __init__(self, roots, left, right, feature, threshold, value, model_type: str):
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.classes_ = np.array([0, 1])
+        self.model_type = model_type
+
+    def predict_proba(self, X) -> np.ndarray:
+        # sklearn compares float32 features against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        while True:
+            left = self.left[node]
+            active = left != -1
+            if not active.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(active, np.where(go_left, left, self.right[node]), node)
+        p = self.value[node].mean(axis=0)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def _tree_arrays(model) -> dict[str, np.ndarray]:
+    """Flatten a DecisionTreeClassifier or a forest of them into global node arrays"""
+    trees = model.estimators_ if hasattr(model, "estimators_") else [model]
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        if tree.n_outputs != 1 or tree.value.shape[2] != 2:
+            raise ValueError("only single-output binary trees can be bundled")
+        roots.append(offset)
+        is_leaf = tree.children_left == -1
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        counts = tree.value[:, 0, :]
+        value.append(counts[:, 1] / counts.sum(axis=1))
+        offset += tree.node_count
+    return {
+        "roots": np.asarray(roots, dtype=np.int64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+    }
+
+
+def export_bundle(artifacts, out_dir: str | Path | None = None) -> Path:
+    """Write ``artifacts`` (a ModelArtifacts) as bundle.json + arrays.bin into out_dir (default: its own dir)"""
+    out_dir = Path(out_dir or artifacts.path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = artifacts.model
+    n = len(artifacts.feature_names)
+
+    arrays = {
+        "scaler_mean": np.asarray(
+            artifacts.scaler.mean_ if artifacts.scaler.mean_ is not None else np.zeros(n), dtype=np.float64
+        ),
+        "scaler_scale": np.asarray(
+            artifacts.scaler.scale_ if artifacts.scaler.scale_ is not None else np.ones(n), dtype=np.float64
+        ),
+    }
+    header = {
+        "format": BUNDLE_FORMAT,
+        "model_version": artifacts.version,
+        "model_type": type(model).__name__,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "feature_names": list(artifacts.feature_names),
+        "label_encoders": {name: [str(c) for c in enc.classes_] for name, enc in artifacts.label_encoders.items()},
+    }
+    if artifacts.inference.native:
+        header["kind"] = "linear"
+        header["link"] = artifacts.inference.link
+        header["intercept"] = float(model.intercept_[0])
+        arrays["coef"] = np.asarray(model.coef_[0], dtype=np.float64)
+    elif type(model).__name__ in _TREE_TYPES:
+        header["kind"] = "forest"
+        arrays.update(_tree_arrays(model))
+    else:
+        raise ValueError(f"can't bundle {type(model).__name__}: only binary linear models and tree ensembles")
+
+    # arrays under a content name, then the header that points at them: the header rename is the
+    # only step that changes what a loader sees, and processes that mapped the old file keep it
+    index = {}
+    digest = hashlib.sha256()
+    tmp_arrays = out_dir / f".arrays.{os.getpid()}.tmp"
+    with open(tmp_arrays, "wb") as f:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+            pad = b"\0" * (-f.tell() % _ALIGN)
+            index[name] = {"offset": f.tell() + len(pad), "dtype": array.dtype.str, "shape": list(array.shape)}
+            for chunk in (pad, array.tobytes()):
+                f.write(chunk)
+                digest.update(chunk)
+    arrays_file = f"arrays-{digest.hexdigest()[:16]}.bin"
+    os.replace(tmp_arrays, out_dir / arrays_file)
+    header["arrays_file"] = arrays_file
+    header["arrays"] = index
+    tmp_header = out_dir / f".{HEADER_FILE}.{os.getpid()}.tmp"
+    tmp_header.write_text(json.dumps(header, indent=2))
+    os.replace(tmp_header, out_dir / HEADER_FILE)
+    # a loader that read the old header just before the rename retries once it misses the old file
+    for stale in out_dir.glob(_ARRAYS_GLOB):
+        if stale.name != arrays_file:
+            stale.unlink(missing_ok=True)
+    logger.info("exported model %s bundle to %s", artifacts.version, out_dir)
+    return out_dir
+
+
+def remove_bundle(path: str | Path) -> None:
+    """Delete a version's bundle (header first, so nothing picks up a header without its arrays)"""
+    path = Path(path)
+    (path / HEADER_FILE).unlink(missing_ok=True)
+    for arrays_path in path.glob(_ARRAYS_GLOB):
+        arrays_path.unlink(missing_ok=True)
+
+
+def _map_arrays(path: Path) -> tuple[dict, dict]:
+    header = json.loads((path / HEADER_FILE).read_text())
+    if header.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"unsupported bundle format {header.get('format')!r} in {path} (expected {BUNDLE_FORMAT})")
+
+    raw = np.memmap(path / header.get("arrays_file", ARRAYS_FILE), dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = np.frombuffer(raw, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+    return header, arrays
+
+
+def load_bundle(path: str | Path) -> tuple:
+    """(model, scaler, feature_names, label_encoders) backed by a read-only mmap of the arrays file"""
+    path = Path(path)
+    try:
+        header, arrays = _map_arrays(path)
+    except FileNotFoundError:
+        # re-exported between reading the header and opening its arrays file: the new header is in place
+        header, arrays = _map_arrays(path)
+
+    scaler = BundleScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+    label_encoders = {name: BundleLabelEncoder(classes) for name, classes in header["label_encoders"].items()}
+    if header["kind"] == "linear":
+        model = BundleLinearModel(arrays["coef"], header["intercept"], header["link"], header["model_type"])
+    else:
+        model = BundleForestModel(
+            arrays["roots"],
+            arrays["left"],
+            arrays["right"],
+            arrays["feature"],
+            arrays["threshold"],
+            arrays["value"],
+            header["model_type"],
+        )
+    return model, scaler, header["feature_names"], label_encoders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="export model artifacts as an mmap-able bundle")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write bundle.json + its arrays file for a model version")
+    export.add_argument("--version", default=None, help="model version (default: the active one)")
+    export.add_argument("--out", default=None, help="output directory (default: the version's own directory)")
+    args = parser.parse_args()
+
+    from .model_loader import ModelArtifacts, read_active_version, version_dir
+
+    version = args.version or read_active_version()
+    # always from the pickles, even if an older bundle is already there
+    artifacts = ModelArtifacts(version, version_dir(version), fmt="pickle")
+    print(export_bundle(artifacts, args.out))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
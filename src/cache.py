@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from .schemas import CustomerInput
+
+_FIELDS = tuple(CustomerInput.model_fields)
+
+
+def canonical_key(customer: CustomerInput, model_version: str) -> tuple:
+    """Validated field values in schema order plus the model version.
+
+    Inputs are already normalised by pydantic (Literal strings, ints, floats), so two
+    requests with the same features always produce the same tuple.
+    """
+    return (model_version,) + tuple(getattr(customer, f) for f in _FIELDS)
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with an optional TTL for churn probabilities.
+
+    ``max_size`` bounds the entry count (least recently used is evicted first);
+    ``ttl`` seconds, if > 0, expires entries on read.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 0.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> float | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl > 0 and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
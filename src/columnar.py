@@ -0,0 +1,225 @@
+# columnar batch format for POST /predict/columnar
+#
+# request: {"columns": {field: [...]}, "dictionary_id": "..." (optional)}
+#   every CustomerInput field is one array of equal length. Enum fields carry integer codes into
+#   DICTIONARY (published under /model-info "columnar"), numeric fields carry numbers. The
+#   body is JSON or msgpack (Content-Type: application/msgpack), optionally Content-Encoding: gzip.
+# response: {"count", "model_version", "timestamp", "customer_id": [...], "churn_prediction": [codes],
+#   "churn_probability": [...], "risk_level": [codes]}, as msgpack when the client accepts it, and
+#   gzipped when it sends Accept-Encoding: gzip.
+# Validation is a handful of NumPy checks per column instead of one pydantic model per row,
+# with the same rules as CustomerInput.
+import gzip
+import hashlib
+import json
+import os
+import zlib
+
+import numpy as np
+
+from .schemas import CustomerInput, enum_values
+
+MAX_ROWS = int(os.getenv("COLUMNAR_MAX_ROWS", "100000"))
+# limit on the body as sent and decompressed, so neither a huge upload nor a small gzip bomb exhausts memory
+MAX_BODY_BYTES = int(os.getenv("COLUMNAR_MAX_BODY_MB", "64")) * 1024 * 1024
+MSGPACK = "application/msgpack"
+# responses this small aren't worth compressing
+_GZIP_MIN_BYTES = 1024
+
+
+# code -> value for every enum input, in schema order, plus the two coded response columns
+INPUT_DICTIONARY = {f: list(v) for f in CustomerInput.model_fields if (v := enum_values(f)) is not None}
+OUTPUT_DICTIONARY = {"churn_prediction": ["No", "Yes"], "risk_level": ["Low", "Medium", "High"]}
+DICTIONARY = {**INPUT_DICTIONARY, **OUTPUT_DICTIONARY}
+# changes only when the schema's enums do; clients may send it back to catch a stale dictionary
+DICTIONARY_ID = hashlib.sha256(json.dumps(DICTIONARY, sort_keys=True).encode()).hexdigest()[:16]
+NUMERIC_FIELDS = [f for f in CustomerInput.model_fields if f not in INPUT_DICTIONARY]
+_VALUES = {f: np.asarray(v, dtype=object) for f, v in INPUT_DICTIONARY.items()}
+
+
+class ColumnarError(ValueError):
+    """Body that can't be decoded or columns that fail validation; `errors` uses FastAPI's 422 layout"""
+
+    def __init__(self, errors: list[dict], status_code: int = 422):
+        super().__init__(errors[0]["msg"])
+        self.errors = errors
+        self.status_code = status_code
+
+
+def _error(loc: list, msg: str, kind: str) -> dict:
+    return {"loc": ["body", *loc], "msg": msg, "type": kind}
+
+
+def _numeric_limits() -> dict:
+    # ge / le from the CustomerInput field metadata, so both formats enforce the same ranges
+    limits = {}
+    for field in NUMERIC_FIELDS:
+        ge = le = None
+        for constraint in CustomerInput.model_fields[field].metadata:
+            ge = getattr(constraint, "ge", ge)
+            le = getattr(constraint, "le", le)
+        integer = CustomerInput.model_fields[field].annotation is int
+        limits[field] = (ge, le, integer)
+    return limits
+
+
+_LIMITS = _numeric_limits()
+
+
+def schema() -> dict:
+    """What /model-info publishes for clients of the columnar format"""
+    return {
+        "endpoint": "/predict/columnar",
+        "dictionary_id": DICTIONARY_ID,
+        "dictionary": DICTIONARY,
+        "numeric_fields": NUMERIC_FIELDS,
+        "max_rows": MAX_ROWS,
+        "content_types": ["application/json", MSGPACK],
+        "content_encodings": ["identity", "gzip"],
+    }
+
+
+def _too_large(what: str) -> ColumnarError:
+    return ColumnarError([_error([], f"body exceeds {MAX_BODY_BYTES} bytes{what}", "too_large")], 413)
+
+
+async def read_body(chunks, content_length: str | None = None) -> bytes:
+    """Collect a request body stream, refusing it as soon as it is known to exceed MAX_BODY_BYTES"""
+    # a declared length is checked before anything is read; chunked bodies are counted as they arrive
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+        raise _too_large("")
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > MAX_BODY_BYTES:
+            raise _too_large("")
+    return bytes(body)
+
+
+def decode_body(body: bytes, content_type: str = "", content_encoding: str = "") -> dict:
+    """Raw request body -> parsed payload (gunzip, then JSON or msgpack)"""
+    if "gzip" in content_encoding.lower():
+        inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(body, MAX_BODY_BYTES)
+        except zlib.error as e:
+            raise ColumnarError([_error([], f"invalid gzip body: {e}", "value_error.gzip")], 400) from e
+        if inflater.unconsumed_tail:
+            raise _too_large(" decompressed")
+    try:
+        if MSGPACK in content_type.lower():
+            import msgpack
+
+            payload = msgpack.unpackb(body, raw=False)
+        else:
+            payload = json.loads(body)
+    except ImportError as e:
+        raise ColumnarError([_error([], "msgpack bodies need the msgpack package", "unsupported")], 415) from e
+    except Exception as e:
+        raise ColumnarError([_error([], f"body is not valid {content_type or 'JSON'}: {e}", "parse_error")], 400) from e
+    if not isinstance(payload, dict) or not isinstance(payload.get("columns"), dict):
+        raise ColumnarError([_error(["columns"], "expected an object with a 'columns' mapping", "dict_type")])
+    return payload
+
+
+def _first_bad(mask: np.ndarray) -> int:
+    return int(np.argmax(mask))
+
+
+def validate_columns(payload: dict) -> tuple[dict[str, np.ndarray], int]:
+    """Parsed payload -> ({field: codes or numbers}, n_rows); raises ColumnarError listing every bad column"""
+    dictionary_id = payload.get("dictionary_id")
+    if dictionary_id is not None and dictionary_id != DICTIONARY_ID:
+        msg = f"dictionary_id {dictionary_id!r} is stale, current is {DICTIONARY_ID!r} (see /model-info)"
+        raise ColumnarError([_error(["dictionary_id"], msg, "value_error.dictionary")], 409)
+
+    raw = payload["columns"]
+    missing = [f for f in CustomerInput.model_fields if f not in raw]
+    if missing:
+        raise ColumnarError([_error(["columns", f], "Field required", "missing") for f in missing])
+    lengths = {len(raw[f]) if isinstance(raw[f], list) else -1 for f in CustomerInput.model_fields}
+    if len(lengths) != 1 or -1 in lengths:
+        raise ColumnarError([_error(["columns"], "every column must be an array of the same length", "value_error")])
+    n_rows = lengths.pop()
+    if not 1 <= n_rows <= MAX_ROWS:
+        raise ColumnarError([_error(["columns"], f"expected 1-{MAX_ROWS} rows, got {n_rows}", "value_error")])
+
+    columns, errors = {}, []
+    for field, values in INPUT_DICTIONARY.items():
+        try:
+            codes = np.asarray(raw[field])
+        except (TypeError, ValueError):
+            # ragged nested lists
+            codes = None
+        if codes is None or codes.ndim != 1 or codes.dtype.kind not in "iu":
+            errors.append(_error(["columns", field], "expected an array of integer codes", "int_type"))
+            continue
+        bad = (codes < 0) | (codes >= len(values))
+        if bad.any():
+            msg = f"{int(bad.sum())} code(s) outside 0-{len(values) - 1}, first at row {_first_bad(bad)}"
+            errors.append(_error(["columns", field, _first_bad(bad)], msg, "enum"))
+            continue
+        columns[field] = codes.astype(np.intp, copy=False)
+    for field, (ge, le, integer) in _LIMITS.items():
+        try:
+            numbers = np.asarray(raw[field], dtype=np.float64)
+        except (TypeError, ValueError):
+            numbers = None
+        if numbers is None or numbers.ndim != 1:
+            errors.append(_error(["columns", field], "expected an array of numbers", "float_type"))
+            continue
+        bad = ~np.isfinite(numbers)
+        if integer:
+            bad |= numbers != np.floor(numbers)
+        if ge is not None:
+            bad |= numbers < ge
+        if le is not None:
+            bad |= numbers > le
+        if bad.any():
+            rule = ["an integer" if integer else "a number"]
+            rule += [f">= {ge}"] if ge is not None else []
+            rule += [f"<= {le}"] if le is not None else []
+            msg = f"{int(bad.sum())} value(s) not {' '.join(rule)}, first at row {_first_bad(bad)}"
+            errors.append(_error(["columns", field, _first_bad(bad)], msg, "value_error"))
+            continue
+        columns[field] = numbers
+    if errors:
+        raise ColumnarError(errors)
+    return columns, n_rows
+
+
+def parse(body: bytes, content_type: str = "", content_encoding: str = "") -> tuple[dict[str, np.ndarray], int]:
+    """decode_body + validate_columns"""
+    return validate_columns(decode_body(body, content_type, content_encoding))
+
+
+def to_columns(customers) -> dict:
+    """CustomerInputs -> the request's "columns" mapping (what a client sends)"""
+    codes = {f: {v: i for i, v in enumerate(values)} for f, values in INPUT_DICTIONARY.items()}
+    return {
+        field: [codes[field][getattr(c, field)] for c in customers]
+        if field in codes
+        else [getattr(c, field) for c in customers]
+        for field in CustomerInput.model_fields
+    }
+
+
+def decode_values(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Coded columns -> the same columns with enum codes replaced by their values (for logs, drift, shadow)"""
+    return {f: _VALUES[f][c] if f in _VALUES else c for f, c in columns.items()}
+
+
+def encode_response(result: dict, accept: str = "", accept_encoding: str = "") -> tuple[bytes, dict]:
+    """Result columns -> (body, headers) in msgpack or JSON, gzipped when the client accepts it"""
+    if MSGPACK in accept.lower():
+        import msgpack
+
+        body, media_type = msgpack.packb(result), MSGPACK
+    else:
+        body, media_type = json.dumps(result, separators=(",", ":")).encode(), "application/json"
+    headers = {"Content-Type": media_type}
+    if "gzip" in accept_encoding.lower() and len(body) >= _GZIP_MIN_BYTES:
+        # level 1: most of the size win for a fraction of the CPU
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
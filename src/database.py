@@ -1,21 +1,111 @@
 # src/database.py
 import os
+import threading
 
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, UniqueConstraint, create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from sqlalchemy.sql import func
 
+from .db_pool import engine_options
+
 # load variables from .env (at project root)
 load_dotenv()
 
+# read now, but only required when the first engine is built, so importing the models
+# (scripts, tests, the API module) works without a database configured
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set. Did you create .env?")
 
-# engine & session factory
-engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+# async drivers for the same database, used by the async request handlers
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """postgresql[+psycopg2]://... -> postgresql+asyncpg://..., sqlite://... -> sqlite+aiosqlite://..."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"no async driver configured for {parsed.get_backend_name()!r}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _sqlite_wal(dbapi_connection, connection_record):
+    # local SQLite stand-in: WAL lets readers and the writer overlap instead of failing on locks
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def _database_url() -> str:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL not set. Did you create .env?")
+    return DATABASE_URL
+
+
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """The sync engine, built on first use; pool size/overflow/recycle/pre-ping/statement timeout from DB_* env vars"""
+    engine = _engines.get("sync")
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get("sync")
+            if engine is None:
+                url = _database_url()
+                engine = create_engine(url, echo=False, future=True, **engine_options(url))
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", _sqlite_wal)
+                _engines["sync"] = engine
+    return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """The async engine (asyncpg / aiosqlite, or ASYNC_DATABASE_URL), built on first use"""
+    engine = _engines.get("async")
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get("async")
+            if engine is None:
+                url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(_database_url())
+                engine = create_async_engine(url, echo=False, **engine_options(url, is_async=True))
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine.sync_engine, "connect", _sqlite_wal)
+                _engines["async"] = engine
+    return engine
+
+
+def built_engines() -> list[Engine]:
+    """Sync engines (the async one's sync_engine included) that exist so far"""
+    return [e.sync_engine if isinstance(e, AsyncEngine) else e for e in _engines.values()]
+
+
+class _Session(Session):
+    # binds to the lazily built engine unless given another bind
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind if bind is not None else get_engine(), **kwargs)
+
+
+class _AsyncSession(AsyncSession):
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind if bind is not None else get_async_engine(), **kwargs)
+
+
+SessionLocal = sessionmaker(class_=_Session, autocommit=False, autoflush=False, future=True)
+AsyncSessionLocal = async_sessionmaker(class_=_AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def __getattr__(name: str):
+    # `from .database import engine` keeps working; it builds the engine at that point
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # base model
 Base = declarative_base()
@@ -23,8 +113,19 @@ Base = declarative_base()
 
 class PredictionLog(Base):
     __tablename__ = "prediction_logs"
+    # keyset pagination for /history: newest first on (created_at, id), optionally after an equality filter
+    __table_args__ = (
+        Index("ix_prediction_logs_created_at_id", "created_at", "id"),
+        Index("ix_prediction_logs_risk_created_at_id", "risk_level", "created_at", "id"),
+        Index("ix_prediction_logs_churn_created_at_id", "churn_prediction", "created_at", "id"),
+        Index("ix_prediction_logs_contract_created_at_id", "contract", "created_at", "id"),
+        Index("ix_prediction_logs_version_created_at_id", "model_version", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # unique on sqlite and on an unpartitioned postgres table only: a partitioned prediction_logs can't
+    # carry a UNIQUE without created_at (see partitions.py), so there it is a plain index. Ids are uuid4,
+    # and the one writer that retries (log spill replay) checks for existing ids before inserting.
     prediction_id = Column(String(50), unique=True, index=True)
 
     # customer fields
@@ -73,9 +174,54 @@ class ModelMetrics(Base):
     notes = Column(Text, nullable=True)
 
 
+class PredictionAggregate(Base):
+    # running counters behind /stats, updated in the same transaction as the log insert
+    __tablename__ = "prediction_aggregates"
+    __table_args__ = (UniqueConstraint("granularity", "bucket_start", "model_version", name="uq_prediction_aggregate"),)
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(10), nullable=False)  # "total", "hour" or "day"; "hour:3" etc. for shards
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # fixed epoch for "total"
+    model_version = Column(String(20), nullable=False)
+
+    total = Column(Integer, nullable=False, default=0)
+    churn_yes = Column(Integer, nullable=False, default=0)
+    churn_no = Column(Integer, nullable=False, default=0)
+    risk_high = Column(Integer, nullable=False, default=0)
+    risk_medium = Column(Integer, nullable=False, default=0)
+    risk_low = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+
+
+class ShadowPredictionLog(Base):
+    # candidate-model scores for requests served by another version, written in bulk off the request path
+    __tablename__ = "shadow_prediction_logs"
+    __table_args__ = (Index("ix_shadow_prediction_logs_version_created_at", "shadow_version", "created_at"),)
+
+    id = Column(Integer, primary_key=True)
+    prediction_id = Column(String(50), index=True)  # PredictionLog.prediction_id of the served prediction
+    primary_version = Column(String(20))
+    shadow_version = Column(String(20))
+    primary_probability = Column(Float)
+    shadow_probability = Column(Float)
+    shadow_prediction = Column(String(10))
+    agrees = Column(Integer)  # 1 when shadow and primary predict the same class
+    latency_ms = Column(Float)  # shadow encode + score time of the request this row belongs to
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 def create_tables():
     """Create all DB tables."""
+    from .partitions import enabled, ensure_partitions
+
+    engine = get_engine()
+    # on postgres prediction_logs is created partitioned first, so create_all leaves it alone
+    if enabled(engine):
+        ensure_partitions(engine)
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist, so add any new ones explicitly
+    for index in PredictionLog.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 
 def get_db():
@@ -85,3 +231,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Yield an AsyncSession for async handlers."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,114 @@
+# connection pool settings (from env) and utilisation stats for the sync and async engines
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from . import metrics
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# seconds to wait for a free connection before raising
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# seconds after which a connection is replaced (-1 = never); keep below any server/proxy idle cutoff
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+# Postgres statement_timeout for every pooled connection (0 = server default)
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection"""
+
+    label = ""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._wait_hist = metrics.DB_POOL_WAIT_SECONDS.labels(engine=self.label)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self._wait_hist.observe(waited)
+            with self._stats_lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    label = "async"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments for this URL"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {"pool_pre_ping": POOL_PRE_PING, "pool_recycle": POOL_RECYCLE}
+
+    if is_async and os.getenv("DB_ASYNC_POOL", "queue") == "null":
+        # asyncpg connections belong to the event loop that opened them; DB_ASYNC_POOL=null opens one
+        # per session instead, for callers that run every request on a new loop (e.g. a bare TestClient)
+        options["poolclass"] = NullPool
+    elif backend != "sqlite" or parsed.database not in (None, "", ":memory:"):
+        # SQLAlchemy 2.0 defaults aiosqlite file databases to NullPool, i.e. a new connection and
+        # worker thread per session, so the async side is pooled explicitly too
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+        )
+
+    if STATEMENT_TIMEOUT_MS > 0 and backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def pool_stats(pool) -> dict:
+    """Utilisation of one engine's pool: connections in use, overflow and checkout wait time"""
+    stats = {"pool_class": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return stats
+    stats.update(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        # negative while the pool hasn't opened all of its pool_size connections yet
+        overflow=max(pool.overflow(), 0),
+        timeout_s=pool.timeout(),
+    )
+    if isinstance(pool, _TimedCheckout):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats.update(
+                checkouts=checkouts,
+                checkout_timeouts=pool.timeouts,
+                wait_ms_avg=round(pool.wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                wait_ms_max=round(pool.wait_max * 1000, 3),
+            )
+    return stats
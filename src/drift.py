@@ -0,0 +1,406 @@
+# input / score drift against the training distribution: python -m src.drift reference --version 1.0
+#
+# reference: per-feature histograms of data/churn.csv (decile bins for numeric features, one
+#   bin per category plus "other", 20 fixed bins for churn_probability as scored by that
+#   version), computed once and stored as drift_reference.json next to the model artifacts.
+# live: the same bins counted per UTC hour in a ring of DRIFT_WINDOW_HOURS buckets, so memory
+#   is fixed no matter how much traffic arrives. Fed from the prediction stream (DRIFT_STREAM=1)
+#   or by an incremental, chunked scan of prediction_logs that only reads rows it hasn't seen.
+# scores: PSI per feature, plus a binned KS statistic for the ordered ones.
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Mapping
+
+import numpy as np
+
+from .preprocessing import CATEGORICAL_COLUMNS, RAW_DTYPES, clean_frame
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_FILE = "drift_reference.json"
+DATA_PATH = Path(__file__).parent.parent / "data" / "churn.csv"
+NUMERIC_FEATURES = ["tenure", "MonthlyCharges", "TotalCharges"]
+# 0/1 flag, binned like a category
+DISCRETE_FEATURES = CATEGORICAL_COLUMNS + ["SeniorCitizen"]
+SCORE = "churn_probability"
+NUMERIC_BINS = 10
+SCORE_EDGES = np.linspace(0.0, 1.0, 21)
+OTHER = "__other__"
+# PSI floor for empty bins, so ln(a / e) stays finite
+_EPS = 1e-4
+
+WINDOW_HOURS = int(os.getenv("DRIFT_WINDOW_HOURS", "24"))
+MIN_ROWS = int(os.getenv("DRIFT_MIN_ROWS", "100"))
+SCAN_CHUNK_SIZE = int(os.getenv("DRIFT_SCAN_CHUNK_SIZE", "5000"))
+# rows read per refresh at most; a big backlog is caught up over several refreshes
+SCAN_MAX_ROWS = int(os.getenv("DRIFT_SCAN_MAX_ROWS", "200000"))
+# rows are stamped before they commit, so each refresh re-reads this far behind the newest row it saw
+SCAN_OVERLAP_S = float(os.getenv("DRIFT_SCAN_OVERLAP_S", "60"))
+
+
+def _status(psi: float) -> str:
+    # the usual PSI rule of thumb
+    if psi < 0.1:
+        return "stable"
+    if psi < 0.25:
+        return "moderate"
+    return "significant"
+
+
+class Reference:
+    """Bin layout and training counts for every monitored feature and the score"""
+
+    def __init__(self, features: dict, n_rows: int, model_version: str):
+        # name -> {"kind": "numeric"|"categorical", "edges" | "categories", "counts"}
+        self.features = features
+        self.n_rows = n_rows
+        self.model_version = model_version
+        self.names = list(features)
+        self.sizes = [len(spec["counts"]) for spec in features.values()]
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)]).astype(np.intp)
+        self.lookups = {
+            name: {c: i for i, c in enumerate(spec["categories"])}
+            for name, spec in features.items()
+            if spec["kind"] == "categorical"
+        }
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", churn_probs: np.ndarray, model_version: str) -> "Reference":
+        """Histograms of a cleaned churn.csv-shaped frame and the model's scores for it"""
+        features = {}
+        for name in DISCRETE_FEATURES:
+            counts = df[name].astype(str).value_counts()
+            categories = sorted(counts.index)
+            features[name] = {
+                "kind": "categorical",
+                "categories": categories + [OTHER],
+                "counts": [int(counts[c]) for c in categories] + [0],
+            }
+        numeric = {name: df[name].to_numpy(dtype=float) for name in NUMERIC_FEATURES}
+        edges = {name: np.unique(np.quantile(v, np.linspace(0, 1, NUMERIC_BINS + 1))) for name, v in numeric.items()}
+        numeric[SCORE] = np.asarray(churn_probs, dtype=float)
+        edges[SCORE] = SCORE_EDGES
+        for name, values in numeric.items():
+            counts = np.bincount(_numeric_bins(edges[name], values), minlength=len(edges[name]) - 1)
+            features[name] = {"kind": "numeric", "edges": edges[name].tolist(), "counts": counts.tolist()}
+        return cls(features, len(df), model_version)
+
+    def bin_counts(self, columns) -> np.ndarray:
+        """Counts of ``columns`` (name -> values, e.g. log rows or a frame) in the flat bin layout"""
+        total = np.zeros(self.offsets[-1], dtype=np.int64)
+        for name, start, size in zip(self.names, self.offsets, self.sizes):
+            values = columns[name]
+            spec = self.features[name]
+            if spec["kind"] == "categorical":
+                lookup = self.lookups[name]
+                other = size - 1
+                uniques, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+                index = np.array([lookup.get(u, other) for u in uniques], dtype=np.intp)[inverse]
+            else:
+                index = _numeric_bins(spec["edges"], values)
+            total[start : start + size] += np.bincount(index, minlength=size)
+        return total
+
+    def to_json(self) -> dict:
+        return {"model_version": self.model_version, "n_rows": self.n_rows, "features": self.features}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Reference":
+        return cls(data["features"], data["n_rows"], data["model_version"])
+
+
+def _numeric_bins(edges, values) -> np.ndarray:
+    # open-ended outer bins: anything below/above the training range lands in the first/last one
+    return np.searchsorted(np.asarray(edges)[1:-1], np.asarray(values, dtype=float), side="right")
+
+
+def build_reference(artifacts, data_path: str | Path = DATA_PATH) -> Reference:
+    """Reference histograms for a loaded version from its training data"""
+    import pandas as pd
+
+    df = clean_frame(pd.read_csv(data_path, dtype=RAW_DTYPES))
+    churn_probs = artifacts.inference.score_columns(df, len(df))
+    return Reference.from_frame(df, churn_probs, artifacts.version)
+
+
+def write_reference(artifacts, data_path: str | Path = DATA_PATH) -> Path:
+    path = Path(artifacts.path) / REFERENCE_FILE
+    path.write_text(json.dumps(build_reference(artifacts, data_path).to_json()))
+    return path
+
+
+class ReferenceUnavailable(LookupError):
+    """A version without drift_reference.json, and no training data to build one from"""
+
+
+def load_reference(artifacts, data_path: str | Path = DATA_PATH) -> Reference:
+    """drift_reference.json of a version, or built from the training data when it predates it"""
+    path = Path(artifacts.path) / REFERENCE_FILE
+    if path.exists():
+        return Reference.from_json(json.loads(path.read_text()))
+    if not Path(data_path).exists():
+        # e.g. the container image, which ships without data/
+        raise ReferenceUnavailable(
+            f"model {artifacts.version} has no {REFERENCE_FILE} and {data_path} doesn't exist; "
+            f"run python -m src.drift reference --version {artifacts.version} where the data is"
+        )
+    logger.info("no %s for model %s, building it from %s", REFERENCE_FILE, artifacts.version, data_path)
+    return build_reference(artifacts, data_path)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.maximum(expected / max(expected.sum(), 1), _EPS)
+    a = np.maximum(actual / max(actual.sum(), 1), _EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    # max CDF gap evaluated at the bin edges; a lower bound on the exact two-sample KS statistic
+    e = np.cumsum(expected) / max(expected.sum(), 1)
+    a = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(a - e)))
+
+
+class DriftMonitor:
+    """Live histograms of one model version in hourly buckets, compared against its reference"""
+
+    def __init__(self, reference: Reference, window_hours: int = WINDOW_HOURS):
+        self.reference = reference
+        self.window_hours = window_hours
+        # hour start -> flat counts; never more than window_hours + 1 entries
+        self._buckets: dict[datetime, np.ndarray] = {}
+        self._lock = threading.Lock()
+        # scan_logs cursor: rows created since scan_from, in id order after scan_after_id (0: a fresh pass)
+        self.scan_from: datetime | None = None
+        self.scan_after_id = 0
+        # prediction_logs.id -> created_at of rows counted inside the overlap, so re-read rows count once
+        self.seen_ids: dict[int, datetime] = {}
+
+    def _hour(self, ts: datetime) -> datetime:
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    def window_start(self, hours: int | None = None) -> datetime:
+        """Start of the oldest hour bucket in the last ``hours`` (default: the whole window)"""
+        return self._hour(datetime.now(timezone.utc)) - timedelta(hours=(hours or self.window_hours) - 1)
+
+    def add(self, columns, at: datetime | None = None) -> None:
+        """Count rows observed at one time (default: now)"""
+        self._add_counts(self.reference.bin_counts(columns), self._hour(at or datetime.now(timezone.utc)))
+
+    def add_timed(self, columns, created_at) -> None:
+        """Count rows with their own timestamps, one bincount per distinct hour"""
+        import pandas as pd
+
+        hours = pd.to_datetime(pd.Series(created_at), utc=True).dt.floor("h")
+        for hour, index in hours.groupby(hours).indices.items():
+            subset = {name: np.asarray(values)[index] for name, values in columns.items()}
+            self._add_counts(self.reference.bin_counts(subset), hour.to_pydatetime())
+
+    def _add_counts(self, counts: np.ndarray, hour: datetime) -> None:
+        start = self.window_start()
+        if hour < start:
+            return
+        with self._lock:
+            if hour in self._buckets:
+                self._buckets[hour] += counts
+            else:
+                self._buckets[hour] = counts
+            for old in [h for h in self._buckets if h < start]:
+                del self._buckets[old]
+
+    def live_counts(self, hours: int | None = None) -> np.ndarray:
+        start = self.window_start(hours)
+        total = np.zeros(self.reference.offsets[-1], dtype=np.int64)
+        with self._lock:
+            for hour, counts in self._buckets.items():
+                if hour >= start:
+                    total += counts
+        return total
+
+    def report(self, hours: int | None = None) -> dict:
+        """PSI (and binned KS for ordered features) per feature and for the score"""
+        reference = self.reference
+        live = self.live_counts(hours)
+        first = reference.offsets[1]
+        n_rows = int(live[:first].sum())
+        features = {}
+        for name, start, size in zip(reference.names, reference.offsets, reference.sizes):
+            spec = reference.features[name]
+            expected = np.asarray(spec["counts"], dtype=float)
+            actual = live[start : start + size].astype(float)
+            entry = {"psi": round(psi(expected, actual), 4) if n_rows else None}
+            if spec["kind"] == "numeric":
+                entry["ks"] = round(binned_ks(expected, actual), 4) if n_rows else None
+            else:
+                entry["unseen"] = int(actual[-1])
+            entry["status"] = _status(entry["psi"]) if n_rows >= MIN_ROWS else "insufficient_data"
+            features[name] = entry
+        score = features.pop(SCORE)
+        if n_rows >= MIN_ROWS:
+            status = _status(max([score["psi"], *(f["psi"] for f in features.values())]))
+        else:
+            status = "insufficient_data"
+        return {
+            "model_version": reference.model_version,
+            "window_hours": hours or self.window_hours,
+            "rows": n_rows,
+            "reference_rows": reference.n_rows,
+            "status": status,
+            "churn_probability": score,
+            "features": features,
+        }
+
+
+def scan_logs(
+    db,
+    monitor: DriftMonitor,
+    chunk_size: int = SCAN_CHUNK_SIZE,
+    max_rows: int = SCAN_MAX_ROWS,
+    overlap_s: float = SCAN_OVERLAP_S,
+) -> int:
+    """Count prediction_logs rows the monitor hasn't seen yet, in id-ordered chunks; returns rows counted.
+
+    Ids are handed out before rows commit, so a lower id can become visible after a higher one
+    was scanned. Each pass therefore starts ``overlap_s`` before the newest row already seen and
+    re-reads that overlap, skipping ids counted before. A pass cut short by ``max_rows`` resumes
+    after its last id on the next call. At most one chunk is held in memory.
+    """
+    from sqlalchemy import select
+
+    from .database import PredictionLog
+    from .predictor import LOG_COLUMNS
+
+    # prediction_logs column -> reference feature
+    log_features = {**LOG_COLUMNS, "churn_probability": SCORE}
+    columns = [getattr(PredictionLog, c) for c in log_features]
+    since = monitor.window_start()
+    seen = monitor.seen_ids
+    read = counted = 0
+    done = False
+    while read < max_rows:
+        limit = min(chunk_size, max_rows - read)
+        query = (
+            select(PredictionLog.id, PredictionLog.created_at, *columns)
+            .where(PredictionLog.id > monitor.scan_after_id)
+            .where(PredictionLog.model_version == monitor.reference.model_version)
+            .where(PredictionLog.created_at >= since)
+            .order_by(PredictionLog.id)
+            .limit(limit)
+        )
+        if monitor.scan_from is not None:
+            query = query.where(PredictionLog.created_at >= monitor.scan_from)
+        chunk = db.execute(query).all()
+        if not chunk:
+            done = True
+            break
+        monitor.scan_after_id = chunk[-1][0]
+        read += len(chunk)
+        rows = [row for row in chunk if row[0] not in seen]
+        if rows:
+            ids, created_at, *values = zip(*rows)
+            monitor.add_timed(dict(zip(log_features.values(), values)), created_at)
+            seen.update(zip(ids, created_at))
+            counted += len(rows)
+        if len(chunk) < limit:
+            done = True
+            break
+    if seen:
+        # the next pass starts from here, so older ids can't be read again
+        newest = max(seen.values())
+        cutoff = newest - timedelta(seconds=overlap_s)
+        monitor.seen_ids = {i: at for i, at in seen.items() if at >= cutoff}
+        if done:
+            monitor.scan_from = cutoff
+            monitor.scan_after_id = 0
+    return counted
+
+
+class DriftMonitors:
+    """One DriftMonitor per model version, with references loaded on first use"""
+
+    def __init__(self, loader=None, window_hours: int = WINDOW_HOURS, data_path: str | Path = DATA_PATH):
+        # None: the process-wide ModelLoader, looked up on first use so the API can import without a model
+        self._loader = loader
+        self.window_hours = window_hours
+        self.data_path = data_path
+        self._monitors: dict[str, DriftMonitor] = {}
+        self._lock = threading.Lock()
+        # versions the stream hook already warned about having no reference
+        self._unavailable: set[str] = set()
+
+    @property
+    def loader(self):
+        if self._loader is None:
+            from .model_loader import ModelLoader
+
+            self._loader = ModelLoader()
+        return self._loader
+
+    def get(self, version: str | None = None) -> DriftMonitor:
+        artifacts = self.loader.get(version)
+        monitor = self._monitors.get(artifacts.version)
+        if monitor is None:
+            with self._lock:
+                monitor = self._monitors.get(artifacts.version)
+                if monitor is None:
+                    monitor = DriftMonitor(load_reference(artifacts, self.data_path), self.window_hours)
+                    self._monitors[artifacts.version] = monitor
+        return monitor
+
+    def observe(self, version: str, customers, churn_probs) -> None:
+        """Stream hook: count freshly scored customers (CustomerInputs, or decoded columns)"""
+        if isinstance(customers, Mapping):
+            columns = {name: customers[name] for name in DISCRETE_FEATURES + NUMERIC_FEATURES}
+        else:
+            columns = {name: [getattr(c, name) for c in customers] for name in DISCRETE_FEATURES + NUMERIC_FEATURES}
+        columns[SCORE] = churn_probs
+        try:
+            monitor = self.get(version)
+        except ReferenceUnavailable as e:
+            # scoring must not fail over drift; warn once per version and skip counting
+            if version not in self._unavailable:
+                self._unavailable.add(version)
+                logger.warning("stream drift off for %s: %s", version, e)
+            return
+        monitor.add(columns)
+
+    def refresh(self, db, version: str | None = None, hours: int | None = None) -> dict:
+        """Scan new prediction_logs rows for a version, then report its drift over the last ``hours``"""
+        monitor = self.get(version)
+        start = time.perf_counter()
+        scanned = scan_logs(db, monitor)
+        return {
+            **monitor.report(hours),
+            "scanned_rows": scanned,
+            "refresh_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="drift reference histograms")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ref = sub.add_parser("reference", help="write drift_reference.json for a model version")
+    ref.add_argument("--version", default=None, help="model version (default: the active one)")
+    ref.add_argument("--data", default=str(DATA_PATH), help="training data the reference is computed from")
+    args = parser.parse_args()
+
+    from .model_loader import ModelArtifacts, read_active_version, version_dir
+
+    version = args.version or read_active_version()
+    print(write_reference(ModelArtifacts(version, version_dir(version)), args.data))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,116 @@
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from .metrics import UNSEEN_CATEGORIES
+from .schemas import CustomerInput
+
+
+class FeatureEncoder:
+    """Compiled CustomerInput -> scaled feature row, built once from the saved artifacts.
+
+    Every categorical value is mapped straight to its already-scaled float, so the
+    hot path is a dict lookup per field instead of DataFrame + LabelEncoder + scaler.
+    ``scaled=False`` gives the raw label-encoded row instead, for scorers that fold
+    the scaler into their own weights.
+    """
+
+    def __init__(self, feature_names: Sequence[str], label_encoders: Mapping, scaler):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        n = self.n_features
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+
+        # one entry per model column: (CustomerInput field or None, lookup table or None, fallback, mean, scale)
+        # the raw plan uses mean 0 / scale 1, and (x - 0.0) / 1.0 == x exactly
+        self._plans = {True: [], False: []}
+        for i, name in enumerate(self.feature_names):
+            field = name if name in CustomerInput.model_fields else None
+            encoder = label_encoders.get(name)
+            for scaled, m, s in ((True, float(mean[i]), float(scale[i])), (False, 0.0, 1.0)):
+                table = None
+                if encoder is not None:
+                    table = {str(value): (code - m) / s for code, value in enumerate(encoder.classes_)}
+                # missing column or unseen category -> 0 before scaling, same as ChurnPredictor._preprocess_input
+                fallback = (0 - m) / s
+                self._plans[scaled].append((field, table, fallback, m, s))
+
+    def encode(self, customer: CustomerInput, scaled: bool = True) -> np.ndarray:
+        """Single customer -> (1, n_features) row"""
+        row = np.empty((1, self.n_features))
+        out = row[0]
+        for i, (field, table, fallback, m, s) in enumerate(self._plans[scaled]):
+            if field is None:
+                out[i] = fallback
+            elif table is not None:
+                value = table.get(getattr(customer, field))
+                if value is None:
+                    UNSEEN_CATEGORIES.labels(feature=field).inc()
+                    value = fallback
+                out[i] = value
+            else:
+                out[i] = (getattr(customer, field) - m) / s
+        return row
+
+    def encode_many(self, customers: Sequence[CustomerInput], scaled: bool = True) -> np.ndarray:
+        """Many customers -> (n, n_features) matrix"""
+        fields = [field for field, *_ in self._plans[scaled] if field is not None]
+        columns = {field: [getattr(c, field) for c in customers] for field in fields}
+        return self.encode_columns(columns, len(customers), scaled=scaled)
+
+    def encode_codes(
+        self, columns: Mapping[str, np.ndarray], dictionary: Mapping[str, Sequence], n_rows: int, scaled: bool = True
+    ) -> np.ndarray:
+        """Columnar input (src.columnar) -> (n, n_features) matrix, same values as encode_columns.
+
+        Enum fields hold integer codes into ``dictionary``, so each column is one fancy-index
+        into a lookup array of len(dictionary[field]) instead of a lookup per value.
+        """
+        X = np.empty((n_rows, self.n_features))
+        for i, (field, table, fallback, m, s) in enumerate(self._plans[scaled]):
+            if field is None or field not in columns:
+                X[:, i] = fallback
+            elif field in dictionary and table is not None:
+                lookup = [table.get(str(v)) for v in dictionary[field]]
+                unseen = [j for j, v in enumerate(lookup) if v is None]
+                if unseen:
+                    count = int(np.isin(columns[field], unseen).sum())
+                    if count:
+                        UNSEEN_CATEGORIES.labels(feature=field).inc(count)
+                X[:, i] = np.array([fallback if v is None else v for v in lookup])[columns[field]]
+            elif field in dictionary:
+                # enum of numbers (SeniorCitizen): the code stands for its value
+                X[:, i] = (np.asarray(dictionary[field], dtype=float)[columns[field]] - m) / s
+            else:
+                X[:, i] = (np.asarray(columns[field], dtype=float) - m) / s
+        return X
+
+    def encode_columns(self, columns: Mapping[str, Sequence], n_rows: int = None, scaled: bool = True) -> np.ndarray:
+        """Column arrays (dict of lists, DataFrame, ...) -> (n, n_features) matrix"""
+        if n_rows is None:
+            n_rows = len(next(iter(columns.values())))
+        X = np.empty((n_rows, self.n_features))
+        for i, (field, table, fallback, m, s) in enumerate(self._plans[scaled]):
+            if field is None or field not in columns:
+                X[:, i] = fallback
+            elif table is not None:
+                values = columns[field]
+                if hasattr(values, "cat"):
+                    # pandas categorical: look up each category once and index with the codes (-1 = NaN)
+                    uniques = [str(c) for c in values.cat.categories] + [None]
+                    inverse = values.cat.codes.to_numpy().astype(np.intp)
+                else:
+                    # look up each distinct value once, then broadcast back to the rows
+                    uniques, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+                lookup = [table.get(u) for u in uniques]
+                unseen = [j for j, v in enumerate(lookup) if v is None]
+                if unseen:
+                    count = int(np.isin(inverse % len(uniques), unseen).sum())
+                    if count:
+                        UNSEEN_CATEGORIES.labels(feature=field).inc(count)
+                X[:, i] = np.array([fallback if v is None else v for v in lookup])[inverse]
+            else:
+                X[:, i] = (np.asarray(columns[field], dtype=float) - m) / s
+        return X
@@ -0,0 +1,95 @@
+# per-feature contributions behind a churn score (?explain=true)
+#
+# linear models: contribution_j = link * coef_j * scaled_x_j, in log-odds. They sum with the
+#   intercept to the decision value.
+# tree ensembles: path attribution (Saabas), the cheap approximation TreeSHAP refines. Every
+#   split on a row's path credits (child value - node value) to the split feature. Contributions
+#   are in probability units and sum with the base rate to the ensemble's P(churn). The per-node
+#   deltas are computed once per loaded version and reused for every request.
+# The score returned with an explanation is the inference engine's, bit for bit; these sums only
+# reproduce it up to float rounding.
+import numpy as np
+
+from .bundle import _TREE_TYPES, BundleForestModel, _tree_arrays
+
+
+class ExplanationUnavailable(ValueError):
+    """The served model is neither a binary linear model nor a tree ensemble"""
+
+
+class Explainer:
+    """Scores and per-feature contributions for encoded rows of one loaded version"""
+
+    def __init__(self, model, scaler, inference):
+        self.feature_names = inference.encoder.feature_names
+        self.n_features = len(self.feature_names)
+        if inference.native:
+            self.kind = "linear"
+            self.unit = "log_odds"
+            # the engine folded the scaler into weights/bias; undo the shift per feature instead
+            n = self.n_features
+            self.mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+            self.weights = inference.weights
+            self.base = float(inference.bias + self.weights @ self.mean)
+        elif isinstance(model, BundleForestModel) or type(model).__name__ in _TREE_TYPES:
+            self.kind = "tree"
+            self.unit = "probability"
+            arrays = vars(model) if isinstance(model, BundleForestModel) else _tree_arrays(model)
+            self._build_tree_tables(arrays)
+        else:
+            raise ExplanationUnavailable(f"no explanation method for {type(model).__name__}")
+
+    def _build_tree_tables(self, arrays: dict) -> None:
+        self.roots = np.asarray(arrays["roots"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        value = np.asarray(arrays["value"])
+        # delta[child] = value gained by taking that edge, credited to the parent's split feature
+        internal = np.flatnonzero(self.left != -1)
+        self.delta = np.zeros(len(value))
+        self.split_feature = np.zeros(len(value), dtype=np.intp)
+        for children in (self.left[internal], self.right[internal]):
+            self.delta[children] = value[children] - value[internal]
+            self.split_feature[children] = self.feature[internal]
+        self.base = float(value[self.roots].mean())
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """Per-feature contributions for X as the inference engine takes it (raw if native, else scaled).
+
+        They sum with ``base`` to the score only up to rounding; the score itself comes from the engine.
+        """
+        if self.kind == "linear":
+            return (X - self.mean) * self.weights
+        return self._tree_contributions(X)
+
+    def _tree_contributions(self, X: np.ndarray) -> np.ndarray:
+        # same float32 traversal as BundleForestModel, accumulating each edge's delta per (row, feature)
+        X = np.asarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        flat_rows = np.broadcast_to(rows * self.n_features, node.shape)
+        totals = np.zeros(n_rows * self.n_features)
+        while True:
+            left = self.left[node]
+            active = left != -1
+            if not active.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            child = np.where(go_left, left, self.right[node])[active]
+            totals += np.bincount(
+                flat_rows[active] + self.split_feature[child], weights=self.delta[child], minlength=totals.size
+            )
+            node[active] = child
+        return totals.reshape(n_rows, self.n_features) / len(self.roots)
+
+    @staticmethod
+    def top_k(contributions: np.ndarray, k: int) -> np.ndarray:
+        """Column indices of the k largest |contributions| per row, largest first"""
+        k = min(k, contributions.shape[1])
+        magnitude = np.abs(contributions)
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1)
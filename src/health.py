@@ -0,0 +1,54 @@
+# readiness checks with a short-lived cached result, so frequent orchestrator probes
+# cost at most one DB round trip per TTL instead of one per probe
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import text
+
+from .database import get_async_engine
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "5"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+
+async def _ping_db() -> bool:
+    try:
+        async with get_async_engine().connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), HEALTH_CHECK_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.error(f"db health check failed: {e}")
+        return False
+
+
+class CachedCheck:
+    """Runs an async check at most once per ``ttl`` seconds; concurrent callers share one run.
+
+    Failures are cached too, so a down database isn't hammered by every probe.
+    """
+
+    def __init__(self, check, ttl: float = HEALTH_CHECK_TTL):
+        self.check = check
+        self.ttl = ttl
+        self._result: bool | None = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < self.ttl
+
+    async def get(self) -> tuple[bool, float]:
+        """(result, age in seconds of that result)"""
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    self._result = await self.check()
+                    self._checked_at = time.monotonic()
+        return self._result, time.monotonic() - self._checked_at
+
+
+db_check = CachedCheck(_ping_db)
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from .archive import ARCHIVE_DIR, read_history
+from .database import PredictionLog
+
+# only the columns /history returns, fetched as plain rows (no ORM hydration)
+HISTORY_COLUMNS = (
+    PredictionLog.id,
+    PredictionLog.prediction_id,
+    PredictionLog.churn_prediction,
+    PredictionLog.churn_probability,
+    PredictionLog.risk_level,
+    PredictionLog.tenure,
+    PredictionLog.monthly_charges,
+    PredictionLog.contract,
+    PredictionLog.model_version,
+    PredictionLog.created_at,
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise InvalidCursor(f"invalid cursor: {cursor!r}") from e
+
+
+def query_history(
+    db: Session,
+    limit: int = 10,
+    cursor: str | None = None,
+    risk_level: str | None = None,
+    churn_prediction: str | None = None,
+    contract: str | None = None,
+    model_version: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    archive_dir=ARCHIVE_DIR,
+) -> tuple[list[dict], str | None]:
+    """Newest-first page of prediction logs plus the cursor for the next page.
+
+    Pages are keyed on (created_at, id), so page N costs the same as page 1 as long as
+    the matching composite index exists (see PredictionLog.__table_args__). Once the hot
+    rows run out, the same keyset continues into the Parquet archive (see src.archive).
+    """
+    query = select(*HISTORY_COLUMNS)
+
+    filters = {
+        PredictionLog.risk_level: risk_level,
+        PredictionLog.churn_prediction: churn_prediction,
+        PredictionLog.contract: contract,
+        PredictionLog.model_version: model_version,
+    }
+    for column, value in filters.items():
+        if value is not None:
+            query = query.where(column == value)
+    if since is not None:
+        query = query.where(PredictionLog.created_at >= since)
+    if until is not None:
+        query = query.where(PredictionLog.created_at < until)
+
+    before = None
+    if cursor is not None:
+        before = last_created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                PredictionLog.created_at < last_created_at,
+                and_(PredictionLog.created_at == last_created_at, PredictionLog.id < last_id),
+            )
+        )
+
+    # one extra row tells us whether there is a next page without a COUNT(*)
+    query = query.order_by(PredictionLog.created_at.desc(), PredictionLog.id.desc()).limit(limit + 1)
+    rows = [r._asdict() for r in db.execute(query)]
+
+    resume = None
+    if len(rows) <= limit:
+        # archived days are all older than the hot ones, so the page carries on below the last hot row
+        if rows:
+            before = rows[-1]["created_at"], rows[-1]["id"]
+        equal = {column.key: value for column, value in filters.items()}
+        columns = [c.key for c in HISTORY_COLUMNS]
+        archived, resume = read_history(limit + 1 - len(rows), columns, equal, since, until, before, archive_dir)
+        rows += archived
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    elif resume is not None:
+        # the page hit its archived-day budget; a short page can still have older rows behind it
+        next_cursor = encode_cursor(*resume)
+
+    items = [
+        {
+            "prediction_id": r["prediction_id"],
+            "churn_prediction": r["churn_prediction"],
+            "churn_probability": r["churn_probability"],
+            "risk_level": r["risk_level"],
+            "tenure": r["tenure"],
+            "monthly_charges": r["monthly_charges"],
+            "contract": r["contract"],
+            "model_version": r["model_version"],
+            "created_at": r["created_at"].isoformat(),
+        }
+        for r in rows
+    ]
+    return items, next_cursor
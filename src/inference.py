@@ -0,0 +1,132 @@
+import logging
+import math
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from .encoder import FeatureEncoder
+from .schemas import CustomerInput, enum_values
+
+logger = logging.getLogger(__name__)
+
+# decision() sums small batches with one accumulate call and bigger ones column by column
+_ACCUMULATE_ROWS = 256
+
+
+def _linear_link(model, n_features: int, scaler) -> float | None:
+    """Return k such that predict_proba == sigmoid(k * decision), or None if it isn't that simple.
+
+    Binary LogisticRegression is sigmoid(z), but a pickle from a newer sklearn loaded under
+    our pinned version takes the multinomial branch, i.e. softmax([-z, z]) == sigmoid(2z).
+    Rather than guess from version strings we probe the estimator once and compare.
+    """
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if coef is None or intercept is None or not hasattr(model, "predict_proba"):
+        return None
+    if coef.shape != (1, n_features) or list(getattr(model, "classes_", [])) != [0, 1]:
+        return None
+
+    probe = np.random.RandomState(0).randn(32, n_features) * 3
+    expected = model.predict_proba(probe)[:, 1]
+    z = probe @ coef[0] + intercept[0]
+    from scipy.special import expit
+
+    for k in (1.0, 2.0):
+        if np.allclose(expit(k * z), expected, rtol=1e-9, atol=1e-12):
+            return k
+    return None
+
+
+class InferenceEngine:
+    """Scores customers straight from the encoder.
+
+    For binary linear models the scaler is folded into the weights at load time, so a
+    prediction is one weighted sum of the raw encoded row (in sum_order) plus a sigmoid. Anything else
+    (e.g. RandomForest) goes through the estimator's own predict_proba on scaled rows.
+    """
+
+    def __init__(self, model, scaler, encoder: FeatureEncoder):
+        self.model = model
+        self.encoder = encoder
+
+        k = _linear_link(model, encoder.n_features, scaler)
+        self.native = k is not None
+        self.link = k
+        if self.native:
+            n = encoder.n_features
+            mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+            coef = model.coef_[0] / scale
+            # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - (w / scale) . mean)
+            self.weights = k * coef
+            self.bias = float(k * (model.intercept_[0] - coef @ mean))
+            # a fixed summation order instead of a BLAS dot, whose order is its own (and CPU dependent):
+            # bias, the enum columns, then the rest, each in model order. ScoreTable keeps bias + the
+            # enum terms precomputed and adds the rest the same way, so its scores match these exactly.
+            names = encoder.feature_names
+            enums = [i for i, name in enumerate(names) if name in CustomerInput.model_fields and enum_values(name)]
+            self.sum_order = enums + [i for i in range(n) if i not in enums]
+            self._terms = [(i, float(self.weights[i])) for i in self.sum_order]
+            self._ordered_weights = self.weights[self.sum_order]
+        logger.info("inference engine: %s", "native linear" if self.native else type(model).__name__)
+
+    @property
+    def expects_scaled(self) -> bool:
+        # native path folds the scaler into its weights and wants raw encoded rows
+        return not self.native
+
+    def churn_proba(self, X: np.ndarray) -> np.ndarray:
+        """P(churn) for an encoded matrix (raw if native, scaled otherwise)"""
+        if self.native:
+            from scipy.special import expit
+
+            return expit(self.decision(X))
+        return self.model.predict_proba(X)[:, 1]
+
+    def decision(self, X: np.ndarray) -> np.ndarray:
+        """Decision values of a raw encoded matrix (native only), summed left to right in sum_order"""
+        n = len(X)
+        if n <= _ACCUMULATE_ROWS:
+            # one row per term, bias first; accumulate adds them strictly in sequence, unlike sum / dot
+            terms = np.empty((len(self.sum_order) + 1, n))
+            terms[0] = self.bias
+            np.multiply(X.T[self.sum_order], self._ordered_weights[:, None], out=terms[1:])
+            np.add.accumulate(terms, axis=0, out=terms)
+            return terms[-1]
+        # the same additions a column at a time, cheaper once the per-call overhead is amortised
+        z = np.full(n, self.bias)
+        term = np.empty(n)
+        for i, weight in self._terms:
+            np.multiply(X[:, i], weight, out=term)
+            z += term
+        return z
+
+    def score(self, customer: CustomerInput) -> float:
+        """P(churn) for a single customer"""
+        return self.score_encoded(self.encoder.encode(customer, scaled=self.expects_scaled))
+
+    def score_encoded(self, X: np.ndarray) -> float:
+        """P(churn) for one already-encoded (1, n_features) row"""
+        if not self.native:
+            return float(self.model.predict_proba(X)[0, 1])
+
+        row = X[0].tolist()
+        z = self.bias
+        for i, weight in self._terms:
+            z += row[i] * weight
+        # numerically safe sigmoid for a python float
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_many(self, customers: Sequence[CustomerInput]) -> np.ndarray:
+        """P(churn) for many customers, in input order"""
+        X = self.encoder.encode_many(customers, scaled=self.expects_scaled)
+        return self.churn_proba(X)
+
+    def score_columns(self, columns: Mapping[str, Sequence], n_rows: int | None = None) -> np.ndarray:
+        """P(churn) for column arrays, e.g. a cleaned DataFrame chunk"""
+        X = self.encoder.encode_columns(columns, n_rows, scaled=self.expects_scaled)
+        return self.churn_proba(X)
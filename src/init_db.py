@@ -1,7 +1,8 @@
 # src/init_db.py
-from datetime import datetime
-
-from src.database import ModelMetrics, SessionLocal, create_tables
+from src.aggregates import rebuild_aggregates
+from src.database import ModelMetrics, PredictionAggregate, PredictionLog, SessionLocal, create_tables
+from src.model_loader import read_active_version
+from src.train import record_metrics, version_metrics
 
 
 def init_database():
@@ -10,23 +11,23 @@ def init_database():
 
     db = SessionLocal()
     try:
-        existing = db.query(ModelMetrics).filter_by(model_version="1.0").first()
+        version = read_active_version()
+        existing = db.query(ModelMetrics).filter_by(model_version=version).first()
         if not existing:
-            metrics = ModelMetrics(
-                model_version="1.0",
-                accuracy=0.852,  # replace with real numbers if different
-                precision=0.830,
-                recall=0.810,
-                f1_score=0.820,
-                trained_at=datetime.utcnow(),
-                dataset_size=7043,
-                notes="Random Forest model trained on Telco dataset",
-            )
-            db.add(metrics)
-            db.commit()
-            print("✔ Initial model metrics added")
+            # measured on the held-out split of data/churn.csv, not hard-coded
+            metrics = version_metrics(version)
+            if metrics:
+                record_metrics(version, metrics, metrics["dataset_size"], metrics["notes"])
+                print(f"✔ Model {version} metrics added (accuracy {metrics['accuracy']}, f1 {metrics['f1_score']})")
+            else:
+                print(f"ℹ No metrics.json or training data for model {version}, skipping metrics")
         else:
             print("ℹ Model metrics already exist")
+
+        # backfill /stats aggregates for logs written before the aggregate table existed
+        if db.query(PredictionAggregate).first() is None and db.query(PredictionLog).first() is not None:
+            rebuilt = rebuild_aggregates(db)
+            print(f"✔ Rebuilt prediction aggregates from {rebuilt} logs")
     finally:
         db.close()
 
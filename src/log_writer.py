@@ -0,0 +1,326 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .aggregates import update_aggregates
+from .bulk_ingest import METHODS, ingest_rows
+from .database import PredictionLog, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+
+def write_prediction_logs(db: Session, rows: list[dict], method: str = "insert") -> None:
+    """Bulk insert PredictionLog rows (plain dicts) and commit, keeping /stats aggregates in step.
+
+    ``method="copy"`` uses COPY FROM STDIN on postgres (see bulk_ingest.py), executemany elsewhere.
+    """
+    if not rows:
+        return
+    # stamp here rather than via server_default so the aggregate buckets see the same time
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        row.setdefault("created_at", now)
+    ingest_rows(db, rows, method)
+    update_aggregates(db, rows)
+    db.commit()
+
+
+async def write_prediction_logs_async(db: AsyncSession, rows: list[dict]) -> None:
+    """write_prediction_logs on an AsyncSession; the driver awaits I/O instead of blocking a thread"""
+    if rows:
+        await db.run_sync(write_prediction_logs, rows)
+
+
+class PredictionLogWriter:
+    """Write-behind logger: requests enqueue rows, a background thread bulk-inserts them.
+
+    Flushes when ``batch_size`` rows are waiting or ``flush_interval`` seconds have passed,
+    whichever comes first. When the queue is full the overflow policy decides:
+    ``block`` waits (up to ``block_timeout``), ``drop`` counts and discards, ``spill``
+    appends the row to a local JSONL file. Failed flushes are spilled too. The worker replays
+    the spill file at start and every ``spill_retry_interval`` seconds; a file that still fails
+    after ``spill_max_attempts`` replays is moved aside as ``*.quarantine`` so one bad row
+    can't be retried forever.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "block",
+        block_timeout: float | None = 5.0,
+        spill_path: str | Path = "logs/prediction_spill.jsonl",
+        method: str = "insert",
+        spill_retry_interval: float = 30.0,
+        spill_max_attempts: int = 5,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_path = Path(spill_path)
+        self.spill_retry_interval = spill_retry_interval
+        self.spill_max_attempts = spill_max_attempts
+        # insert (executemany) or copy (COPY FROM STDIN on postgres, insert elsewhere)
+        self.method = method
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._spill_lock = threading.Lock()
+        # failed replays of the current .replay file; only touched by the worker thread
+        self._replay_failures = 0
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "failed": 0,
+            "flushes": 0,
+            "quarantined_files": 0,
+        }
+        self._flush_ms_total = 0.0
+        self._flush_ms_max = 0.0
+        self._flush_ms_last = 0.0
+
+    @classmethod
+    def from_env(cls) -> "PredictionLogWriter":
+        return cls(
+            max_queue=int(os.getenv("LOG_WRITER_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("LOG_WRITER_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("LOG_WRITER_FLUSH_INTERVAL", "1.0")),
+            overflow=os.getenv("LOG_WRITER_OVERFLOW", "block"),
+            spill_path=os.getenv("LOG_WRITER_SPILL_PATH", "logs/prediction_spill.jsonl"),
+            method=os.getenv("LOG_WRITER_METHOD", "insert"),
+            spill_retry_interval=float(os.getenv("LOG_WRITER_SPILL_RETRY_INTERVAL", "30")),
+            spill_max_attempts=int(os.getenv("LOG_WRITER_SPILL_MAX_ATTEMPTS", "5")),
+        )
+
+    # lifecycle
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+        logger.info("prediction log writer started (overflow=%s)", self.overflow)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush whatever is queued and stop the worker (FastAPI shutdown)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # keep the handle so start() can't launch a second consumer on the same queue
+            logger.warning("prediction log writer still flushing after %.1fs: %s", timeout, self.stats())
+            return
+        self._thread = None
+        logger.info("prediction log writer stopped: %s", self.stats())
+
+    # producer side
+
+    def submit(self, rows: list[dict]) -> None:
+        """Queue rows for the next bulk insert; never touches the DB on the caller's thread"""
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            # stamp now, otherwise created_at would be the flush time
+            row.setdefault("created_at", now)
+            try:
+                if self.overflow == "block":
+                    self._queue.put(row, timeout=self.block_timeout)
+                else:
+                    self._queue.put_nowait(row)
+                self._count("enqueued")
+            except queue.Full:
+                if self.overflow == "spill":
+                    self._spill([row])
+                else:
+                    self._count("dropped")
+
+    # consumer side
+
+    def _run(self) -> None:
+        self._replay_spill()
+        next_replay = time.monotonic() + self.spill_retry_interval
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            # rows spilled while running (overflow, or a flush that failed) go in without a restart
+            if time.monotonic() >= next_replay and not self._stop.is_set():
+                self._replay_spill()
+                next_replay = time.monotonic() + self.spill_retry_interval
+
+    def _collect(self) -> list[dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+        return batch
+
+    def _flush(self, batch: list[dict], spill: bool = True) -> bool:
+        start = time.perf_counter()
+        db = self.session_factory()
+        ok = True
+        try:
+            write_prediction_logs(db, batch, self.method)
+            self._count("written", len(batch))
+        except Exception as e:
+            logger.error(f"log writer flush of {len(batch)} rows failed: {e}")
+            metrics.DB_LOG_FAILURES.inc()
+            db.rollback()
+            self._count("failed", len(batch))
+            ok = False
+            # keep the rows around instead of losing them (a replay keeps its own file instead)
+            if spill:
+                self._spill(batch)
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - start
+        metrics.LOG_WRITER_FLUSH_SECONDS.observe(elapsed)
+        elapsed_ms = elapsed * 1000
+        with self._stats_lock:
+            self._counters["flushes"] += 1
+            self._flush_ms_last = elapsed_ms
+            self._flush_ms_total += elapsed_ms
+            self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        return ok
+
+    # spill file
+
+    def _spill(self, rows: list[dict]) -> None:
+        with self._spill_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=_json_default) + "\n")
+        self._count("spilled", len(rows))
+
+    def _replay_spill(self) -> None:
+        """Insert rows spilled earlier; runs at start and every spill_retry_interval"""
+        replay_path = self.spill_path.with_suffix(".replay")
+        if replay_path.exists():
+            # left by a crash or a failed attempt: finish it before the spill file is moved over it
+            if not self._replay_file(replay_path, resumed=True):
+                return
+        with self._spill_lock:
+            if not self.spill_path.exists():
+                return
+            self.spill_path.replace(replay_path)
+        self._replay_file(replay_path)
+
+    def _replay_file(self, path: Path, resumed: bool = False) -> bool:
+        """True once every row of `path` is in the DB and the file is gone"""
+        try:
+            # a line cut short by a crash fails here, and counts as a failed attempt like a bad row
+            rows = []
+            with path.open() as f:
+                for line in f:
+                    row = json.loads(line)
+                    if row.get("created_at"):
+                        row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    rows.append(row)
+
+            logger.info("replaying %d spilled prediction logs from %s", len(rows), path)
+            for i in range(0, len(rows), self.batch_size):
+                batch = rows[i : i + self.batch_size]
+                if resumed:
+                    # batches committed by an earlier attempt would fail the unique prediction_id
+                    batch = self._not_yet_written(batch)
+                if batch and not self._flush(batch, spill=False):
+                    return self._replay_failed(path)
+        except Exception as e:
+            logger.error(f"replay of {path} failed: {e}")
+            return self._replay_failed(path)
+        path.unlink()
+        self._replay_failures = 0
+        return True
+
+    def _replay_failed(self, path: Path) -> bool:
+        # the file stays as it is; the next attempt skips the batches that did go in
+        self._replay_failures += 1
+        if self._replay_failures < self.spill_max_attempts:
+            logger.warning(
+                "replay of %s failed (attempt %d of %d), retrying in %.0fs",
+                path,
+                self._replay_failures,
+                self.spill_max_attempts,
+                self.spill_retry_interval,
+            )
+            return False
+        quarantine = path.with_suffix(f".{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.quarantine")
+        path.replace(quarantine)
+        self._replay_failures = 0
+        self._count("quarantined_files")
+        logger.error(
+            "gave up replaying spilled prediction logs after %d attempts; moved them to %s",
+            self.spill_max_attempts,
+            quarantine,
+        )
+        return False
+
+    def _not_yet_written(self, rows: list[dict]) -> list[dict]:
+        ids = [row["prediction_id"] for row in rows]
+        db = self.session_factory()
+        try:
+            written = set(db.scalars(select(PredictionLog.prediction_id).where(PredictionLog.prediction_id.in_(ids))))
+        finally:
+            db.close()
+        return [row for row in rows if row["prediction_id"] not in written]
+
+    # metrics
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += n
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            flushes = self._counters["flushes"]
+            return {
+                "running": self._thread is not None,
+                "overflow_policy": self.overflow,
+                "method": self.method,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                **self._counters,
+                "flush_ms_last": round(self._flush_ms_last, 3),
+                "flush_ms_avg": round(self._flush_ms_total / flushes, 3) if flushes else 0.0,
+                "flush_ms_max": round(self._flush_ms_max, 3),
+            }
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
@@ -0,0 +1,261 @@
+# tiny in-process metrics with Prometheus text output
+#
+# fixed-bucket histograms and counters guarded by a lock each, cheap enough for the
+# per-request hot path. METRICS_ENABLED=0 swaps every instrument for a no-op and the
+# API skips the middleware and the /metrics route.
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# seconds; fine resolution at the low end because most stages are micro-second scale
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class _Noop:
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+_NOOP = _Noop()
+
+
+def _label_str(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def set(self, value: float) -> None:
+        # only used by gauges
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh per-label-combination instrument"""
+
+    @abstractmethod
+    def _render_child(self, key: tuple, child) -> list[str]:
+        """Prometheus text lines for one child"""
+
+    def labels(self, **labels):
+        """Child for one label combination; hold on to it in hot paths to skip the lookup"""
+        if not ENABLED:
+            return _NOOP
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_label_str(self.labelnames, key)} {child.value}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket_labels = _label_str(self.labelnames, key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        labels = _label_str(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text exposition format"""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# serving metrics
+
+STAGE_SECONDS = Histogram(
+    "churn_stage_duration_seconds",
+    "Time spent in each prediction stage",
+    ("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "churn_http_request_duration_seconds",
+    "End-to-end HTTP request latency",
+    ("handler", "method", "status"),
+)
+PREDICTIONS = Counter("churn_predictions_total", "Predictions served by risk level", ("risk_level",))
+DB_LOG_FAILURES = Counter("churn_db_log_failures_total", "PredictionLog writes that failed")
+UNSEEN_CATEGORIES = Counter(
+    "churn_unseen_category_total",
+    "Categorical values the encoders never saw (fell back to code 0)",
+    ("feature",),
+)
+SHADOW_SECONDS = Histogram("churn_shadow_scoring_seconds", "Shadow model encode + score time per request", ("version",))
+DB_POOL_WAIT_SECONDS = Histogram(
+    "churn_db_pool_wait_seconds", "Time spent waiting to check a connection out of the pool", ("engine",)
+)
+MICROBATCH_SIZE = Histogram(
+    "churn_microbatch_size",
+    "Single predictions scored together per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+MICROBATCH_WAIT_SECONDS = Histogram(
+    "churn_microbatch_queue_wait_seconds", "Time a single prediction waited for its micro-batch to start scoring"
+)
+LOG_WRITER_FLUSH_SECONDS = Histogram("churn_log_writer_flush_seconds", "Write-behind logger bulk flush latency")
+# mirrored from LogWriter/PredictionCache stats when /metrics is scraped
+LOG_WRITER_QUEUE_DEPTH = Gauge("churn_log_writer_queue_depth", "Rows waiting in the write-behind queue")
+DB_POOL = Gauge("churn_db_pool_connections", "Pool connections by state", ("engine", "state"))
+CACHE_STATS = Gauge("churn_prediction_cache", "Prediction cache size and hit/miss/eviction counts", ("stat",))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request (cheaper than BaseHTTPMiddleware).
+
+    Also stamps scope["state"]["request_start"] so handlers can time the part before
+    them (body read + JSON parse + pydantic validation).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["request_start"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = scope.get("endpoint")
+            # handler name keeps label cardinality bounded, unlike raw paths
+            handler = getattr(endpoint, "__name__", "unmatched")
+            REQUEST_SECONDS.labels(handler=handler, method=scope["method"], status=status).observe(
+                time.perf_counter() - start
+            )
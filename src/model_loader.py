@@ -1,42 +1,330 @@
+import itertools
 import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import cached_property
 from pathlib import Path
 
 import joblib
 
+from .bundle import HEADER_FILE, load_bundle
+from .encoder import FeatureEncoder
+from .explain import Explainer
+from .inference import InferenceEngine
+from .score_table import ScoreTable, ScoreTableUnavailable
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# version of the artifacts sitting directly in models/ (the original flat layout)
+DEFAULT_MODEL_VERSION = "1.0"
+
+MODEL_DIR = Path(os.getenv("MODEL_DIR", Path(__file__).parent.parent / "models"))
+# models/ACTIVE holds the version to serve; rewrite it (or call the admin endpoint) to switch
+ACTIVE_FILE = "ACTIVE"
+
+# auto: mmap bundle.json and its arrays file when a version has one, else the pickles; or force pickle/bundle
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto")
+
+# versions a request's ?model_version= may load on demand; anything else must already be resident
+# (active, shadow, traffic split or loaded through /admin)
+REQUEST_VERSIONS = frozenset(filter(None, os.getenv("MODEL_REQUEST_VERSIONS", "").split(",")))
+
+# a version is a directory name directly under models/, never a path
+_VERSION_NAME = re.compile(r"[A-Za-z0-9._-]+")
+
+# unique per load, so caches can tell two loads of the same version apart
+_load_counter = itertools.count()
+
+
+class UnknownModelVersion(LookupError):
+    pass
+
+
+def _has_artifacts(path: Path) -> bool:
+    return (path / "model.pkl").exists() or (path / HEADER_FILE).exists()
+
+
+def check_version_name(version: str) -> None:
+    """Reject anything that isn't a plain directory name (separators, "..", absolute paths)"""
+    if not isinstance(version, str) or not _VERSION_NAME.fullmatch(version) or version in (".", ".."):
+        raise UnknownModelVersion(f"invalid model version {version!r}")
+
+
+def version_dir(version: str, base_path: Path = MODEL_DIR) -> Path:
+    """models/<version>/, or models/ itself for the legacy flat layout; only versions in available_versions()"""
+    check_version_name(version)
+    if version not in available_versions(base_path):
+        raise UnknownModelVersion(f"model version {version!r} not found in {base_path}")
+    path = base_path / version
+    if _has_artifacts(path):
+        return path
+    if version == DEFAULT_MODEL_VERSION and _has_artifacts(base_path):
+        return base_path
+    raise UnknownModelVersion(f"model version {version!r} not found in {base_path}")
+
+
+def available_versions(base_path: Path = MODEL_DIR) -> list[str]:
+    versions = sorted(p.name for p in base_path.iterdir() if p.is_dir() and _has_artifacts(p))
+    if _has_artifacts(base_path) and DEFAULT_MODEL_VERSION not in versions:
+        versions.insert(0, DEFAULT_MODEL_VERSION)
+    return versions
+
+
+def read_active_version(base_path: Path = MODEL_DIR) -> str:
+    """MODEL_VERSION env, else models/ACTIVE, else the legacy flat artifacts / newest directory"""
+    if os.getenv("MODEL_VERSION"):
+        return os.environ["MODEL_VERSION"]
+    active_file = base_path / ACTIVE_FILE
+    if active_file.exists():
+        return active_file.read_text().strip()
+    versions = available_versions(base_path)
+    if not versions:
+        raise UnknownModelVersion(f"no model artifacts in {base_path}")
+    return DEFAULT_MODEL_VERSION if DEFAULT_MODEL_VERSION in versions else versions[-1]
+
+
+def write_active_version(version: str, base_path: Path = MODEL_DIR) -> None:
+    """Point models/ACTIVE at ``version``; renamed into place so a watcher never reads it half-written"""
+    check_version_name(version)
+    active_file = base_path / ACTIVE_FILE
+    tmp = active_file.with_name(f".{ACTIVE_FILE}.{os.getpid()}")
+    tmp.write_text(version + "\n")
+    os.replace(tmp, active_file)
+
+
+class ModelArtifacts:
+    """Everything needed to serve one model version, loaded from its directory"""
+
+    def __init__(self, version: str, path: Path, fmt: str | None = None):
+        self.version = version
+        self.path = path
+        fmt = fmt or MODEL_FORMAT
+        if fmt == "auto":
+            fmt = "bundle" if (path / HEADER_FILE).exists() else "pickle"
+        self.format = fmt
+        logger.info("loading model %s artifacts (%s) from %s", version, fmt, path)
+        if fmt == "bundle":
+            # read-only mmap, pages shared between workers
+            self.model, self.scaler, self.feature_names, self.label_encoders = load_bundle(path)
+        else:
+            self.model = joblib.load(path / "model.pkl")
+            self.scaler = joblib.load(path / "scaler.pkl")
+            self.feature_names = joblib.load(path / "feature_names.pkl")
+            self.label_encoders = joblib.load(path / "label_encoders.pkl")
+        # bundle stand-ins remember the class they were exported from
+        self.model_type = getattr(self.model, "model_type", type(self.model).__name__)
+        # lookup tables for the pandas-free hot path
+        self.encoder = FeatureEncoder(self.feature_names, self.label_encoders, self.scaler)
+        # native dot + sigmoid for linear models, sklearn fallback otherwise
+        self.inference = InferenceEngine(self.model, self.scaler, self.encoder)
+        self.load_id = next(_load_counter)
+
+    @cached_property
+    def explainer(self) -> Explainer:
+        # built on the first ?explain=true request; raises ExplanationUnavailable for other model types
+        return Explainer(self.model, self.scaler, self.inference)
+
+    @cached_property
+    def score_table(self) -> ScoreTable | None:
+        # SCORE_TABLE=1 lookup scorer; None for models whose score isn't a sum of per-field terms
+        try:
+            return ScoreTable.from_artifacts(self)
+        except ScoreTableUnavailable as e:
+            logger.info("score table off for model %s: %s", self.version, e)
+            return None
+
+    @property
+    def cache_tag(self) -> str:
+        return f"{self.version}@{self.load_id}"
+
 
 class ModelLoader:
-    # holds my trained artifacts in memory (singleton-ish)
+    # holds my trained artifacts in memory (singleton-ish), now as a small registry of versions
+    #
+    # one version is active; up to MODEL_RESIDENT_VERSIONS are kept loaded so requests can
+    # pick one with ?model_version=. Callers grab an artifacts object once per request, so a
+    # swap never changes the model under a request that's already running.
     _instance = None
+    # first use can now come from several request threads at once; load the artifacts only once
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._load()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_registry(MODEL_DIR)
+                    cls._instance = instance
         return cls._instance
 
-    def _load(self):
-        base_path = Path(__file__).parent.parent / "models"
-        logger.info("loading model artifacts from %s", base_path)
-        self._model = joblib.load(base_path / "model.pkl")
-        self._scaler = joblib.load(base_path / "scaler.pkl")
-        self._feature_names = joblib.load(base_path / "feature_names.pkl")
-        self._label_encoders = joblib.load(base_path / "label_encoders.pkl")
+    @classmethod
+    def from_dir(cls, base_path: Path) -> "ModelLoader":
+        """Standalone registry over another models directory (not the process-wide one)"""
+        instance = super().__new__(cls)
+        instance._init_registry(Path(base_path))
+        return instance
+
+    def _init_registry(self, base_path: Path):
+        self.base_path = base_path
+        # versions kept in memory besides the active one
+        self.max_resident = max(int(os.getenv("MODEL_RESIDENT_VERSIONS", "2")), 1)
+        self.request_versions = REQUEST_VERSIONS
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._resident: OrderedDict[str, ModelArtifacts] = OrderedDict()
+        self._watcher = None
+        self._watch_stop = threading.Event()
+
+        version = read_active_version(self.base_path)
+        self._active = self._load(version)
+
+    def _load(self, version: str) -> ModelArtifacts:
+        artifacts = ModelArtifacts(version, version_dir(version, self.base_path))
+        with self._lock:
+            self._resident[version] = artifacts
+            self._evict()
+        return artifacts
+
+    def _evict(self):
+        # least recently used first; the active version is never evicted and doesn't count
+        # towards max_resident, so the version just loaded next to it always stays
+        active = self._active.version if hasattr(self, "_active") else None
+        others = [v for v in self._resident if v != active]
+        for version in others[: max(len(others) - self.max_resident, 0)]:
+            del self._resident[version]
+            logger.info("unloaded model %s", version)
+
+    # registry API
+
+    def get(self, version: str | None = None) -> ModelArtifacts:
+        """Artifacts for a version (loaded on first use), or the active one"""
+        if version is None:
+            return self._active
+        with self._lock:
+            artifacts = self._resident.get(version)
+            if artifacts is not None:
+                self._resident.move_to_end(version)
+                return artifacts
+        return self._load(version)
+
+    def get_requested(self, version: str | None) -> ModelArtifacts:
+        """get() for a version named by a caller (?model_version=): resident or MODEL_REQUEST_VERSIONS only.
+
+        Anything else would be a cold load, and LRU-evict what's resident, on an unauthenticated
+        request, so loading new versions is left to the /admin endpoints.
+        """
+        if version is None:
+            return self._active
+        check_version_name(version)
+        with self._lock:
+            artifacts = self._resident.get(version)
+            if artifacts is not None:
+                self._resident.move_to_end(version)
+                return artifacts
+        if version not in self.request_versions:
+            raise UnknownModelVersion(f"model version {version!r} is not loaded")
+        return self._load(version)
+
+    def activate(self, version: str, persist: bool = False) -> ModelArtifacts:
+        """Load (if needed) and atomically make ``version`` the default for new requests
+
+        ``persist`` also writes models/ACTIVE, so every other process watching it follows.
+        """
+        artifacts = self.get(version)
+        with self._lock:
+            previous = self._active.version
+            self._active = artifacts
+        if previous != version:
+            logger.info("active model switched %s -> %s", previous, version)
+        if persist:
+            write_active_version(version, self.base_path)
+        return artifacts
+
+    def reload(self):
+        """Re-read the resident versions from disk; bumps generation so caches know to drop old results"""
+        with self._lock:
+            versions = list(self._resident)
+            active = self._active.version
+        fresh = {v: ModelArtifacts(v, version_dir(v, self.base_path)) for v in versions}
+        with self._lock:
+            self._resident = OrderedDict(fresh)
+            self._active = fresh[active]
+            self.generation += 1
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "active_version": self._active.version,
+                "resident_versions": list(self._resident),
+                "max_resident": self.max_resident,
+                "available_versions": available_versions(self.base_path),
+                "generation": self.generation,
+            }
+
+    # file watch
+
+    def start_watching(self, interval: float) -> None:
+        """Poll models/ACTIVE and switch when its content changes"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_stop.clear()
+        # a MODEL_VERSION pin only gives way to later changes of the file, not to what it holds now;
+        # otherwise catch up at once (e.g. a worker re-forked after an activate)
+        seen = self._read_active_file() if os.getenv("MODEL_VERSION") else None
+        self._watcher = threading.Thread(target=self._watch, args=(interval, seen), name="model-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watch_stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _read_active_file(self) -> str | None:
+        active_file = self.base_path / ACTIVE_FILE
+        return active_file.read_text().strip() if active_file.exists() else None
+
+    def _watch(self, interval: float, seen: str | None) -> None:
+        while not self._watch_stop.wait(interval):
+            try:
+                wanted = self._read_active_file()
+                if wanted == seen:
+                    continue
+                seen = wanted
+                if wanted and wanted != self._active.version:
+                    self.activate(wanted)
+            except Exception:
+                logger.exception("model watch failed to activate %s", self.base_path / ACTIVE_FILE)
+
+    # the active version's artifacts, as before
+
+    @property
+    def model_version(self):
+        return self._active.version
 
     @property
     def model(self):
-        return self._model
+        return self._active.model
 
     @property
     def scaler(self):
-        return self._scaler
+        return self._active.scaler
 
     @property
     def feature_names(self):
-        return self._feature_names
+        return self._active.feature_names
 
     @property
     def label_encoders(self):
-        return self._label_encoders
+        return self._active.label_encoders
+
+    @property
+    def encoder(self):
+        return self._active.encoder
+
+    @property
+    def inference(self):
+        return self._active.inference
@@ -0,0 +1,221 @@
+# time partitioning of prediction_logs
+#
+# postgres: prediction_logs is a native RANGE (created_at) partitioned table with one partition
+#   per UTC day (prediction_logs_pYYYYMMDD), created LOG_PARTITION_PREMAKE_DAYS ahead, plus a
+#   DEFAULT partition so an insert never fails when maintenance hasn't run. Postgres requires
+#   the partition key in every unique index, so the primary key is (id, created_at) and
+#   prediction_id gets a plain index (it is a uuid4 anyway).
+# sqlite (and postgres with LOG_PARTITIONING=0): no native partitions. The same UTC days are
+#   logical partitions over the (created_at, id) index, and retention deletes a day's exported rows.
+#
+# python -m src.partitions ensure     create the table / upcoming partitions
+# python -m src.partitions migrate    move an existing unpartitioned prediction_logs over
+import argparse
+import logging
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .database import PredictionLog
+
+logger = logging.getLogger(__name__)
+
+TABLE = PredictionLog.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+PREMAKE_DAYS = int(os.getenv("LOG_PARTITION_PREMAKE_DAYS", "7"))
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+
+def enabled(engine: Engine) -> bool:
+    """Native partitions are used on postgres unless LOG_PARTITIONING=0"""
+    return engine.dialect.name == "postgresql" and os.getenv("LOG_PARTITIONING", "1") == "1"
+
+
+def day_start(value: datetime | date) -> datetime:
+    """UTC midnight of the day `value` falls on; naive datetimes are taken as UTC"""
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).date() if value.tzinfo else value.date()
+    return datetime.combine(value, time(), tzinfo=timezone.utc)
+
+
+def partition_name(day: datetime | date) -> str:
+    return f"{TABLE}_p{day_start(day):%Y%m%d}"
+
+
+def partition_day(name: str) -> datetime | None:
+    """Inverse of partition_name; None for the default partition or foreign tables"""
+    match = _PARTITION_NAME.match(name)
+    return datetime.strptime(match.group(1), "%Y%m%d").replace(tzinfo=timezone.utc) if match else None
+
+
+def parent_ddl(engine: Engine) -> str:
+    # column types come from the ORM model so the two can't drift apart
+    columns = []
+    for column in PredictionLog.__table__.columns:
+        if column.name == "id":
+            columns.append("id SERIAL")
+        elif column.name == "created_at":
+            columns.append("created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()")
+        else:
+            columns.append(f"{column.name} {column.type.compile(dialect=engine.dialect)}")
+    return (
+        f"CREATE TABLE IF NOT EXISTS {TABLE} ({', '.join(columns)}, PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+
+
+def partition_ddl(day: datetime | date) -> str:
+    start = day_start(day)
+    end = start + timedelta(days=1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def is_partitioned(conn) -> bool | None:
+    """True / False for an existing prediction_logs, None when the table doesn't exist yet"""
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": TABLE}).scalar()
+    return None if kind is None else kind == "p"
+
+
+def list_partitions(conn) -> list[str]:
+    """Names of the attached partitions, default included"""
+    query = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t) ORDER BY c.relname"
+    )
+    return list(conn.execute(query, {"t": TABLE}).scalars())
+
+
+def _create_indexes(conn) -> None:
+    # indexes on the parent cascade to every current and future partition
+    for index in PredictionLog.__table__.indexes:
+        columns = ", ".join(c.name for c in index.columns)
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON {TABLE} ({columns})"))
+
+
+def ensure_partitions(engine: Engine, days_ahead: int = PREMAKE_DAYS, now: datetime | None = None) -> list[str]:
+    """Create the partitioned table if needed plus today's and the next `days_ahead` partitions"""
+    today = day_start(now or datetime.now(timezone.utc))
+    with engine.begin() as conn:
+        state = is_partitioned(conn)
+        if state is False:
+            logger.warning("%s exists and is not partitioned; run python -m src.partitions migrate", TABLE)
+            return []
+        if state is None:
+            conn.execute(text(parent_ddl(engine)))
+            _create_indexes(conn)
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        existing = set(list_partitions(conn))
+        created = []
+        for offset in range(days_ahead + 1):
+            name = partition_name(today + timedelta(days=offset))
+            if name not in existing:
+                conn.execute(text(partition_ddl(today + timedelta(days=offset))))
+                created.append(name)
+    if created:
+        logger.info("created partitions %s", ", ".join(created))
+    return created
+
+
+def ensure_days(engine: Engine, days) -> list[str]:
+    """Create partitions for past `days` (backfills); a day whose rows already sit in default is left there"""
+    with engine.connect() as conn:
+        existing = set(list_partitions(conn))
+    created = []
+    for day in sorted({day_start(d) for d in days}):
+        if partition_name(day) in existing:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(partition_ddl(day)))
+            created.append(partition_name(day))
+        except Exception as e:
+            # postgres refuses a partition whose range the default partition already holds rows for
+            logger.warning("no partition for %s, rows go to %s: %s", f"{day:%Y-%m-%d}", DEFAULT_PARTITION, e)
+    return created
+
+
+def detach_partition(conn, day: datetime | date) -> str | None:
+    """Detach the day's partition and return its name; None when that day has none (rows live in default).
+
+    Detaching waits for inserts in flight; later rows for the day are routed to the default partition.
+    """
+    name = partition_name(day)
+    if name not in list_partitions(conn):
+        return None
+    conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+    return name
+
+
+def drop_detached(conn, name: str) -> int:
+    """Drop a detached partition, moving the rows still in it to the default partition first; returns rows moved"""
+    columns = ", ".join(c.name for c in PredictionLog.__table__.columns)
+    moved = conn.execute(text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {name}")).rowcount
+    conn.execute(text(f"DROP TABLE {name}"))
+    return moved
+
+
+def drop_partition(conn, day: datetime | date) -> bool:
+    """Detach and drop the day's partition, keeping any rows it holds; False when that day has none"""
+    name = detach_partition(conn, day)
+    if name is None:
+        return False
+    drop_detached(conn, name)
+    return True
+
+
+def migrate(engine: Engine) -> int:
+    """Rename an unpartitioned prediction_logs to *_legacy, recreate it partitioned and copy the rows over.
+
+    The legacy table is kept for the operator to drop once the copy is checked. Returns rows copied.
+    """
+    legacy = f"{TABLE}_legacy"
+    with engine.begin() as conn:
+        if is_partitioned(conn) is not False:
+            return 0
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {legacy}"))
+        # index names are global in a schema; free them for the partitioned table
+        conn.execute(text(f"ALTER INDEX IF EXISTS {TABLE}_pkey RENAME TO {legacy}_pkey"))
+        for index in PredictionLog.__table__.indexes:
+            conn.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_legacy"))
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq RENAME TO {legacy}_id_seq"))
+        oldest, newest = conn.execute(text(f"SELECT min(created_at), max(created_at) FROM {legacy}")).one()
+    ensure_partitions(engine)
+    with engine.begin() as conn:
+        if oldest is not None:
+            day = day_start(oldest)
+            while day <= day_start(newest):
+                conn.execute(text(partition_ddl(day)))
+                day += timedelta(days=1)
+        columns = ", ".join(c.name for c in PredictionLog.__table__.columns)
+        copied = conn.execute(text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {legacy}")).rowcount
+        conn.execute(text(f"SELECT setval('{TABLE}_id_seq', (SELECT coalesce(max(id), 0) + 1 FROM {TABLE}), false)"))
+    logger.info("copied %d rows from %s into the partitioned %s", copied, legacy, TABLE)
+    return copied
+
+
+def main():
+    from .database import get_engine
+
+    parser = argparse.ArgumentParser(description="prediction_logs partition maintenance (postgres)")
+    parser.add_argument("command", choices=["ensure", "migrate"])
+    parser.add_argument("--days-ahead", type=int, default=PREMAKE_DAYS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = get_engine()
+    if not enabled(engine):
+        print("native partitions are postgres only (and LOG_PARTITIONING=1); sqlite uses day ranges")
+        return
+    if args.command == "migrate":
+        print(f"copied {migrate(engine)} rows")
+    print(f"created {len(ensure_partitions(engine, args.days_ahead))} partitions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,344 @@
 import logging
+import os
+import time
 import uuid
+from collections import Counter
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from .database import PredictionLog
-from .model_loader import ModelLoader
+from . import metrics
+from .batcher import MicroBatcher
+from .cache import PredictionCache, canonical_key
+from .columnar import INPUT_DICTIONARY, OUTPUT_DICTIONARY, decode_values
+from .drift import DriftMonitors, ReferenceUnavailable
+from .log_writer import PredictionLogWriter, write_prediction_logs, write_prediction_logs_async
+from .model_loader import ModelArtifacts, ModelLoader
 from .schemas import CustomerInput, PredictionOutput
+from .shadow import ShadowScorer, TrafficSplit
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# histogram children resolved once; no-ops when METRICS_ENABLED=0
+_STAGE = {
+    stage: metrics.STAGE_SECONDS.labels(stage=stage)
+    for stage in ("preprocess", "inference", "batch_preprocess", "batch_inference", "explain", "db_log")
+}
+
+# PredictionLog column -> CustomerInput field
+LOG_COLUMNS = {
+    "gender": "gender",
+    "senior_citizen": "SeniorCitizen",
+    "partner": "Partner",
+    "dependents": "Dependents",
+    "tenure": "tenure",
+    "phone_service": "PhoneService",
+    "multiple_lines": "MultipleLines",
+    "internet_service": "InternetService",
+    "online_security": "OnlineSecurity",
+    "online_backup": "OnlineBackup",
+    "device_protection": "DeviceProtection",
+    "tech_support": "TechSupport",
+    "streaming_tv": "StreamingTV",
+    "streaming_movies": "StreamingMovies",
+    "contract": "Contract",
+    "paperless_billing": "PaperlessBilling",
+    "payment_method": "PaymentMethod",
+    "monthly_charges": "MonthlyCharges",
+    "total_charges": "TotalCharges",
+}
+
+
+# scored once by load(warm_up=True) so the first real request doesn't pay for cold code paths
+WARMUP_CUSTOMER = CustomerInput(
+    gender="Male",
+    SeniorCitizen=0,
+    Partner="Yes",
+    Dependents="No",
+    tenure=24,
+    PhoneService="Yes",
+    MultipleLines="No",
+    InternetService="Fiber optic",
+    OnlineSecurity="No",
+    OnlineBackup="Yes",
+    DeviceProtection="No",
+    TechSupport="No",
+    StreamingTV="Yes",
+    StreamingMovies="No",
+    Contract="Month-to-month",
+    PaperlessBilling="Yes",
+    PaymentMethod="Electronic check",
+    MonthlyCharges=70.5,
+    TotalCharges=1692.0,
+)
+
+
+def new_prediction_id() -> str:
+    # 48 random bits so nightly batches of millions don't collide on the unique index
+    return f"pred_{uuid.uuid4().hex[:12]}"
+
+
+def risk_level_for(churn_prob: float) -> str:
+    if churn_prob < 0.3:
+        return "Low"
+    if churn_prob < 0.7:
+        return "Medium"
+    return "High"
+
+
+def prediction_for(churn_prob: float) -> str:
+    # same decision as model.predict for a binary classifier: class 1 wins above 0.5
+    return "Yes" if churn_prob > 0.5 else "No"
+
+
+def log_row(
+    customer_data: CustomerInput,
+    prediction_id: str,
+    churn_prediction: str,
+    churn_prob: float,
+    risk_level: str,
+    model_version: str = "1.0",
+) -> dict:
+    """Build a PredictionLog row as a plain dict (used for bulk inserts)"""
+    row = {col: getattr(customer_data, field) for col, field in LOG_COLUMNS.items()}
+    row.update(
+        prediction_id=prediction_id,
+        churn_prediction=churn_prediction,
+        churn_probability=churn_prob,
+        risk_level=risk_level,
+        model_version=model_version,
+    )
+    return row
+
 
 class ChurnPredictor:
     """Handles churn prediction logic"""
 
-    def __init__(self):
-        self.loader = ModelLoader()
+    def __init__(
+        self,
+        log_writer: PredictionLogWriter | None = None,
+        cache: PredictionCache | None = None,
+        shadow: ShadowScorer | None = None,
+        traffic_split: TrafficSplit | None = None,
+        drift: DriftMonitors | None = None,
+        score_tables: bool = False,
+    ):
+        # the process-wide registry, created (and the active model loaded) on first use or by load()
+        self._loader: ModelLoader | None = None
+        # when set, logs go through the write-behind queue instead of the request's session
+        self.log_writer = log_writer
+        # optional result cache; hits skip scoring but are still logged
+        self.cache = cache
+        self._cache_generation = None
+        # candidate versions scored off the response path
+        self.shadow = shadow
+        # share of unpinned requests answered by a candidate version
+        self.traffic_split = traffic_split
+        # live input/score histograms, fed from every scored request
+        self.drift = drift
+        # score linear models from precomputed per-field tables instead of encode + dot
+        self.score_tables = score_tables
+        # coalesces concurrent predict_async calls into batches (see batcher.py)
+        self.batcher: MicroBatcher | None = None
+
+    @classmethod
+    def from_env(cls, log_writer: PredictionLogWriter | None = None) -> "ChurnPredictor":
+        # PREDICTION_CACHE_SIZE=0 (default) disables the cache
+        size = int(os.getenv("PREDICTION_CACHE_SIZE", "0"))
+        cache = PredictionCache(size, ttl=float(os.getenv("PREDICTION_CACHE_TTL", "0"))) if size > 0 else None
+        predictor = cls(
+            log_writer=log_writer,
+            cache=cache,
+            shadow=ShadowScorer.from_env(),
+            traffic_split=TrafficSplit.from_env(),
+            score_tables=os.getenv("SCORE_TABLE", "0") == "1",
+        )
+        predictor.batcher = MicroBatcher.from_env(predictor)
+        # DRIFT_STREAM=1 counts every scored request into this process's drift histograms
+        if os.getenv("DRIFT_STREAM", "0") == "1":
+            predictor.drift = DriftMonitors()
+        return predictor
+
+    @property
+    def loader(self) -> ModelLoader:
+        if self._loader is None:
+            self._loader = ModelLoader()
+        return self._loader
+
+    @loader.setter
+    def loader(self, loader: ModelLoader) -> None:
+        self._loader = loader
+
+    @property
+    def loaded(self) -> bool:
+        """True once the active model's artifacts are in memory (doesn't trigger a load)"""
+        return self._loader is not None
+
+    def load(self, warm_up: bool = False) -> None:
+        """Load everything the predictor was configured with now rather than on the first request.
+
+        Called from the API lifespan hook and by src.serve before forking. ``warm_up`` also scores
+        WARMUP_CUSTOMER through the single-row and batch paths (nothing is logged or counted).
+        """
+        artifacts = self.loader.get()
+        inference = artifacts.inference
+        if self.score_tables:
+            # builds the active version's tables now rather than on the first request
+            artifacts.score_table
+        if self.drift is not None:
+            try:
+                self.drift.get()
+            except ReferenceUnavailable as e:
+                logger.warning("stream drift has no reference yet: %s", e)
+        # load candidates now so a typo fails at startup and the first shadowed request isn't a cold load
+        for version in self.shadow.versions if self.shadow else []:
+            self.loader.get(version)
+        if self.traffic_split is not None:
+            self.loader.get(self.traffic_split.candidate_version)
+        if warm_up:
+            inference.score(WARMUP_CUSTOMER)
+            inference.score_many([WARMUP_CUSTOMER, WARMUP_CUSTOMER])
+            if self.score_tables and artifacts.score_table is not None:
+                artifacts.score_table.score_many([WARMUP_CUSTOMER])
+
+    def _artifacts_for(self, model_version: str | ModelArtifacts | None) -> ModelArtifacts:
+        # artifacts the caller already resolved (api.requested_artifacts) are used as they are, so an
+        # eviction since then can't turn into a cold load here
+        if isinstance(model_version, ModelArtifacts):
+            return model_version
+        # an explicit version wins; otherwise the traffic split may pick the candidate
+        if model_version is None and self.traffic_split is not None:
+            model_version = self.traffic_split.choose()
+        return self.loader.get(model_version)
+
+    def _check_cache_generation(self) -> None:
+        # artifacts were reloaded since we last looked -> cached probabilities are stale
+        if self.cache is None:
+            return
+        generation = self.loader.generation
+        if self._cache_generation is None:
+            # first look after a deferred load: nothing cached yet
+            self._cache_generation = generation
+        elif self._cache_generation != generation:
+            self.cache.clear()
+            self._cache_generation = generation
+
+    def _run_inference(self, customer_data: CustomerInput, artifacts: ModelArtifacts) -> float:
+        inference = artifacts.inference
+        start = time.perf_counter()
+        table = artifacts.score_table if self.score_tables else None
+        if table is not None:
+            # lookups replace the encode step, so it all counts as inference
+            churn_prob = table.score(customer_data)
+            _STAGE["inference"].observe(time.perf_counter() - start)
+            return churn_prob
+        X = inference.encoder.encode(customer_data, scaled=inference.expects_scaled)
+        encoded = time.perf_counter()
+        churn_prob = inference.score_encoded(X)
+        _STAGE["preprocess"].observe(encoded - start)
+        _STAGE["inference"].observe(time.perf_counter() - encoded)
+        return churn_prob
+
+    def _run_inference_many(self, customers: list[CustomerInput], artifacts: ModelArtifacts) -> list[float]:
+        inference = artifacts.inference
+        start = time.perf_counter()
+        table = artifacts.score_table if self.score_tables else None
+        if table is not None:
+            churn_probs = table.score_many(customers).tolist()
+            _STAGE["batch_inference"].observe(time.perf_counter() - start)
+            return churn_probs
+        X = inference.encoder.encode_many(customers, scaled=inference.expects_scaled)
+        encoded = time.perf_counter()
+        churn_probs = inference.churn_proba(X).tolist()
+        _STAGE["batch_preprocess"].observe(encoded - start)
+        _STAGE["batch_inference"].observe(time.perf_counter() - encoded)
+        return churn_probs
+
+    def _explain_many(
+        self, customers: list[CustomerInput], artifacts: ModelArtifacts, top_k: int
+    ) -> tuple[list[float], list[list[dict]]]:
+        """Scores plus the top_k contributions per customer, from one encode (bypasses the cache)"""
+        inference = artifacts.inference
+        explainer = artifacts.explainer
+        start = time.perf_counter()
+        X = inference.encoder.encode_many(customers, scaled=inference.expects_scaled)
+        # the score from the engine, as without explain=true; the explainer only attributes it
+        churn_probs = inference.churn_proba(X)
+        contributions = explainer.contributions(X)
+        top = explainer.top_k(contributions, top_k)
+        names = np.asarray(explainer.feature_names, dtype=object)[top].tolist()
+        values = np.round(np.take_along_axis(contributions, top, axis=1), 4).tolist()
+        # plain dicts: pydantic validates them inside the PredictionOutput call, which is cheaper than
+        # building a FeatureContribution per entry
+        explanations = [
+            [
+                {"feature": name, "value": getattr(customer, name, 0), "contribution": value}
+                for name, value in zip(row_names, row_values)
+            ]
+            for customer, row_names, row_values in zip(customers, names, values)
+        ]
+        _STAGE["explain"].observe(time.perf_counter() - start)
+        return churn_probs.tolist(), explanations
+
+    def _write_logs(self, db: Session, rows: list[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            write_prediction_logs(db, rows)
+            logger.info(f"{len(rows)} prediction(s) logged to DB")
+        except Exception as e:
+            metrics.DB_LOG_FAILURES.inc()
+            logger.error(f"DB log failed: {e}")
+            db.rollback()
+        _STAGE["db_log"].observe(time.perf_counter() - start)
+
+    async def _write_logs_async(self, db: AsyncSession, rows: list[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            await write_prediction_logs_async(db, rows)
+            logger.info(f"{len(rows)} prediction(s) logged to DB")
+        except Exception as e:
+            metrics.DB_LOG_FAILURES.inc()
+            logger.error(f"DB log failed: {e}")
+            await db.rollback()
+        _STAGE["db_log"].observe(time.perf_counter() - start)
+
+    def _score(self, customer_data: CustomerInput, artifacts: ModelArtifacts) -> float:
+        if self.cache is None:
+            return self._run_inference(customer_data, artifacts)
+        self._check_cache_generation()
+        # keyed on this exact load, so a score computed mid-reload or by another version never leaks
+        key = canonical_key(customer_data, artifacts.cache_tag)
+        churn_prob = self.cache.get(key)
+        if churn_prob is None:
+            churn_prob = self._run_inference(customer_data, artifacts)
+            self.cache.put(key, churn_prob)
+        return churn_prob
+
+    def _score_many(self, customers: list[CustomerInput], artifacts: ModelArtifacts) -> list[float]:
+        if self.cache is None:
+            return self._run_inference_many(customers, artifacts)
+        self._check_cache_generation()
+        keys = [canonical_key(c, artifacts.cache_tag) for c in customers]
+        churn_probs = [self.cache.get(k) for k in keys]
+        # score only the misses, still as one matrix
+        missing = [i for i, p in enumerate(churn_probs) if p is None]
+        if missing:
+            scored = self._run_inference_many([customers[i] for i in missing], artifacts)
+            for i, churn_prob in zip(missing, scored):
+                churn_probs[i] = churn_prob
+                self.cache.put(keys[i], churn_prob)
+        return churn_probs
 
     def _preprocess_input(self, customer_data: CustomerInput) -> np.ndarray:
         """Convert input data to model-ready format"""
+        import pandas as pd
 
         # Convert to dictionary -> DataFrame
         data_dict = customer_data.model_dump()
@@ -42,67 +360,281 @@ class ChurnPredictor:
         scaled_data = self.loader.scaler.transform(df)
         return scaled_data
 
-    def predict(self, customer_data: CustomerInput, db: Session = None) -> PredictionOutput:
-        """Make churn prediction and (optionally) log into database"""
+    def _predict_one(
+        self,
+        customer_data: CustomerInput,
+        model_version: str | ModelArtifacts | None,
+        log_to_db: bool,
+        explain_top_k: int = 0,
+    ) -> tuple[PredictionOutput, list[dict]]:
+        """Score one customer; returns the output and the log rows still to be written to the DB"""
+        # resolved once, so a hot swap mid-request can't mix versions
+        artifacts = self._artifacts_for(model_version)
 
-        # Preprocess
-        X = self._preprocess_input(customer_data)
+        # Encode + score once (or hit the cache); class and risk both come from the same probability
+        explanation = None
+        if explain_top_k:
+            [churn_prob], [explanation] = self._explain_many([customer_data], artifacts, explain_top_k)
+        else:
+            churn_prob = self._score(customer_data, artifacts)
 
-        # Predict
-        pred_class = self.loader.model.predict(X)[0]
-        proba = self.loader.model.predict_proba(X)[0]
-        churn_prob = float(proba[1])
+        churn_prediction = prediction_for(churn_prob)
+        risk_level = risk_level_for(churn_prob)
 
-        churn_prediction = "Yes" if pred_class == 1 else "No"
-        if churn_prob < 0.3:
-            risk_level = "Low"
-        elif churn_prob < 0.7:
-            risk_level = "Medium"
-        else:
-            risk_level = "High"
+        prediction_id = new_prediction_id()
+        metrics.PREDICTIONS.labels(risk_level=risk_level).inc()
 
-        prediction_id = f"pred_{uuid.uuid4().hex[:8]}"
+        # Log to DB if session provided (or hand off to the write-behind logger)
+        db_rows = []
+        if self.log_writer is not None or log_to_db:
+            row = log_row(customer_data, prediction_id, churn_prediction, churn_prob, risk_level, artifacts.version)
+            if self.log_writer is not None:
+                self.log_writer.submit([row])
+            else:
+                db_rows.append(row)
 
-        # Log to DB if session provided
-        if db is not None:
-            try:
-                log_entry = PredictionLog(
-                    prediction_id=prediction_id,
-                    gender=customer_data.gender,
-                    senior_citizen=customer_data.SeniorCitizen,
-                    partner=customer_data.Partner,
-                    dependents=customer_data.Dependents,
-                    tenure=customer_data.tenure,
-                    phone_service=customer_data.PhoneService,
-                    multiple_lines=customer_data.MultipleLines,
-                    internet_service=customer_data.InternetService,
-                    online_security=customer_data.OnlineSecurity,
-                    online_backup=customer_data.OnlineBackup,
-                    device_protection=customer_data.DeviceProtection,
-                    tech_support=customer_data.TechSupport,
-                    streaming_tv=customer_data.StreamingTV,
-                    streaming_movies=customer_data.StreamingMovies,
-                    contract=customer_data.Contract,
-                    paperless_billing=customer_data.PaperlessBilling,
-                    payment_method=customer_data.PaymentMethod,
-                    monthly_charges=customer_data.MonthlyCharges,
-                    total_charges=customer_data.TotalCharges,
-                    churn_prediction=churn_prediction,
-                    churn_probability=churn_prob,
-                    risk_level=risk_level,
-                    model_version="1.0",
-                )
-                db.add(log_entry)
-                db.commit()
-                logger.info(f"prediction {prediction_id} logged to DB")
-            except Exception as e:
-                logger.error(f"DB log failed: {e}")
-                db.rollback()
-
-        return PredictionOutput(
+        if self.shadow is not None:
+            self.shadow.submit(artifacts.version, [customer_data], [prediction_id], [churn_prob])
+        if self.drift is not None:
+            self.drift.observe(artifacts.version, [customer_data], [churn_prob])
+
+        output = PredictionOutput(
             customer_id=prediction_id,
             churn_prediction=churn_prediction,
             churn_probability=round(churn_prob, 3),
             risk_level=risk_level,
             timestamp=datetime.now(),
+            model_version=artifacts.version,
+            explanation=explanation,
+        )
+        return output, db_rows
+
+    def predict(
+        self,
+        customer_data: CustomerInput,
+        db: Session = None,
+        model_version: str | ModelArtifacts | None = None,
+        explain_top_k: int = 0,
+    ) -> PredictionOutput:
+        """Make churn prediction and (optionally) log into database.
+
+        ``model_version`` picks a resident/available version instead of the active one, by name
+        (raises UnknownModelVersion if it doesn't exist) or as artifacts already resolved with
+        loader.get_requested. ``explain_top_k`` > 0 adds that many feature contributions (raises
+        ExplanationUnavailable for unsupported model types).
+        """
+        output, db_rows = self._predict_one(customer_data, model_version, db is not None, explain_top_k)
+        if db_rows:
+            self._write_logs(db, db_rows)
+        return output
+
+    async def predict_async(
+        self,
+        customer_data: CustomerInput,
+        db: AsyncSession = None,
+        model_version: str | ModelArtifacts | None = None,
+        explain_top_k: int = 0,
+    ) -> PredictionOutput:
+        """predict() for async handlers: scoring runs in the threadpool, the log insert is awaited"""
+        if self.batcher is not None and not explain_top_k:
+            output, row = await self.batcher.submit(customer_data, model_version)
+            if row is not None and db is not None:
+                await self._write_logs_async(db, [row])
+            return output
+        output, db_rows = await run_in_threadpool(
+            self._predict_one, customer_data, model_version, db is not None, explain_top_k
+        )
+        if db_rows:
+            await self._write_logs_async(db, db_rows)
+        return output
+
+    def score_frame(self, df: "pd.DataFrame", model_version: str | None = None) -> "pd.DataFrame":
+        """Vectorized scoring of a cleaned churn.csv-shaped frame (no logging).
+
+        Returns churn_prediction / churn_probability / risk_level aligned with df's index.
+        """
+        import pandas as pd
+
+        churn_probs = self.loader.get(model_version).inference.score_columns(df, len(df))
+        return pd.DataFrame(
+            {
+                "churn_prediction": np.where(churn_probs > 0.5, "Yes", "No"),
+                "churn_probability": churn_probs,
+                "risk_level": np.where(churn_probs < 0.3, "Low", np.where(churn_probs < 0.7, "Medium", "High")),
+            },
+            index=df.index,
+        )
+
+    def _predict_batch(
+        self,
+        customers: list[CustomerInput],
+        model_version: str | ModelArtifacts | None,
+        log_to_db: bool,
+        explain_top_k: int = 0,
+    ) -> tuple[list[PredictionOutput], list[dict]]:
+        artifacts = self._artifacts_for(model_version)
+
+        # one encode + one scoring call for the whole matrix
+        if explain_top_k:
+            churn_probs, explanations = self._explain_many(customers, artifacts, explain_top_k)
+        else:
+            churn_probs = self._score_many(customers, artifacts)
+            explanations = [None] * len(customers)
+
+        now = datetime.now()
+        outputs = []
+        rows = []
+        for customer, churn_prob, explanation in zip(customers, churn_probs, explanations):
+            churn_prediction = prediction_for(churn_prob)
+            risk_level = risk_level_for(churn_prob)
+            prediction_id = new_prediction_id()
+
+            outputs.append(
+                PredictionOutput(
+                    customer_id=prediction_id,
+                    churn_prediction=churn_prediction,
+                    churn_probability=round(churn_prob, 3),
+                    risk_level=risk_level,
+                    timestamp=now,
+                    model_version=artifacts.version,
+                    explanation=explanation,
+                )
+            )
+            if log_to_db or self.log_writer is not None:
+                rows.append(
+                    log_row(customer, prediction_id, churn_prediction, churn_prob, risk_level, artifacts.version)
+                )
+
+        for risk_level, count in Counter(o.risk_level for o in outputs).items():
+            metrics.PREDICTIONS.labels(risk_level=risk_level).inc(count)
+
+        if self.shadow is not None:
+            self.shadow.submit(artifacts.version, customers, [o.customer_id for o in outputs], churn_probs)
+        if self.drift is not None:
+            self.drift.observe(artifacts.version, customers, churn_probs)
+
+        if self.log_writer is not None:
+            self.log_writer.submit(rows)
+            return outputs, []
+        return outputs, rows
+
+    def predict_many(
+        self,
+        customers: list[CustomerInput],
+        db: Session = None,
+        model_version: str | ModelArtifacts | None = None,
+        explain_top_k: int = 0,
+    ) -> list[PredictionOutput]:
+        """Score a batch in one pass and (optionally) bulk-insert the logs.
+
+        Results are returned in the same order as ``customers``.
+        """
+        if not customers:
+            return []
+        outputs, db_rows = self._predict_batch(customers, model_version, db is not None, explain_top_k)
+        if db_rows:
+            # single executemany instead of one INSERT + commit per row
+            self._write_logs(db, db_rows)
+        return outputs
+
+    async def predict_many_async(
+        self,
+        customers: list[CustomerInput],
+        db: AsyncSession = None,
+        model_version: str | ModelArtifacts | None = None,
+        explain_top_k: int = 0,
+    ) -> list[PredictionOutput]:
+        """predict_many() for async handlers"""
+        if not customers:
+            return []
+        outputs, db_rows = await run_in_threadpool(
+            self._predict_batch, customers, model_version, db is not None, explain_top_k
         )
+        if db_rows:
+            await self._write_logs_async(db, db_rows)
+        return outputs
+
+    def _predict_columns(
+        self, columns: dict[str, np.ndarray], n_rows: int, model_version: str | ModelArtifacts | None, log_to_db: bool
+    ) -> tuple[dict, list[dict]]:
+        """Score a validated columnar batch (src.columnar); returns the result columns and log rows to write"""
+        artifacts = self._artifacts_for(model_version)
+        inference = artifacts.inference
+        start = time.perf_counter()
+        X = inference.encoder.encode_codes(columns, INPUT_DICTIONARY, n_rows, scaled=inference.expects_scaled)
+        encoded = time.perf_counter()
+        churn_probs = inference.churn_proba(X)
+        _STAGE["batch_preprocess"].observe(encoded - start)
+        _STAGE["batch_inference"].observe(time.perf_counter() - encoded)
+
+        # same rules as prediction_for / risk_level_for, as codes into OUTPUT_DICTIONARY
+        churn_codes = (churn_probs > 0.5).astype(np.intp)
+        risk_codes = np.where(churn_probs < 0.3, 0, np.where(churn_probs < 0.7, 1, 2))
+        risk_names = OUTPUT_DICTIONARY["risk_level"]
+        for code, count in enumerate(np.bincount(risk_codes, minlength=len(risk_names))):
+            if count:
+                metrics.PREDICTIONS.labels(risk_level=risk_names[code]).inc(int(count))
+
+        probs = churn_probs.tolist()
+        prediction_ids = [new_prediction_id() for _ in range(n_rows)]
+        result = {
+            "count": n_rows,
+            "model_version": artifacts.version,
+            "timestamp": datetime.now().isoformat(),
+            "customer_id": prediction_ids,
+            "churn_prediction": churn_codes.tolist(),
+            "churn_probability": [round(p, 3) for p in probs],
+            "risk_level": risk_codes.tolist(),
+        }
+
+        logged = log_to_db or self.log_writer is not None
+        if not (logged or self.shadow is not None or self.drift is not None):
+            return result, []
+        # logs, shadow and drift all want the category values rather than codes
+        values = decode_values(columns)
+        if self.shadow is not None:
+            self.shadow.submit(artifacts.version, values, prediction_ids, probs)
+        if self.drift is not None:
+            self.drift.observe(artifacts.version, values, probs)
+        if not logged:
+            return result, []
+
+        names = list(LOG_COLUMNS) + ["prediction_id", "churn_prediction", "churn_probability", "risk_level"]
+        data = [values[field].tolist() for field in LOG_COLUMNS.values()]
+        data += [
+            prediction_ids,
+            np.asarray(OUTPUT_DICTIONARY["churn_prediction"])[churn_codes].tolist(),
+            probs,
+            np.asarray(risk_names)[risk_codes].tolist(),
+        ]
+        rows = [dict(zip(names, row), model_version=artifacts.version) for row in zip(*data)]
+        if self.log_writer is not None:
+            self.log_writer.submit(rows)
+            return result, []
+        return result, rows
+
+    def predict_columns(
+        self,
+        columns: dict[str, np.ndarray],
+        n_rows: int,
+        db: Session = None,
+        model_version: str | ModelArtifacts | None = None,
+    ) -> dict:
+        """Score columns from src.columnar.parse and (optionally) bulk-insert the logs; returns result columns"""
+        result, db_rows = self._predict_columns(columns, n_rows, model_version, db is not None)
+        if db_rows:
+            self._write_logs(db, db_rows)
+        return result
+
+    async def predict_columns_async(
+        self,
+        columns: dict[str, np.ndarray],
+        n_rows: int,
+        db: AsyncSession = None,
+        model_version: str | ModelArtifacts | None = None,
+    ) -> dict:
+        """predict_columns() for async handlers"""
+        result, db_rows = await run_in_threadpool(self._predict_columns, columns, n_rows, model_version, db is not None)
+        if db_rows:
+            await self._write_logs_async(db, db_rows)
+        return result
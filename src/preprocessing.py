@@ -0,0 +1,47 @@
+# cleaning shared by offline scoring and training, mirrors notebooks/01_train_model.ipynb
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CATEGORICAL_COLUMNS = [
+    "gender",
+    "Partner",
+    "Dependents",
+    "PhoneService",
+    "MultipleLines",
+    "InternetService",
+    "OnlineSecurity",
+    "OnlineBackup",
+    "DeviceProtection",
+    "TechSupport",
+    "StreamingTV",
+    "StreamingMovies",
+    "Contract",
+    "PaperlessBilling",
+    "PaymentMethod",
+]
+
+# explicit dtypes so pandas doesn't sniff every chunk; TotalCharges has blanks, so it's read as text
+RAW_DTYPES = {
+    "customerID": "string",
+    "SeniorCitizen": "int8",
+    "tenure": "int16",
+    "MonthlyCharges": "float64",
+    "TotalCharges": "string",
+    "Churn": "string",
+    **{col: "category" for col in CATEGORICAL_COLUMNS},
+}
+
+# median TotalCharges of data/churn.csv, which is what the notebook fills blanks with;
+# a streaming pass can't compute the median of its own input, so we reuse the training one
+TOTAL_CHARGES_FILL = 1397.475
+
+
+def clean_frame(df: "pd.DataFrame", total_charges_fill: float = TOTAL_CHARGES_FILL) -> "pd.DataFrame":
+    """Coerce TotalCharges to float and fill blanks, vectorized over the whole frame"""
+    import pandas as pd
+
+    df = df.copy()
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(total_charges_fill)
+    return df
@@ -1,7 +1,11 @@
+import os
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional, get_args, get_origin
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# upper bound for /predict/batch; bigger jobs should be split client-side
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
 
 
 class CustomerInput(BaseModel):
@@ -29,13 +33,46 @@ class CustomerInput(BaseModel):
     TotalCharges: float = Field(..., ge=0, description="Total charges")
 
 
+def enum_values(field: str) -> tuple | None:
+    """The allowed values of a Literal CustomerInput field, in declaration order; None for numeric fields"""
+    annotation = CustomerInput.model_fields[field].annotation
+    return get_args(annotation) if get_origin(annotation) is Literal else None
+
+
+class FeatureContribution(BaseModel):
+    # one entry of ?explain=true: how far this input pushed the score, signed (positive = towards churn)
+    feature: str = Field(..., description="Model feature")
+    value: str | int | float = Field(..., description="Customer's input for that feature")
+    contribution: float = Field(..., description="Log-odds for linear models, probability for tree models")
+
+
 class PredictionOutput(BaseModel):
     # response body I’ll return from /predict
+    # model_version is a plain field, not pydantic's model_ namespace
+    model_config = ConfigDict(protected_namespaces=())
+
     customer_id: str = Field(..., description="Unique identifier")
     churn_prediction: Literal["Yes", "No"] = Field(..., description="Churn?")
     churn_probability: float = Field(..., ge=0, le=1, description="Probability 0-1")
     risk_level: Literal["Low", "Medium", "High"] = Field(..., description="Risk bucket")
     timestamp: datetime = Field(..., description="Prediction time")
+    model_version: str = Field("1.0", description="Model version that produced the score")
+    explanation: Optional[list[FeatureContribution]] = Field(
+        None, description="Top feature contributions, largest first (only with explain=true)"
+    )
+
+
+class BatchInput(BaseModel):
+    # request body for /predict/batch, scored as one matrix
+    customers: list[CustomerInput] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description=f"1-{MAX_BATCH_SIZE} customers"
+    )
+
+
+class BatchPredictionOutput(BaseModel):
+    # results come back in the same order as the input customers
+    count: int = Field(..., description="Number of scored customers")
+    predictions: list[PredictionOutput]
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,163 @@
+# offline bulk scoring: python -m src.score_file data/churn.csv scores.csv --chunksize 50000 --workers 4
+import argparse
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .predictor import ChurnPredictor
+from .preprocessing import RAW_DTYPES, TOTAL_CHARGES_FILL, clean_frame
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# set in the parent before the pool forks, so workers share the loaded model pages
+_predictor: ChurnPredictor | None = None
+_total_charges_fill = TOTAL_CHARGES_FILL
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Clean + score one chunk; customerID is passed through when present"""
+    cleaned = clean_frame(chunk, _total_charges_fill)
+    scores = _predictor.score_frame(cleaned)
+    if "customerID" in chunk.columns:
+        scores.insert(0, "customerID", chunk["customerID"])
+    return scores
+
+
+class _CsvSink:
+    def __init__(self, path: Path):
+        self.path = path
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+        self._header = False
+
+    def close(self) -> None:
+        if self._header:
+            # empty input still gets a file
+            pd.DataFrame().to_csv(self.path, index=False)
+
+
+class _ParquetSink:
+    def __init__(self, path: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("parquet output needs pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self._writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema, compression="snappy")
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _sink_for(path: Path, fmt: str | None):
+    fmt = fmt or ("parquet" if path.suffix in (".parquet", ".pq") else "csv")
+    return _ParquetSink(path) if fmt == "parquet" else _CsvSink(path)
+
+
+def score_file(
+    input_path: str | Path,
+    output_path: str | Path,
+    chunksize: int = 50000,
+    workers: int = 1,
+    fmt: str | None = None,
+    total_charges_fill: float = TOTAL_CHARGES_FILL,
+) -> dict:
+    """Stream input_path in chunks, score each one and append results to output_path.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays bounded by the chunk size
+    no matter how big the input is. Output rows keep the input order.
+    """
+    global _predictor, _total_charges_fill
+    _predictor = ChurnPredictor()
+    # the predictor loads lazily; load here so forked workers inherit the model instead of each loading it
+    _predictor.load()
+    _total_charges_fill = total_charges_fill
+
+    output_path = Path(output_path)
+    sink = _sink_for(output_path, fmt)
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype=RAW_DTYPES)
+
+    rows = 0
+    start = time.perf_counter()
+
+    def emit(scored: pd.DataFrame) -> None:
+        nonlocal rows
+        sink.write(scored)
+        rows += len(scored)
+        elapsed = time.perf_counter() - start
+        logger.info("scored %d rows (%.0f rows/s)", rows, rows / elapsed if elapsed else 0.0)
+
+    try:
+        if workers <= 1:
+            for chunk in reader:
+                emit(score_chunk(chunk))
+        else:
+            # fork so workers inherit the already-loaded model copy-on-write
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(score_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+        "output": str(output_path),
+    }
+    logger.info("done: %s", summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="score a churn.csv-shaped file in streamed chunks")
+    parser.add_argument("input", help="CSV shaped like data/churn.csv (Churn column optional)")
+    parser.add_argument("output", help="output .csv or .parquet")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows per chunk (default 50000)")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (default 1)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None, help="default: from output suffix")
+    parser.add_argument(
+        "--total-charges-fill",
+        type=float,
+        default=TOTAL_CHARGES_FILL,
+        help=f"value for blank TotalCharges (default: training median {TOTAL_CHARGES_FILL})",
+    )
+    args = parser.parse_args()
+
+    score_file(
+        args.input,
+        args.output,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        fmt=args.format,
+        total_charges_fill=args.total_charges_fill,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# precomputed scoring for linear models (SCORE_TABLE=1): python -m src.score_table check
+#
+# Sixteen of the nineteen CustomerInput fields are small Literal enums. Under a linear model each
+# of them adds a fixed amount to the decision value per category, so per loaded version we keep
+# - per-field tables: field -> {category: weight * code} for every category the encoder knows
+# - a combo index: the 16-tuple of categories -> bias + the sum of its field contributions, seeded
+#   with the most frequent combinations in data/churn.csv and topped up with new ones from
+#   traffic until it holds SCORE_TABLE_INDEX_SIZE entries
+# A row is then one tuple lookup (or 16 small ones on a miss) plus three multiply-adds for
+# tenure / MonthlyCharges / TotalCharges and a sigmoid. These are the engine's products added in
+# the engine's own order (InferenceEngine.sum_order: bias, the enums, then the numerics), with
+# the same sigmoid, so the raw probability is bit for bit the engine's and so is everything
+# ChurnPredictor returns and logs, with the table on or off.
+import argparse
+import math
+import os
+import random
+from operator import attrgetter
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from .preprocessing import RAW_DTYPES, clean_frame
+from .schemas import CustomerInput, enum_values
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "churn.csv"
+INDEX_SIZE = int(os.getenv("SCORE_TABLE_INDEX_SIZE", "16384"))
+
+
+class ScoreTableUnavailable(ValueError):
+    """The model isn't a binary linear model scored natively, so contributions don't add up per field"""
+
+
+def _tuple_getter(fields: list[str]):
+    # attrgetter returns a bare value for a single name; always hand back a tuple
+    if len(fields) == 1:
+        get = attrgetter(fields[0])
+        return lambda customer: (get(customer),)
+    return attrgetter(*fields) if fields else (lambda customer: ())
+
+
+class ScoreTable:
+    """Table-lookup scorer for one loaded linear model version"""
+
+    def __init__(self, artifacts, max_index: int = INDEX_SIZE):
+        inference = artifacts.inference
+        if not inference.native:
+            raise ScoreTableUnavailable(f"no score table for {artifacts.model_type}")
+        self.inference = inference
+        self.max_index = max_index
+        self.bias = inference.bias
+
+        categorical, tables, numeric, numeric_weights = [], [], [], []
+        # in the engine's summation order, so the additions below happen in the same sequence
+        for i in inference.sum_order:
+            name = artifacts.feature_names[i]
+            weight = float(inference.weights[i])
+            if name not in CustomerInput.model_fields:
+                # the encoder feeds 0 for columns it can't fill, which adds nothing
+                continue
+            values = enum_values(name)
+            if values is None:
+                numeric.append(name)
+                numeric_weights.append(weight)
+                continue
+            encoder = artifacts.label_encoders.get(name)
+            codes = {str(v): float(c) for c, v in enumerate(encoder.classes_)} if encoder is not None else None
+            table = {}
+            for value in values:
+                code = float(value) if codes is None else codes.get(str(value))
+                # a category the encoder never saw stays out, so those rows take the engine path
+                if code is not None:
+                    table[value] = weight * code
+            categorical.append(name)
+            tables.append(table)
+
+        self.categorical = categorical
+        self.tables = tables
+        self.numeric = numeric
+        self.numeric_weights = numeric_weights
+        self._key = _tuple_getter(categorical)
+        self._numbers = _tuple_getter(numeric)
+        self._index: dict[tuple, float] = {}
+
+    @classmethod
+    def from_artifacts(cls, artifacts, data_path: Path = DATA_PATH, max_index: int = INDEX_SIZE) -> "ScoreTable":
+        """Build the tables and seed the index with the training data's most frequent combinations"""
+        import pandas as pd
+
+        table = cls(artifacts, max_index)
+        if Path(data_path).exists():
+            df = clean_frame(pd.read_csv(data_path, dtype=RAW_DTYPES))
+            combos = df[table.categorical].astype(object).value_counts()
+            table.seed(combos.index[: max_index // 2])
+        return table
+
+    def seed(self, keys) -> None:
+        # half the capacity at most, the rest is left for combinations seen in traffic
+        for key in keys:
+            self._combo(tuple(key))
+
+    def _combo(self, key: tuple) -> float | None:
+        """bias + field contributions for one category tuple, always summed in field order"""
+        z = self.bias
+        for table, value in zip(self.tables, key):
+            contribution = table.get(value)
+            if contribution is None:
+                return None
+            z += contribution
+        if len(self._index) < self.max_index:
+            self._index[key] = z
+        return z
+
+    def stats(self) -> dict:
+        return {
+            "categorical_fields": len(self.categorical),
+            "table_entries": sum(len(t) for t in self.tables),
+            "numeric_fields": self.numeric,
+            "index_size": len(self._index),
+            "index_capacity": self.max_index,
+        }
+
+    def score(self, customer: CustomerInput) -> float:
+        """P(churn) for a single customer"""
+        key = self._key(customer)
+        z = self._index.get(key)
+        if z is None:
+            z = self._combo(key)
+            if z is None:
+                return self.inference.score(customer)
+        for weight, value in zip(self.numeric_weights, self._numbers(customer)):
+            z += weight * value
+        # same python-float sigmoid as InferenceEngine.score_encoded
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_many(self, customers: Sequence[CustomerInput]) -> np.ndarray:
+        """P(churn) for many customers, in input order"""
+        n = len(customers)
+        z = np.empty(n)
+        unknown = np.zeros(n, dtype=bool)
+        index = self._index
+        for i, key in enumerate(map(self._key, customers)):
+            partial = index.get(key)
+            if partial is None:
+                partial = self._combo(key)
+                if partial is None:
+                    unknown[i] = True
+                    partial = 0.0
+            z[i] = partial
+        numbers = np.array(list(map(self._numbers, customers)), dtype=float).reshape(n, len(self.numeric))
+        # column by column, so each row sees the same sequence of additions as score()
+        for j, weight in enumerate(self.numeric_weights):
+            z += weight * numbers[:, j]
+        from scipy.special import expit
+
+        p = expit(z)
+        redo = np.flatnonzero(unknown)
+        if redo.size:
+            p[redo] = self.inference.score_many([customers[i] for i in redo])
+        return p
+
+
+def _domain_sample(n: int, seed: int = 0) -> list[CustomerInput]:
+    # uniform over every field's Literal values plus plausible numerics, i.e. mostly unseen combinations
+    rng = random.Random(seed)
+    fields = {f: enum_values(f) for f in CustomerInput.model_fields}
+    customers = []
+    for _ in range(n):
+        values = {f: rng.choice(v) for f, v in fields.items() if v is not None}
+        tenure = rng.randint(0, 72)
+        monthly = round(rng.uniform(18, 120), 2)
+        values.update(tenure=tenure, MonthlyCharges=monthly, TotalCharges=round(monthly * max(tenure, 1), 2))
+        customers.append(CustomerInput(**values))
+    return customers
+
+
+def check_parity(predictor, customers: Sequence[CustomerInput], model_version: str | None = None) -> dict:
+    """Compare ChurnPredictor.predict / predict_many with the score table off and on.
+
+    Returns counts of responses whose prediction, risk level or rounded probability differ, and
+    of raw table probabilities that aren't bit-identical to the engine's (all expected: 0).
+    """
+    artifacts = predictor.loader.get(model_version)
+    table = ScoreTable.from_artifacts(artifacts)
+    fields = ("churn_prediction", "churn_probability", "risk_level", "model_version")
+    original = predictor.score_tables
+    try:
+        predictor.score_tables = False
+        single_off = [predictor.predict(c, model_version=model_version) for c in customers]
+        batch_off = predictor.predict_many(customers, model_version=model_version)
+        predictor.score_tables = True
+        single_on = [predictor.predict(c, model_version=model_version) for c in customers]
+        batch_on = predictor.predict_many(customers, model_version=model_version)
+    finally:
+        predictor.score_tables = original
+
+    def mismatches(a, b):
+        return sum(any(getattr(x, f) != getattr(y, f) for f in fields) for x, y in zip(a, b))
+
+    engine = artifacts.inference
+    raw_single = np.array([engine.score(c) for c in customers])
+    raw_batch = engine.score_many(customers)
+    return {
+        "rows": len(customers),
+        "single_mismatches": mismatches(single_off, single_on),
+        "batch_mismatches": mismatches(batch_off, batch_on),
+        "raw_mismatches_single": int(np.sum(np.array([table.score(c) for c in customers]) != raw_single)),
+        "raw_mismatches_batch": int(np.sum(table.score_many(customers) != raw_batch)),
+        # for scale: the engine's own single-row vs batch paths
+        "max_abs_diff_engine_single_vs_batch": float(np.max(np.abs(raw_single - raw_batch))),
+        "index": table.stats(),
+    }
+
+
+def main():
+    import warnings
+
+    from .benchmarks.suite import _customers
+    from .predictor import ChurnPredictor
+
+    parser = argparse.ArgumentParser(description="score table parity check against ChurnPredictor.predict")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--version", default=None)
+    parser.add_argument("--samples", type=int, default=20000, help="random rows over the full input domain")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    customers = _customers(7043) + _domain_sample(args.samples)
+    report = check_parity(ChurnPredictor(), customers, args.version)
+    for name, value in report.items():
+        print(f"{name:<38}{value}")
+    if any(
+        report[k] for k in ("single_mismatches", "batch_mismatches", "raw_mismatches_single", "raw_mismatches_batch")
+    ):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# pre-fork server: python -m src.serve --workers 4
+#
+# `uvicorn --workers N` starts N fresh interpreters that each unpickle the model. Here the
+# app (and with it the model registry) is imported once in the parent, the heap is moved out
+# of the GC's reach with gc.freeze() so collections don't write to every object, and the
+# workers are forked from it. They share those pages copy-on-write and all accept on one
+# listening socket. BLAS/OpenMP pools are capped per worker so N workers don't each start
+# one thread per core. Workers that die are re-forked from the already loaded parent.
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+logger = logging.getLogger("src.serve")
+
+# read once when numpy/scipy/sklearn load their native libraries, so they must be set before any import
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def limit_threads(threads: int) -> None:
+    # explicit settings in the environment win
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, index: int, counts, pids, log_level: str) -> None:
+    import uvicorn
+
+    from . import workers
+    from .database import built_engines
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    workers.attach(counts, pids, index)
+    # never reuse a connection the parent may have opened; each worker builds its own pool
+    for engine in built_engines():
+        engine.dispose(close=False)
+    # uvicorn installs its own SIGTERM/SIGINT handlers and drains in-flight requests
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+
+def serve(workers: int, host: str = "0.0.0.0", port: int = 8000, threads: int = 1, log_level: str = "info") -> None:
+    limit_threads(threads)
+    # /admin/.../activate only reaches the worker that answers it; the others follow models/ACTIVE
+    os.environ.setdefault("MODEL_WATCH_INTERVAL", "2")
+    sock = _bind(host, port)
+
+    # the expensive part, done once: model artifacts, encoder tables, inference engine
+    import uvicorn  # noqa: F401  (imported here so workers share it too)
+
+    from .api import MODEL_WARMUP, app, predictor
+
+    # the lifespan hook would load in every worker; load (and warm up) here so they share the pages
+    predictor.load(warm_up=MODEL_WARMUP)
+
+    counts = multiprocessing.Array("q", workers, lock=False)
+    pids = multiprocessing.Array("i", workers, lock=False)
+    gc.collect()
+    gc.freeze()
+
+    children: dict[int, tuple[int, float]] = {}
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, index, counts, pids, log_level)
+            except BaseException:
+                logger.exception("worker %d crashed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("serving on %s:%d with %d workers (%d BLAS thread(s) each)", host, port, workers, threads)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index, started = children.pop(pid, (None, 0.0))
+        if index is None or stopping:
+            continue
+        logger.warning(
+            "worker %d (pid %d) exited with code %d, restarting", index, pid, os.waitstatus_to_exitcode(status)
+        )
+        # don't spin if a worker dies straight away
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        spawn(index)
+    sock.close()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="pre-fork server sharing one loaded model between workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", str(cpus))))
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", os.getenv("API_PORT", "8000"))))
+    parser.add_argument(
+        "--threads", type=int, default=None, help="BLAS/OpenMP threads per worker (default: cores / workers, min 1)"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    threads = args.threads or int(os.getenv("SERVE_THREADS_PER_WORKER", "0")) or max(1, cpus // args.workers)
+    logging.basicConfig(level=logging.INFO)
+    serve(args.workers, args.host, args.port, threads, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
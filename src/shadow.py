@@ -0,0 +1,289 @@
+# shadow scoring and A/B traffic split for candidate model versions
+#
+# shadow: the primary version answers the request; listed shadow versions score the same
+# customers on a small thread pool afterwards and their results go to shadow_prediction_logs
+# in bulk. The pool has a fixed number of workers and a bounded backlog; when the backlog is
+# full the shadow job is skipped (counted), so shadow work never makes a request wait.
+#
+# traffic split: a percentage of requests that don't ask for a version is served by the
+# candidate instead of the active model. PredictionOutput.model_version says which one answered.
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Mapping
+
+from sqlalchemy import insert
+
+from . import metrics
+from .database import SessionLocal, ShadowPredictionLog
+from .model_loader import ModelLoader, UnknownModelVersion
+from .schemas import CustomerInput
+
+logger = logging.getLogger(__name__)
+
+
+def _versions_from_env(name: str) -> list[str]:
+    return [v.strip() for v in os.getenv(name, "").split(",") if v.strip()]
+
+
+class TrafficSplit:
+    """Route ``percent`` % of unpinned requests to ``candidate_version``"""
+
+    def __init__(self, candidate_version: str, percent: float, rng: random.Random | None = None):
+        if not 0 <= percent <= 100:
+            raise ValueError(f"percent must be between 0 and 100, got {percent}")
+        self.candidate_version = candidate_version
+        self.percent = percent
+        self._rng = rng or random.Random()
+
+    @classmethod
+    def from_env(cls) -> "TrafficSplit | None":
+        # AB_CANDIDATE_VERSION=2.0 AB_TRAFFIC_PERCENT=10
+        candidate = os.getenv("AB_CANDIDATE_VERSION")
+        percent = float(os.getenv("AB_TRAFFIC_PERCENT", "0"))
+        return cls(candidate, percent) if candidate and percent > 0 else None
+
+    def choose(self) -> str | None:
+        """Candidate version for this request, or None for the active model"""
+        return self.candidate_version if self._rng.random() * 100 < self.percent else None
+
+
+class ShadowScorer:
+    """Score requests with shadow versions on a bounded pool and bulk-log the results.
+
+    ``max_workers`` threads run shadow jobs; at most ``max_pending`` jobs may be queued or
+    running. ``sample_percent`` shadows only part of the traffic. Rows are written once
+    ``log_batch_size`` have accumulated or ``flush_interval`` seconds have passed (a timer
+    covers the case where no further job arrives), and on stop().
+    """
+
+    def __init__(
+        self,
+        versions: list[str],
+        loader: ModelLoader | None = None,
+        session_factory=SessionLocal,
+        max_workers: int = 2,
+        max_pending: int = 100,
+        sample_percent: float = 100.0,
+        log_batch_size: int = 200,
+        flush_interval: float = 5.0,
+    ):
+        self.versions = list(versions)
+        # None: the process-wide ModelLoader, looked up on first use so from_env() at import loads nothing
+        self._loader = loader
+        self.session_factory = session_factory
+        self.sample_percent = sample_percent
+        self.log_batch_size = log_batch_size
+        self.flush_interval = flush_interval
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._max_pending = max_pending
+        self._rng = random.Random()
+
+        self._buffer: list[dict] = []
+        self._buffer_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer: threading.Timer | None = None
+
+        self._stats_lock = threading.Lock()
+        self._counters = {"submitted": 0, "skipped_busy": 0, "errors": 0, "logged": 0, "log_failures": 0}
+        self._per_version = {
+            v: {"rows": 0, "agree": 0, "abs_diff_sum": 0.0, "latency_ms_sum": 0.0, "latency_ms_max": 0.0, "jobs": 0}
+            for v in self.versions
+        }
+
+    @property
+    def loader(self) -> ModelLoader:
+        if self._loader is None:
+            self._loader = ModelLoader()
+        return self._loader
+
+    @loader.setter
+    def loader(self, loader: ModelLoader) -> None:
+        self._loader = loader
+
+    @classmethod
+    def from_env(cls) -> "ShadowScorer | None":
+        # SHADOW_MODEL_VERSIONS=2.0,3.0 turns shadow scoring on
+        versions = _versions_from_env("SHADOW_MODEL_VERSIONS")
+        if not versions:
+            return None
+        return cls(
+            versions,
+            max_workers=int(os.getenv("SHADOW_MAX_WORKERS", "2")),
+            max_pending=int(os.getenv("SHADOW_MAX_PENDING", "100")),
+            sample_percent=float(os.getenv("SHADOW_SAMPLE_PERCENT", "100")),
+            log_batch_size=int(os.getenv("SHADOW_LOG_BATCH_SIZE", "200")),
+            flush_interval=float(os.getenv("SHADOW_FLUSH_INTERVAL", "5.0")),
+        )
+
+    # request side
+
+    def submit(
+        self,
+        primary_version: str,
+        customers: list[CustomerInput],
+        prediction_ids: list[str],
+        primary_probs: list[float],
+    ) -> bool:
+        """Queue a shadow job for one request; returns False if it was sampled out or skipped"""
+        versions = [v for v in self.versions if v != primary_version]
+        if not versions or self._rng.random() * 100 >= self.sample_percent:
+            return False
+        # never wait for a slot: a busy pool means this request simply isn't shadowed
+        if not self._slots.acquire(blocking=False):
+            self._count("skipped_busy")
+            return False
+        self._count("submitted")
+        try:
+            future = self._pool.submit(self._run, versions, primary_version, customers, prediction_ids, primary_probs)
+        except RuntimeError:
+            # pool already shut down
+            self._slots.release()
+            return False
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+    # worker side
+
+    def _run(self, versions, primary_version, customers, prediction_ids, primary_probs) -> None:
+        rows = []
+        for version in versions:
+            try:
+                artifacts = self.loader.get(version)
+                start = time.perf_counter()
+                inference = artifacts.inference
+                if isinstance(customers, Mapping):
+                    # decoded columns from /predict/columnar
+                    X = inference.encoder.encode_columns(
+                        customers, len(prediction_ids), scaled=inference.expects_scaled
+                    )
+                else:
+                    X = inference.encoder.encode_many(customers, scaled=inference.expects_scaled)
+                shadow_probs = inference.churn_proba(X).tolist()
+                elapsed = time.perf_counter() - start
+            except UnknownModelVersion:
+                logger.error(f"shadow model version {version} not found")
+                self._count("errors")
+                continue
+            except Exception:
+                logger.exception(f"shadow scoring with {version} failed")
+                self._count("errors")
+                continue
+
+            metrics.SHADOW_SECONDS.labels(version=version).observe(elapsed)
+            latency_ms = elapsed * 1000
+            agree = 0
+            abs_diff = 0.0
+            for prediction_id, primary_prob, shadow_prob in zip(prediction_ids, primary_probs, shadow_probs):
+                same = (primary_prob > 0.5) == (shadow_prob > 0.5)
+                agree += same
+                abs_diff += abs(shadow_prob - primary_prob)
+                rows.append(
+                    {
+                        "prediction_id": prediction_id,
+                        "primary_version": primary_version,
+                        "shadow_version": version,
+                        "primary_probability": primary_prob,
+                        "shadow_probability": shadow_prob,
+                        "shadow_prediction": "Yes" if shadow_prob > 0.5 else "No",
+                        "agrees": int(same),
+                        "latency_ms": latency_ms,
+                    }
+                )
+            with self._stats_lock:
+                stats = self._per_version[version]
+                stats["jobs"] += 1
+                stats["rows"] += len(shadow_probs)
+                stats["agree"] += agree
+                stats["abs_diff_sum"] += abs_diff
+                stats["latency_ms_sum"] += latency_ms
+                stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+        if rows:
+            self._buffer_rows(rows)
+
+    def _buffer_rows(self, rows: list[dict]) -> None:
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row["created_at"] = now
+        with self._buffer_lock:
+            self._buffer.extend(rows)
+            waited = time.monotonic() - self._last_flush
+            if len(self._buffer) < self.log_batch_size and waited < self.flush_interval:
+                if self._timer is None:
+                    # low or stopped traffic: no later job may come along to flush these
+                    self._timer = threading.Timer(self.flush_interval - waited, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            batch = self._take_buffer()
+        self._write(batch)
+
+    def _take_buffer(self) -> list[dict]:
+        # caller holds _buffer_lock
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _write(self, rows: list[dict]) -> None:
+        if not rows or self.session_factory is None:
+            return
+        db = self.session_factory()
+        try:
+            db.execute(insert(ShadowPredictionLog), rows)
+            db.commit()
+            self._count("logged", len(rows))
+        except Exception as e:
+            logger.error(f"shadow log write of {len(rows)} rows failed: {e}")
+            db.rollback()
+            self._count("log_failures", len(rows))
+        finally:
+            db.close()
+
+    def flush(self) -> None:
+        with self._buffer_lock:
+            batch = self._take_buffer()
+        self._write(batch)
+
+    def stop(self) -> None:
+        """Finish queued shadow jobs and write what's buffered (FastAPI shutdown)"""
+        self._pool.shutdown(wait=True)
+        self.flush()
+
+    # stats
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += n
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            versions = {}
+            for version, s in self._per_version.items():
+                rows, jobs = s["rows"], s["jobs"]
+                versions[version] = {
+                    "rows": rows,
+                    "agreement_rate": round(s["agree"] / rows, 4) if rows else None,
+                    "mean_abs_probability_diff": round(s["abs_diff_sum"] / rows, 4) if rows else None,
+                    "latency_ms_avg": round(s["latency_ms_sum"] / jobs, 3) if jobs else 0.0,
+                    "latency_ms_max": round(s["latency_ms_max"], 3),
+                }
+            with self._buffer_lock:
+                buffered = len(self._buffer)
+            return {
+                "shadow_versions": self.versions,
+                "sample_percent": self.sample_percent,
+                "max_pending": self._max_pending,
+                **self._counters,
+                "buffered_rows": buffered,
+                "versions": versions,
+            }
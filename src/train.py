@@ -0,0 +1,349 @@
+# reproducible training: python -m src.train --version 2.0 --workers 4 --activate
+#
+# replaces notebooks/01_train_model.ipynb: same cleaning, split and artifact layout, but the
+# encoding is vectorized (category codes instead of a LabelEncoder.fit_transform per column),
+# the hyperparameter search runs candidates in a process pool, and the test-set metrics are
+# written next to the artifacts and into model_metrics.
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from .bundle import export_bundle, remove_bundle
+from .drift import write_reference
+from .model_loader import MODEL_DIR, ModelArtifacts, version_dir, write_active_version
+from .preprocessing import CATEGORICAL_COLUMNS, RAW_DTYPES
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "churn.csv"
+METRICS_FILE = "metrics.json"
+# same split as the notebook, so numbers stay comparable with the shipped model
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# name -> (estimator class, fixed params, search grid)
+CANDIDATES = {
+    "logistic_regression": (
+        LogisticRegression,
+        {"max_iter": 1000, "random_state": RANDOM_STATE},
+        {"C": [0.1, 0.3, 1.0, 3.0, 10.0]},
+    ),
+    "random_forest": (
+        RandomForestClassifier,
+        {"random_state": RANDOM_STATE},
+        {"n_estimators": [100, 300], "max_depth": [8, 10, 12], "min_samples_leaf": [1, 5]},
+    ),
+}
+
+
+class StageTimer:
+    """Wall time per named stage, logged as each one finishes"""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = round(time.perf_counter() - start, 3)
+            logger.info("stage %-10s %.3fs", name, self.seconds[name])
+
+
+# data
+
+
+def load_dataset(path: str | Path = DATA_PATH) -> tuple[pd.DataFrame, np.ndarray]:
+    """churn.csv -> (features in file column order, 0/1 target), cleaned the notebook's way"""
+    df = pd.read_csv(path, dtype=RAW_DTYPES)
+    # blanks in TotalCharges -> this dataset's median, like the notebook
+    total = pd.to_numeric(df["TotalCharges"], errors="coerce")
+    df["TotalCharges"] = total.fillna(total.median())
+    y = (df["Churn"] == "Yes").to_numpy(dtype=np.int8)
+    return df.drop(columns=["customerID", "Churn"]), y
+
+
+def encode_features(df: pd.DataFrame) -> tuple[np.ndarray, dict[str, LabelEncoder]]:
+    """Label-encode every categorical column from its category codes.
+
+    Categories are sorted first, so codes and ``classes_`` match what LabelEncoder.fit_transform
+    would produce, and the saved encoders stay drop-in compatible with the serving path.
+    """
+    X = np.empty((len(df), df.shape[1]))
+    label_encoders = {}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            values = values.cat.remove_unused_categories()
+            values = values.cat.reorder_categories(sorted(values.cat.categories))
+            encoder = LabelEncoder()
+            encoder.classes_ = np.asarray(values.cat.categories, dtype=object)
+            label_encoders[col] = encoder
+            X[:, i] = values.cat.codes.to_numpy()
+        else:
+            X[:, i] = values.to_numpy(dtype=np.float64)
+    return X, label_encoders
+
+
+# search (runs in worker processes)
+
+_X = None
+_y = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    # training data is shipped once per worker instead of once per task
+    global _X, _y
+    _X, _y = X, y
+
+
+def _cv_score(task: tuple) -> tuple:
+    name, params, scoring, folds = task
+    cls, fixed, _ = CANDIDATES[name]
+    estimator = cls(**fixed, **params)
+    if "n_jobs" in estimator.get_params():
+        # the process pool is the parallelism here; don't oversubscribe inside each task
+        estimator.set_params(n_jobs=1)
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    scores = cross_val_score(estimator, _X, _y, scoring=scoring, cv=cv)
+    return name, params, float(scores.mean())
+
+
+def search(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: list[str],
+    scoring: str = "f1",
+    folds: int = 5,
+    workers: int = 1,
+) -> dict[str, tuple[dict, float]]:
+    """Cross-validated grid search over every candidate; returns name -> (best params, best score)"""
+    tasks = []
+    for name in candidates:
+        grid = CANDIDATES[name][2]
+        for combo in itertools.product(*grid.values()):
+            tasks.append((name, dict(zip(grid, combo)), scoring, folds))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+            results = list(pool.map(_cv_score, tasks))
+    else:
+        _init_worker(X, y)
+        results = [_cv_score(task) for task in tasks]
+
+    best = {}
+    for name, params, score in results:
+        logger.info("cv %s %s %s=%.4f", name, params, scoring, score)
+        if name not in best or score > best[name][1]:
+            best[name] = (params, score)
+    return best
+
+
+# evaluation
+
+
+def evaluate(model, X_test: np.ndarray, y_test: np.ndarray) -> dict:
+    proba = model.predict_proba(X_test)[:, 1]
+    pred = (proba > 0.5).astype(int)
+    return {
+        "accuracy": round(float(accuracy_score(y_test, pred)), 4),
+        "precision": round(float(precision_score(y_test, pred, zero_division=0)), 4),
+        "recall": round(float(recall_score(y_test, pred)), 4),
+        "f1_score": round(float(f1_score(y_test, pred)), 4),
+        "roc_auc": round(float(roc_auc_score(y_test, proba)), 4),
+    }
+
+
+def split(X: np.ndarray, y: np.ndarray):
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y)
+
+
+def evaluate_artifacts(artifacts, data_path: str | Path = DATA_PATH) -> dict:
+    """Test-set metrics of already saved artifacts (e.g. the shipped model) on the training split"""
+    df, y = load_dataset(data_path)
+    X, _ = encode_features(df[artifacts.feature_names])
+    _, X_test, _, y_test = split(X, y)
+    # mean_/scale_ directly, like the serving encoder (the notebook's scaler was fitted on a DataFrame)
+    X_test = (X_test - artifacts.scaler.mean_) / artifacts.scaler.scale_
+    return {**evaluate(artifacts.model, X_test, y_test), "dataset_size": len(y)}
+
+
+# artifacts
+
+
+def save_artifacts(out_dir: Path, model, scaler, feature_names: list[str], label_encoders: dict, report: dict) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # a bundle from an earlier run of this version would otherwise be served (MODEL_FORMAT=auto) over the new pickles
+    remove_bundle(out_dir)
+    joblib.dump(model, out_dir / "model.pkl")
+    joblib.dump(scaler, out_dir / "scaler.pkl")
+    joblib.dump(feature_names, out_dir / "feature_names.pkl")
+    joblib.dump(label_encoders, out_dir / "label_encoders.pkl")
+    (out_dir / METRICS_FILE).write_text(json.dumps(report, indent=2))
+
+
+def read_metrics_file(path: Path) -> dict | None:
+    """metrics.json written by save_artifacts, if the version was trained by this module"""
+    metrics_path = Path(path) / METRICS_FILE
+    return json.loads(metrics_path.read_text()) if metrics_path.exists() else None
+
+
+def version_metrics(version: str, base_path: Path = MODEL_DIR, data_path: str | Path = DATA_PATH) -> dict | None:
+    """Test-set metrics for a saved version: its metrics.json, or re-evaluated when it predates src.train"""
+    path = version_dir(version, base_path)
+    report = read_metrics_file(path)
+    if report:
+        return {**report["metrics"], "dataset_size": report["dataset_size"], "notes": report.get("notes", "")}
+    if not Path(data_path).exists():
+        return None
+    artifacts = ModelArtifacts(version, path)
+    return {**evaluate_artifacts(artifacts, data_path), "notes": f"{artifacts.model_type} (evaluated by src.train)"}
+
+
+def record_metrics(version: str, metrics: dict, dataset_size: int, notes: str) -> None:
+    """Insert (or replace) the model_metrics row for a version"""
+    from .database import ModelMetrics, SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(ModelMetrics).filter_by(model_version=version).delete()
+        db.add(
+            ModelMetrics(
+                model_version=version,
+                accuracy=metrics["accuracy"],
+                precision=metrics["precision"],
+                recall=metrics["recall"],
+                f1_score=metrics["f1_score"],
+                trained_at=datetime.now(timezone.utc),
+                dataset_size=dataset_size,
+                notes=notes,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def train(
+    data_path: str | Path = DATA_PATH,
+    version: str | None = None,
+    model_dir: Path = MODEL_DIR,
+    candidates: list[str] | None = None,
+    scoring: str = "f1",
+    folds: int = 5,
+    workers: int = 1,
+    n_jobs: int = -1,
+    record: bool = True,
+) -> dict:
+    """Load, encode, search, refit the best candidate and write models/<version>/; returns the report"""
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    candidates = candidates or list(CANDIDATES)
+    timer = StageTimer()
+
+    with timer.stage("load"):
+        df, y = load_dataset(data_path)
+    with timer.stage("encode"):
+        X, label_encoders = encode_features(df)
+        feature_names = df.columns.tolist()
+    with timer.stage("split"):
+        X_train, X_test, y_train, y_test = split(X, y)
+        scaler = StandardScaler().fit(X_train)
+        X_train_s = scaler.transform(X_train)
+        X_test_s = scaler.transform(X_test)
+    with timer.stage("search"):
+        best = search(X_train_s, y_train, candidates, scoring=scoring, folds=folds, workers=workers)
+    with timer.stage("fit"):
+        name = max(best, key=lambda n: best[n][1])
+        params = best[name][0]
+        cls, fixed, _ = CANDIDATES[name]
+        model = cls(**fixed, **params)
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=n_jobs)
+        model.fit(X_train_s, y_train)
+    with timer.stage("evaluate"):
+        metrics = evaluate(model, X_test_s, y_test)
+    logger.info("best %s %s -> %s", name, params, metrics)
+
+    report = {
+        "model_version": version,
+        "model_type": type(model).__name__,
+        "candidate": name,
+        "params": params,
+        "scoring": scoring,
+        "cv": {n: {"params": p, scoring: round(s, 4)} for n, (p, s) in best.items()},
+        "metrics": metrics,
+        "dataset_size": len(y),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "notes": f"{type(model).__name__} {params} (src.train)",
+    }
+    out_dir = Path(model_dir) / version
+    with timer.stage("save"):
+        report["timings_s"] = timer.seconds
+        save_artifacts(out_dir, model, scaler, feature_names, label_encoders, report)
+    with timer.stage("drift"):
+        # reference histograms for src.drift, scored by the saved artifacts exactly as served
+        write_reference(ModelArtifacts(version, out_dir, fmt="pickle"), data_path)
+    if record:
+        with timer.stage("record"):
+            record_metrics(version, metrics, len(y), notes=report["notes"])
+    report["timings_s"] = timer.seconds
+    (out_dir / METRICS_FILE).write_text(json.dumps(report, indent=2))
+    logger.info("wrote %s", out_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="train churn model candidates and write versioned artifacts")
+    parser.add_argument("--data", default=str(DATA_PATH), help="churn.csv-shaped training file")
+    parser.add_argument("--version", default=None, help="artifact version (default: UTC timestamp)")
+    parser.add_argument("--model-dir", default=str(MODEL_DIR))
+    parser.add_argument("--candidates", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--scoring", default="f1", help="sklearn scorer for the search (default f1)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="search processes")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="threads for the final fit (tree models)")
+    parser.add_argument("--no-db", action="store_true", help="don't insert into model_metrics")
+    parser.add_argument("--activate", action="store_true", help="write models/ACTIVE to serve this version")
+    parser.add_argument("--bundle", action="store_true", help="also export the mmap bundle (src.bundle)")
+    args = parser.parse_args()
+
+    report = train(
+        args.data,
+        version=args.version,
+        model_dir=Path(args.model_dir),
+        candidates=args.candidates,
+        scoring=args.scoring,
+        folds=args.folds,
+        workers=args.workers,
+        n_jobs=args.n_jobs,
+        record=not args.no_db,
+    )
+    version = report["model_version"]
+    if args.bundle:
+        export_bundle(ModelArtifacts(version, Path(args.model_dir) / version, fmt="pickle"))
+    if args.activate:
+        write_active_version(version, Path(args.model_dir))
+    print(json.dumps({k: report[k] for k in ("model_version", "model_type", "metrics", "timings_s")}, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,46 @@
+# per-worker request counts, shared between the processes forked by src.serve
+#
+# src.serve allocates one slot per worker in shared memory before forking; each worker only
+# ever writes its own slot, so no lock is needed. Under plain uvicorn there is one local slot.
+import os
+
+_counts = None
+_pids = None
+_index = 0
+_local = [0]
+
+
+def attach(counts, pids, index: int) -> None:
+    """Called in a freshly forked worker: count into slot ``index`` of the shared arrays"""
+    global _counts, _pids, _index
+    _counts, _pids, _index = counts, pids, index
+    pids[index] = os.getpid()
+    counts[index] = 0
+
+
+def stats() -> dict:
+    """Request counts of every worker, plus which one is answering"""
+    if _counts is None:
+        return {"mode": "single", "worker": 0, "workers": [{"index": 0, "pid": os.getpid(), "requests": _local[0]}]}
+    return {
+        "mode": "prefork",
+        "worker": _index,
+        "workers": [
+            {"index": i, "pid": pid, "requests": count} for i, (pid, count) in enumerate(zip(_pids[:], _counts[:]))
+        ],
+    }
+
+
+class RequestCounter:
+    """Pure ASGI middleware counting HTTP requests into this worker's slot"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            if _counts is None:
+                _local[0] += 1
+            else:
+                _counts[_index] += 1
+        await self.app(scope, receive, send)
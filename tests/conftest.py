@@ -0,0 +1,119 @@
+# tests/conftest.py
+import shutil
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model_loader import ModelArtifacts
+from src.schemas import CustomerInput
+
+MODELS = Path(__file__).parent.parent / "models"
+ARTIFACTS = ("model.pkl", "scaler.pkl", "feature_names.pkl", "label_encoders.pkl")
+
+
+@pytest.fixture(scope="session")
+def sample_customers():
+    """n -> the first n customers of data/churn.csv as CustomerInputs"""
+    df = pd.read_csv(Path(__file__).parent.parent / "data" / "churn.csv")
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0.0)
+    records = df[list(CustomerInput.model_fields)].to_dict(orient="records")
+
+    def sample(n=200):
+        return [CustomerInput(**row) for row in records[:n]]
+
+    return sample
+
+
+@pytest.fixture
+def payload():
+    """one valid /predict body"""
+    return {
+        "gender": "Male",
+        "SeniorCitizen": 0,
+        "Partner": "Yes",
+        "Dependents": "No",
+        "tenure": 24,
+        "PhoneService": "Yes",
+        "MultipleLines": "No",
+        "InternetService": "Fiber optic",
+        "OnlineSecurity": "No",
+        "OnlineBackup": "Yes",
+        "DeviceProtection": "No",
+        "TechSupport": "No",
+        "StreamingTV": "Yes",
+        "StreamingMovies": "No",
+        "Contract": "Month-to-month",
+        "PaperlessBilling": "Yes",
+        "PaymentMethod": "Electronic check",
+        "MonthlyCharges": 70.5,
+        "TotalCharges": 1692.0,
+    }
+
+
+@pytest.fixture(scope="session")
+def models_path():
+    """the checked-in models/ directory (flat legacy artifacts = version "1.0")"""
+    return MODELS
+
+
+@pytest.fixture(scope="session")
+def active_artifacts():
+    """the checked-in model, loaded from pickles"""
+    return ModelArtifacts("1.0", MODELS, fmt="pickle")
+
+
+@pytest.fixture(scope="session")
+def copy_artifacts():
+    """dest -> dest with copies of the four checked-in artifact files"""
+
+    def copy(dest: Path) -> Path:
+        dest.mkdir(parents=True, exist_ok=True)
+        for name in ARTIFACTS:
+            shutil.copy(MODELS / name, dest / name)
+        return dest
+
+    return copy
+
+
+@pytest.fixture
+def models_dir(tmp_path, copy_artifacts):
+    """versions -> a models dir with the flat artifacts (= "1.0") plus copies with a shifted intercept"""
+
+    def build(versions=("2.0", "3.0")) -> Path:
+        copy_artifacts(tmp_path)
+        for i, version in enumerate(versions, start=1):
+            copy_artifacts(tmp_path / version)
+            model = joblib.load(MODELS / "model.pkl")
+            model.intercept_ = model.intercept_ + i
+            joblib.dump(model, tmp_path / version / "model.pkl")
+        return tmp_path
+
+    return build
+
+
+@pytest.fixture
+def artifacts_with(tmp_path, copy_artifacts):
+    """model -> ModelArtifacts for the checked-in preprocessing with `model` swapped in (None keeps the original)"""
+
+    def build(model=None) -> ModelArtifacts:
+        copy_artifacts(tmp_path)
+        if model is not None:
+            joblib.dump(model, tmp_path / "model.pkl")
+        return ModelArtifacts("1.0", tmp_path, fmt="pickle")
+
+    return build
+
+
+@pytest.fixture
+def fit_model(sample_customers):
+    """(estimator class, artifacts, **params) -> the estimator fit on a synthetic target driven by tenure"""
+
+    def fit(cls, artifacts, **params):
+        X = artifacts.encoder.encode_many(sample_customers(1000))
+        y = (X[:, 4] + np.random.RandomState(0).randn(len(X)) < 0).astype(int)
+        return cls(random_state=0, **params).fit(X, y)
+
+    return fit
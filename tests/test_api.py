@@ -1,7 +1,14 @@
 # tests/test_api.py
+import asyncio
+import os
+
+import httpx
 from fastapi.testclient import TestClient
 
+from src import api
 from src.api import app
+from src.model_loader import ModelLoader
+from src.schemas import CustomerInput
 
 client = TestClient(app)
 
@@ -21,28 +28,7 @@ def test_health():
     assert isinstance(data["model_loaded"], bool)
 
 
-def test_predict_ok():
-    payload = {
-        "gender": "Male",
-        "SeniorCitizen": 0,
-        "Partner": "Yes",
-        "Dependents": "No",
-        "tenure": 24,
-        "PhoneService": "Yes",
-        "MultipleLines": "No",
-        "InternetService": "Fiber optic",
-        "OnlineSecurity": "No",
-        "OnlineBackup": "Yes",
-        "DeviceProtection": "No",
-        "TechSupport": "No",
-        "StreamingTV": "Yes",
-        "StreamingMovies": "No",
-        "Contract": "Month-to-month",
-        "PaperlessBilling": "Yes",
-        "PaymentMethod": "Electronic check",
-        "MonthlyCharges": 70.5,
-        "TotalCharges": 1692.0,
-    }
+def test_predict_ok(payload):
     r = client.post("/predict", json=payload)
     assert r.status_code == 200
     data = r.json()
@@ -66,3 +52,194 @@ def test_validation_error():
     bad = {"gender": "Male", "tenure": "oops"}
     r = client.post("/predict", json=bad)
     assert r.status_code == 422
+
+
+def test_predict_batch_keeps_order(payload):
+    low_risk = dict(payload, tenure=72, Contract="Two year", MonthlyCharges=20.0, TotalCharges=1440.0)
+    r = client.post("/predict/batch", json={"customers": [payload, low_risk, payload]})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3
+    probs = [p["churn_probability"] for p in data["predictions"]]
+    assert probs[0] == probs[2]
+    assert probs[1] < probs[0]
+
+    # batch scores match the single-row endpoint
+    single = client.post("/predict", json=payload).json()
+    assert single["churn_probability"] == probs[0]
+    assert len({p["customer_id"] for p in data["predictions"]}) == 3
+
+
+def test_predict_batch_rejects_empty():
+    r = client.post("/predict/batch", json={"customers": []})
+    assert r.status_code == 422
+
+
+def test_stats_counts_new_predictions(payload):
+    before = client.get("/stats").json()["total_predictions"]
+    client.post("/predict", json=payload)
+    after = client.get("/stats").json()
+    assert after["total_predictions"] == before + 1
+    assert set(after["risk_distribution"]) == {"high", "medium", "low"}
+
+    r = client.get("/stats/timeseries", params={"granularity": "day"})
+    assert r.status_code == 200
+    assert r.json()["buckets"][0]["total_predictions"] >= 1
+
+
+def test_history_keyset_pages_do_not_overlap(payload):
+    client.post("/predict/batch", json={"customers": [payload] * 5})
+
+    first = client.get("/history", params={"limit": 3}).json()
+    assert first["total_returned"] == 3
+    assert first["next_cursor"]
+
+    second = client.get("/history", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    first_ids = {p["prediction_id"] for p in first["predictions"]}
+    second_ids = {p["prediction_id"] for p in second["predictions"]}
+    assert second["total_returned"] >= 1
+    assert not first_ids & second_ids
+
+
+def test_history_filters_and_bad_cursor():
+    r = client.get("/history", params={"risk_level": "High", "contract": "Month-to-month", "limit": 50})
+    assert r.status_code == 200
+    for p in r.json()["predictions"]:
+        assert p["risk_level"] == "High"
+        assert p["contract"] == "Month-to-month"
+
+    assert client.get("/history", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_cache_stats_endpoint():
+    r = client.get("/cache-stats")
+    assert r.status_code == 200
+    assert "enabled" in r.json()
+
+
+def test_metrics_endpoint_exposes_stage_histograms(payload):
+    client.post("/predict", json=payload)
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'churn_stage_duration_seconds_count{stage="validation"}' in body
+    assert 'churn_stage_duration_seconds_count{stage="inference"}' in body
+    assert 'churn_http_request_duration_seconds_count{handler="predict_churn",method="POST",status="200"}' in body
+    assert "churn_predictions_total" in body
+
+
+def test_predict_with_model_version(payload):
+    r = client.post("/predict?model_version=1.0", json=payload)
+    assert r.status_code == 200
+    assert r.json()["model_version"] == "1.0"
+
+    assert client.post("/predict?model_version=does-not-exist", json=payload).status_code == 404
+    assert client.get("/model-info?model_version=does-not-exist").status_code == 404
+
+
+def test_admin_models(models_dir, monkeypatch):
+    # activate writes models/ACTIVE, so serve from a copy rather than the checked-in models
+    registry = ModelLoader.from_dir(models_dir())
+    monkeypatch.setattr(api.predictor, "loader", registry)
+    # no token configured: the admin endpoints stay closed
+    assert client.get("/admin/models").status_code == 403
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/models", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    admin = {"X-Admin-Token": "s3cret"}
+    data = client.get("/admin/models", headers=admin).json()
+    assert data["active_version"] == "1.0"
+    assert "1.0" in data["available_versions"]
+    assert client.post("/admin/models/1.0/load", headers=admin).status_code == 200
+    assert client.post("/admin/models/2.0/activate", headers=admin).json()["active_version"] == "2.0"
+    assert (registry.base_path / "ACTIVE").read_text() == "2.0\n"
+    assert client.post("/admin/models/does-not-exist/activate", headers=admin).status_code == 404
+
+
+def test_model_version_param_only_reaches_served_versions(payload, models_dir, monkeypatch):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    monkeypatch.setattr(api.predictor, "loader", registry)
+    for bad in ("../../tmp/x", "/etc", "..", "2.0/../1.0"):
+        r = client.post("/predict", params={"model_version": bad}, json=payload)
+        assert r.status_code == 404 and "invalid model version" in r.json()["detail"]
+    # on disk but not resident: a request can't trigger the load
+    assert client.get("/model-info", params={"model_version": "2.0"}).status_code == 404
+    assert registry.status()["resident_versions"] == ["1.0"]
+    monkeypatch.setattr(registry, "request_versions", {"2.0"})
+    assert client.post("/predict?model_version=2.0", json=payload).json()["model_version"] == "2.0"
+
+
+def test_resolved_version_scores_even_if_evicted_meanwhile(payload, models_dir, monkeypatch):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    monkeypatch.setattr(api.predictor, "loader", registry)
+    registry.get("2.0")  # resident, as if loaded through /admin
+    resolved = asyncio.run(api.requested_artifacts("2.0"))
+    # unloaded between the dependency and scoring: the request keeps its artifacts, nothing reloads
+    registry._resident.pop("2.0")
+    output = api.predictor.predict(CustomerInput(**payload), model_version=resolved)
+    assert output.model_version == "2.0"
+    assert registry.status()["resident_versions"] == ["1.0"]
+
+
+def test_concurrent_async_predictions(payload):
+    async def fire():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.post("/predict", json=payload) for _ in range(20)))
+
+    responses = asyncio.run(fire())
+    assert all(r.status_code == 200 for r in responses)
+    ids = {r.json()["customer_id"] for r in responses}
+    history = client.get("/history?limit=100").json()["predictions"]
+    assert ids <= {p["prediction_id"] for p in history}
+
+
+def test_liveness_and_readiness():
+    assert client.get("/health/live").json() == {"status": "alive"}
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ready"
+
+
+def test_db_pool_stats(payload):
+    client.post("/predict", json=payload)
+    data = client.get("/db-pool-stats").json()
+    assert data["sync"]["checked_out"] >= 0
+    if os.getenv("DB_ASYNC_POOL") == "null":
+        # CI: one connection per session, so there is nothing to count
+        assert data["async"] == {"pool_class": "NullPool"}
+    else:
+        assert data["async"]["pool_class"] == "TimedAsyncQueuePool"
+        assert data["async"]["checkouts"] >= 1
+
+
+def test_predict_explain(payload):
+    plain = client.post("/predict", json=payload).json()
+    assert "explanation" not in plain
+
+    data = client.post("/predict?explain=true&top_k=4", json=payload).json()
+    assert data["churn_probability"] == plain["churn_probability"]
+    explanation = data["explanation"]
+    assert len(explanation) == 4
+    assert [abs(c["contribution"]) for c in explanation] == sorted(
+        (abs(c["contribution"]) for c in explanation), reverse=True
+    )
+    assert all(c["value"] == payload[c["feature"]] for c in explanation)
+
+    batch = client.post("/predict/batch?explain=true", json={"customers": [payload, payload]}).json()
+    assert [len(p["explanation"]) for p in batch["predictions"]] == [3, 3]
+    assert batch["predictions"][0]["explanation"] == explanation[:3]
+
+
+def test_drift_endpoint(payload):
+    client.post("/predict/batch", json={"customers": [payload] * 5})
+    data = client.get("/drift").json()
+    assert data["source"] == "logs"
+    assert data["rows"] >= 5
+    assert set(data["features"]) >= {"tenure", "Contract", "TotalCharges"}
+    assert "psi" in data["churn_probability"]
+    # the second refresh only reads what was logged in between
+    assert client.get("/drift").json()["scanned_rows"] == 0
+
+    assert client.get("/drift?source=stream").status_code == 404
+    assert client.get("/drift?model_version=does-not-exist").status_code == 404
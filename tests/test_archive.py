@@ -0,0 +1,243 @@
+# tests/test_archive.py
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, text
+
+from src import archive, partitions
+from src.aggregates import read_totals, rebuild_aggregates
+from src.archive import PAGE_DAYS, archive_logs, archived_files, read_history
+from src.database import PredictionLog, SessionLocal, get_engine
+from src.history import query_history
+from src.log_writer import write_prediction_logs
+from src.partitions import parent_ddl, partition_day, partition_ddl, partition_name
+
+# unique per run: the suite's database may already hold rows from earlier runs
+RUN = uuid4().hex[:8]
+VERSION = f"archive-{RUN}"
+# archived days well before anything else the suite writes
+DAYS = [datetime(2001, 1, d, tzinfo=timezone.utc) for d in (1, 2, 3)]
+
+
+def _rows(day: datetime, n: int, tag: str) -> list[dict]:
+    return [
+        {
+            "prediction_id": f"pred_archive_{RUN}_{tag}_{day:%Y%m%d}_{i}",
+            "churn_prediction": "Yes" if i % 3 == 0 else "No",
+            "churn_probability": i / n,
+            "risk_level": ("High", "Medium", "Low")[i % 3],
+            "contract": "Month-to-month",
+            "created_at": day + timedelta(hours=i),
+            "model_version": VERSION,
+        }
+        for i in range(n)
+    ]
+
+
+def _all_pages(db, archive_dir, limit=4, **filters) -> list[tuple[str, datetime]]:
+    seen, cursor = [], None
+    while True:
+        items, cursor = query_history(
+            db, limit=limit, cursor=cursor, model_version=VERSION, archive_dir=archive_dir, **filters
+        )
+        seen += [
+            (i["prediction_id"], datetime.fromisoformat(i["created_at"]).replace(tzinfo=timezone.utc)) for i in items
+        ]
+        if cursor is None:
+            return seen
+
+
+def test_retention_moves_old_days_to_parquet_and_history_reads_through(tmp_path):
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, [row for day in DAYS for row in _rows(day, 10, "old")])
+        write_prediction_logs(db, _rows(datetime.now(timezone.utc) - timedelta(hours=12), 5, "hot"))
+        before = _all_pages(db, tmp_path)
+        high_before = _all_pages(db, tmp_path, risk_level="High")
+        totals = read_totals(db, model_version=VERSION)
+
+        moved = archive_logs(db, days=1, archive_dir=tmp_path, now=datetime(2001, 1, 5, tzinfo=timezone.utc))
+        assert moved == [{"day": f"{d:%Y-%m-%d}", "rows": 10} for d in DAYS]
+        assert list(archived_files(tmp_path)) == DAYS
+        hot = db.scalar(select(func.count()).where(PredictionLog.model_version == VERSION))
+        assert hot == 5
+
+        # same pages, newest first, crossing from the table into the archive mid-page
+        assert len(before) == 35
+        assert _all_pages(db, tmp_path) == before
+        assert _all_pages(db, tmp_path, limit=7) == before
+        assert _all_pages(db, tmp_path, risk_level="High") == high_before
+        window = _all_pages(db, tmp_path, since=DAYS[1], until=DAYS[2] + timedelta(hours=2))
+        assert [p for p, _ in window] == [p for p, t in before if DAYS[1] <= t < DAYS[2] + timedelta(hours=2)]
+
+        # nothing left to move; a late row for an archived day lands in a second file
+        assert archive_logs(db, days=1, archive_dir=tmp_path, now=datetime(2001, 1, 5, tzinfo=timezone.utc)) == []
+        write_prediction_logs(db, _rows(DAYS[0] + timedelta(minutes=30), 1, "late"))
+        archive_logs(db, days=1, archive_dir=tmp_path, now=datetime(2001, 1, 5, tzinfo=timezone.utc))
+        assert [p.name for p in archived_files(tmp_path)[DAYS[0]]] == ["2001-01-01.1.parquet", "2001-01-01.parquet"]
+        assert len(_all_pages(db, tmp_path)) == 36
+
+        # /stats aggregates are untouched by retention, and a rebuild folds the archive back in
+        rebuild_aggregates(db, archive_dir=tmp_path, model_version=VERSION)
+        rebuilt = read_totals(db, model_version=VERSION)
+        assert rebuilt["total_predictions"] == totals["total_predictions"] + 1
+        assert rebuilt["risk_distribution"]["high"] == totals["risk_distribution"]["high"] + 1
+    finally:
+        db.close()
+
+
+def test_rows_committed_after_the_export_are_kept(tmp_path, monkeypatch):
+    day = datetime(2001, 2, 1, tzinfo=timezone.utc)
+    export_day = archive.export_day
+    raced = []
+
+    def export_then_insert(db, *args):
+        ids = export_day(db, *args)
+        if args[0] == day and not raced:
+            raced.append(True)
+            # another writer commits a row for the day while the file is being written
+            other = SessionLocal()
+            try:
+                write_prediction_logs(other, _rows(day + timedelta(minutes=30), 1, "race_late"))
+            finally:
+                other.close()
+        return ids
+
+    monkeypatch.setattr(archive, "export_day", export_then_insert)
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, _rows(day, 3, "race"))
+        archive_logs(db, days=1, archive_dir=tmp_path, now=day + timedelta(days=3))
+        # the loop comes back for the day and archives the late row into a second file
+        assert [p.name for p in archived_files(tmp_path)[day]] == ["2001-02-01.1.parquet", "2001-02-01.parquet"]
+        found, _ = read_history(
+            10, ["id", "created_at", "prediction_id", "model_version"], {"model_version": VERSION}, archive_dir=tmp_path
+        )
+        assert len([r for r in found if "_race_" in r["prediction_id"]]) == 4
+    finally:
+        db.close()
+
+
+def test_history_pages_open_a_bounded_number_of_archived_days(tmp_path):
+    days = [datetime(2002, 1, 1, tzinfo=timezone.utc) + timedelta(days=d) for d in range(PAGE_DAYS + 2)]
+    rows = [row for day in days for row in _rows(day, 3, "budget")]
+    # a rare filter: only the oldest day has a match
+    rows[0]["contract"] = "Two year"
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, rows)
+        archive_logs(db, days=1, archive_dir=tmp_path, now=days[-1] + timedelta(days=3))
+
+        found, resume = read_history(
+            10, ["id", "created_at", "contract"], {"contract": "Two year"}, archive_dir=tmp_path
+        )
+        assert found == [] and resume == (days[2], 0)
+        found, resume = read_history(
+            10, ["id", "created_at", "contract"], {"contract": "Two year"}, before=resume, archive_dir=tmp_path
+        )
+        assert [r["contract"] for r in found] == ["Two year"] and resume is None
+
+        # the short first page still hands out a cursor, and paging reaches the match
+        items, cursor = query_history(db, limit=5, model_version=VERSION, contract="Two year", archive_dir=tmp_path)
+        assert items == [] and cursor is not None
+        assert [p for p, _ in _all_pages(db, tmp_path, contract="Two year")] == [rows[0]["prediction_id"]]
+        paged = [p for p, _ in _all_pages(db, tmp_path, limit=10) if "_budget_" in p]
+        assert sorted(paged) == sorted(r["prediction_id"] for r in rows)
+    finally:
+        db.close()
+
+
+def test_postgres_partition_ddl():
+    engine = create_engine("postgresql+psycopg2://user@localhost/churn")
+    ddl = parent_ddl(engine)
+    assert ddl.endswith("PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+    assert "prediction_id VARCHAR(50)" in ddl and "monthly_charges FLOAT" in ddl
+    day = datetime(2026, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert partition_name(day) == "prediction_logs_p20260302"
+    assert partition_day("prediction_logs_p20260302") == datetime(2026, 3, 2, tzinfo=timezone.utc)
+    assert partition_day("prediction_logs_default") is None
+    assert partition_ddl(day).endswith("FROM ('2026-03-02T00:00:00+00:00') TO ('2026-03-03T00:00:00+00:00')")
+
+
+@pytest.fixture
+def postgres():
+    engine = get_engine()
+    if not partitions.enabled(engine):
+        pytest.skip("native partitions need postgres with LOG_PARTITIONING=1")
+    return engine
+
+
+def test_postgres_rows_land_in_their_day_partition(postgres):
+    today = partitions.day_start(datetime.now(timezone.utc))
+    partitions.ensure_partitions(postgres)
+    assert partitions.ensure_partitions(postgres) == []
+    with postgres.connect() as conn:
+        assert partitions.is_partitioned(conn)
+        names = partitions.list_partitions(conn)
+    assert partitions.DEFAULT_PARTITION in names
+    for offset in range(partitions.PREMAKE_DAYS + 1):
+        assert partitions.partition_name(today + timedelta(days=offset)) in names
+
+    rows = _rows(today + timedelta(minutes=1), 1, "route")
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, rows)
+        where = text("SELECT tableoid::regclass::text FROM prediction_logs WHERE prediction_id = :p")
+        assert db.scalar(where, {"p": rows[0]["prediction_id"]}) == partitions.partition_name(today)
+    finally:
+        db.close()
+
+
+def test_postgres_retention_drops_the_day_partition(postgres, tmp_path):
+    day = datetime(2003, 1, 1, tzinfo=timezone.utc)
+    partitions.ensure_days(postgres, [day])
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, _rows(day, 4, "pg"))
+        with postgres.connect() as conn:
+            assert partitions.partition_name(day) in partitions.list_partitions(conn)
+
+        moved = archive_logs(db, days=1, archive_dir=tmp_path, now=day + timedelta(days=3))
+        assert f"{day:%Y-%m-%d}" in [m["day"] for m in moved]
+        with postgres.connect() as conn:
+            names = partitions.list_partitions(conn)
+        assert partitions.partition_name(day) not in names
+        # the partitions for the run's "today" onwards are (re)created
+        assert partitions.partition_name(day + timedelta(days=3)) in names
+        found, _ = read_history(
+            10, ["id", "created_at", "model_version"], {"model_version": VERSION}, archive_dir=tmp_path
+        )
+        assert len(found) == 4
+    finally:
+        db.close()
+
+
+def test_postgres_migrate_moves_a_plain_table_into_partitions(postgres):
+    # a scratch schema, so the suite's own prediction_logs stays as it is
+    schema = f"migrate_{RUN}"
+    with postgres.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(postgres.url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        PredictionLog.__table__.create(bind=engine)
+        rows = _rows(DAYS[0], 3, "migrate") + _rows(DAYS[2], 2, "migrate")
+        with engine.begin() as conn:
+            conn.execute(insert(PredictionLog), rows)
+            last_id = conn.scalar(select(func.max(PredictionLog.id)))
+
+        assert partitions.migrate(engine) == 5
+        assert partitions.migrate(engine) == 0
+        with engine.begin() as conn:
+            assert partitions.is_partitioned(conn)
+            names = partitions.list_partitions(conn)
+            assert partitions.partition_name(DAYS[0]) in names and partitions.partition_name(DAYS[2]) in names
+            assert conn.scalar(text("SELECT count(*) FROM prediction_logs_legacy")) == 5
+            assert conn.scalar(select(func.count()).select_from(PredictionLog)) == 5
+            # the id sequence carries on above the copied rows
+            new_id = conn.scalar(insert(PredictionLog).returning(PredictionLog.id), _rows(DAYS[1], 1, "after")[0])
+            assert new_id > last_id
+    finally:
+        engine.dispose()
+        with postgres.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
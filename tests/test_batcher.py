@@ -0,0 +1,109 @@
+# tests/test_batcher.py
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from src.api import app
+from src.api import predictor as api_predictor
+from src.batcher import MicroBatcher
+from src.database import PredictionLog, SessionLocal
+from src.model_loader import ModelLoader, UnknownModelVersion
+from src.predictor import ChurnPredictor
+from src.shadow import TrafficSplit
+
+
+def test_concurrent_requests_share_batches_and_match_single_scoring(sample_customers):
+    predictor = ChurnPredictor()
+    batcher = MicroBatcher(predictor, window=0.05, max_size=8)
+    customers = sample_customers(20)
+
+    async def fire():
+        return await asyncio.gather(*(batcher.submit(c) for c in customers))
+
+    results = asyncio.run(fire())
+    expected = [predictor.predict(c) for c in customers]
+    assert [o.churn_probability for o, _ in results] == [e.churn_probability for e in expected]
+    assert [o.risk_level for o, _ in results] == [e.risk_level for e in expected]
+    # log rows come back with each caller's own id
+    assert all(row["prediction_id"] == o.customer_id for o, row in results)
+    assert len({o.customer_id for o, _ in results}) == 20
+    stats = batcher.stats()
+    assert (stats["batches"], stats["full_batches"], stats["requests"]) == (3, 2, 20)
+    assert stats["collecting"] == 0
+
+
+def test_traffic_split_is_drawn_once_per_request(sample_customers, models_dir):
+    class CountingSplit(TrafficSplit):
+        draws = 0
+
+        def choose(self):
+            self.draws += 1
+            return super().choose()
+
+    split = CountingSplit("2.0", 50)
+    predictor = ChurnPredictor(traffic_split=split)
+    predictor.loader = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    batcher = MicroBatcher(predictor, window=0.05)
+
+    async def fire():
+        return await asyncio.gather(*(batcher.submit(c) for c in sample_customers(20)))
+
+    versions = [o.model_version for o, _ in asyncio.run(fire())]
+    assert split.draws == 20
+    assert set(versions) <= {"1.0", "2.0"}
+
+
+def test_control_group_resolves_the_active_version_off_the_event_loop(sample_customers):
+    on_loop = []
+    registry = ModelLoader()
+
+    class RecordingPredictor(ChurnPredictor):
+        @property
+        def loader(self):
+            # the first access may load the model, which must not happen on the event loop's thread
+            on_loop.append(threading.current_thread() is threading.main_thread())
+            return registry
+
+    predictor = RecordingPredictor(traffic_split=TrafficSplit("2.0", 0))
+    batcher = MicroBatcher(predictor, window=0.01)
+
+    async def fire():
+        return await asyncio.gather(*(batcher.submit(c) for c in sample_customers(4)))
+
+    assert {o.model_version for o, _ in asyncio.run(fire())} == {"1.0"}
+    assert on_loop and not any(on_loop)
+    assert batcher.stats()["batches"] == 1
+
+
+def test_unknown_version_fails_only_its_own_batch(sample_customers):
+    batcher = MicroBatcher(ChurnPredictor(), window=0.01)
+    good, bad = sample_customers(2)
+
+    async def fire():
+        return await asyncio.gather(batcher.submit(good), batcher.submit(bad, "no-such"), return_exceptions=True)
+
+    ok, error = asyncio.run(fire())
+    assert ok[0].model_version == "1.0"
+    assert isinstance(error, UnknownModelVersion)
+    assert batcher.stats()["batches"] == 2
+
+
+def test_predict_endpoint_through_batcher_logs_each_request(payload):
+    api_predictor.batcher = MicroBatcher(api_predictor, window=0.002)
+    try:
+        with TestClient(app) as client:
+            r = client.post("/predict", json=payload)
+            assert r.status_code == 200
+            assert client.get("/batcher-stats").json()["batches"] == 1
+            # explain=true bypasses the batcher
+            assert "explanation" in client.post("/predict?explain=true", json=payload).json()
+            assert client.get("/batcher-stats").json()["requests"] == 1
+    finally:
+        api_predictor.batcher = None
+    db = SessionLocal()
+    try:
+        assert db.query(PredictionLog).filter(PredictionLog.prediction_id == r.json()["customer_id"]).count() == 1
+    finally:
+        db.close()
+    assert TestClient(app).get("/batcher-stats").json() == {"enabled": False}
@@ -0,0 +1,24 @@
+# tests/test_benchmarks.py
+from src.benchmarks import report
+from src.benchmarks.timing import measure
+
+
+def test_measure_reports_percentiles_and_rows():
+    r = measure(lambda: sum(range(100)), repeat=50, warmup=5, rows=10)
+    assert r["calls"] == 50
+    assert r["p50_us"] <= r["p95_us"] <= r["p99_us"]
+    assert r["rows_per_sec"] > r["calls_per_sec"]
+
+
+def test_compare_flags_only_regressions_beyond_threshold(tmp_path):
+    baseline = {"a": {"p50_us": 100.0, "p95_us": 200.0, "rows_per_sec": 1000.0}}
+    path = tmp_path / "base.json"
+    report.save(baseline, path)
+
+    ok = {"a": {"p50_us": 110.0, "p95_us": 210.0, "rows_per_sec": 950.0}}
+    assert report.compare(report.load(path), ok, threshold=0.2) == []
+
+    slow = {"a": {"p50_us": 150.0, "p95_us": 200.0, "rows_per_sec": 500.0}, "new": {"p50_us": 1.0}}
+    regressions = report.compare(report.load(path), slow, threshold=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("a: p50_us")
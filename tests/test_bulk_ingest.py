@@ -0,0 +1,104 @@
+# tests/test_bulk_ingest.py
+import csv
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+
+from src.backfill import BackfillError, backfill, rows_from_frame
+from src.bulk_ingest import COLUMNS, COPY_SQL, copy_rows, csv_buffer
+from src.database import PredictionLog, SessionLocal
+from src.log_writer import PredictionLogWriter, write_prediction_logs
+
+# unique per run: the suite's database may already hold rows from earlier runs
+VERSION = f"backfill-{uuid4().hex[:6]}"
+WHEN = datetime(2002, 3, 4, 5, 6, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def scores_frame(sample_customers):
+    """n -> a backfill input frame: n sample customers plus a churn_probability column"""
+
+    def build(n: int) -> pd.DataFrame:
+        frame = pd.DataFrame([c.model_dump() for c in sample_customers(n)])
+        frame["churn_probability"] = [i / n for i in range(n)]
+        return frame
+
+    return build
+
+
+class _Cursor:
+    def __init__(self):
+        self.calls = []
+
+    def copy_expert(self, sql, buffer):
+        self.calls.append((sql, buffer.read()))
+
+    def close(self):
+        pass
+
+
+def _session(cursor):
+    # just enough of Session.connection().connection.cursor() for copy_rows
+    raw = SimpleNamespace(cursor=lambda: cursor)
+    return SimpleNamespace(connection=lambda: SimpleNamespace(connection=raw))
+
+
+def test_copy_streams_csv_in_column_order(scores_frame):
+    rows = rows_from_frame(scores_frame(3), VERSION, WHEN)
+    rows[1]["tenure"] = None
+    cursor = _Cursor()
+    copy_rows(_session(cursor), rows)
+    [(sql, body)] = cursor.calls
+    assert sql == COPY_SQL and "(prediction_id, gender" in sql and sql.endswith("FROM STDIN WITH (FORMAT csv)")
+    parsed = list(csv.reader(body.splitlines()))
+    assert len(parsed) == 3 and all(len(r) == len(COLUMNS) for r in parsed)
+    record = dict(zip(COLUMNS, parsed[1]))
+    assert record["tenure"] == ""  # NULL
+    assert record["created_at"] == WHEN.isoformat()
+    assert record["payment_method"] == rows[1]["payment_method"]
+    assert list(csv.reader(csv_buffer(rows[:1]))) == parsed[:1]
+
+
+def test_copy_method_falls_back_to_insert_on_sqlite(scores_frame):
+    rows = rows_from_frame(scores_frame(4), VERSION + "-copy", WHEN)
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, rows, method="copy")
+        assert db.query(PredictionLog).filter(PredictionLog.model_version == VERSION + "-copy").count() == 4
+    finally:
+        db.close()
+    with pytest.raises(ValueError):
+        PredictionLogWriter(method="bulk")
+    assert PredictionLogWriter(method="copy").stats()["method"] == "copy"
+
+
+def test_backfill_csv_and_parquet_with_resume(tmp_path, scores_frame):
+    frame = scores_frame(25)
+    frame.to_csv(tmp_path / "scores.csv", index=False)
+    frame.assign(created_at="2002-03-05T00:00:00Z").to_parquet(tmp_path / "scores.parquet")
+
+    result = backfill(tmp_path / "scores.csv", chunk_size=10, model_version=VERSION, created_at=WHEN, skip_rows=12)
+    assert result["rows"] == 13
+    result = backfill(tmp_path / "scores.parquet", chunk_size=7, model_version=VERSION)
+    assert result["rows"] == 25 and result["rows_per_sec"] > 0
+
+    db = SessionLocal()
+    try:
+        logged = db.query(PredictionLog).filter(PredictionLog.model_version == VERSION).all()
+        assert len(logged) == 38
+        csv_rows = sorted((r for r in logged if r.created_at.day == 4), key=lambda r: r.churn_probability)
+        assert [r.churn_probability for r in csv_rows] == list(frame["churn_probability"][12:])
+        # derived the same way as the API: > 0.5 churns, 0.3 / 0.7 risk bands
+        assert {(r.churn_prediction, r.risk_level) for r in csv_rows if r.churn_probability == 0.52} == {
+            ("Yes", "Medium")
+        }
+        assert csv_rows[0].contract == frame["Contract"][12]
+        assert sum(r.created_at.day == 5 for r in logged) == 25
+    finally:
+        db.close()
+
+    with pytest.raises(BackfillError):
+        rows_from_frame(frame.drop(columns=["churn_probability"]), VERSION, WHEN)
@@ -0,0 +1,66 @@
+# tests/test_bundle.py
+import json
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.bundle import export_bundle
+from src.model_loader import ModelArtifacts, ModelLoader
+
+
+def test_linear_bundle_matches_pickle(tmp_path, copy_artifacts, sample_customers):
+    pickled = ModelArtifacts("1.0", copy_artifacts(tmp_path), fmt="pickle")
+    export_bundle(pickled)
+    bundled = ModelArtifacts("1.0", tmp_path)
+
+    assert bundled.format == "bundle"
+    assert bundled.model_type == "LogisticRegression"
+    assert bundled.inference.native
+    assert not bundled.scaler.mean_.flags.writeable  # read-only mmap view
+    customers = sample_customers(200)
+    assert np.array_equal(pickled.inference.score_many(customers), bundled.inference.score_many(customers))
+    assert bundled.feature_names == pickled.feature_names
+
+
+def test_forest_bundle_matches_sklearn(tmp_path, copy_artifacts, sample_customers):
+    base = ModelArtifacts("1.0", copy_artifacts(tmp_path), fmt="pickle")
+    rng = np.random.RandomState(0)
+    X = rng.randn(500, base.encoder.n_features)
+    y = (X[:, 4] + rng.randn(500) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X, y)
+    joblib.dump(forest, tmp_path / "model.pkl")
+
+    pickled = ModelArtifacts("rf", tmp_path, fmt="pickle")
+    export_bundle(pickled)
+    bundled = ModelArtifacts("rf", tmp_path, fmt="bundle")
+
+    X_test = base.encoder.encode_many(sample_customers(300))
+    assert np.allclose(bundled.model.predict_proba(X_test), forest.predict_proba(X_test), rtol=0, atol=1e-12)
+    assert bundled.model_type == "RandomForestClassifier"
+
+
+def test_registry_prefers_bundle(tmp_path, copy_artifacts):
+    export_bundle(ModelArtifacts("1.0", copy_artifacts(tmp_path), fmt="pickle"))
+    for path in tmp_path.glob("*.pkl"):
+        path.unlink()
+    registry = ModelLoader.from_dir(tmp_path)
+    assert registry.get().format == "bundle"
+    assert registry.status()["available_versions"] == ["1.0"]
+
+
+def test_reexport_swaps_the_bundle_with_one_rename(tmp_path, copy_artifacts):
+    pickled = ModelArtifacts("1.0", copy_artifacts(tmp_path), fmt="pickle")
+    export_bundle(pickled)
+    (old,) = tmp_path.glob("arrays*.bin")
+    mapped = ModelArtifacts("1.0", tmp_path, fmt="bundle")
+
+    original = pickled.model.coef_.copy()
+    pickled.model.coef_ = original * 2
+    export_bundle(pickled)
+    (new,) = tmp_path.glob("arrays*.bin")
+    # the header names its arrays file, so the old offsets never meet the new arrays
+    assert new != old and json.loads((tmp_path / "bundle.json").read_text())["arrays_file"] == new.name
+    assert np.array_equal(ModelArtifacts("1.0", tmp_path).model.coef_, original * 2)
+    # a process that mapped the old file keeps reading it
+    assert np.array_equal(mapped.model.coef_, original)
@@ -0,0 +1,56 @@
+# tests/test_cache.py
+import time
+
+from src.cache import PredictionCache, canonical_key
+from src.log_writer import PredictionLogWriter
+from src.predictor import ChurnPredictor
+
+
+def test_lru_eviction_and_ttl():
+    cache = PredictionCache(max_size=2, ttl=0.05)
+    cache.put("a", 0.1)
+    cache.put("b", 0.2)
+    assert cache.get("a") == 0.1  # "a" is now most recent
+    cache.put("c", 0.3)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_key_depends_on_features_and_version(sample_customers):
+    c1, c2 = sample_customers(2)
+    assert canonical_key(c1, "1.0") == canonical_key(c1.model_copy(), "1.0")
+    assert canonical_key(c1, "1.0") != canonical_key(c2, "1.0")
+    assert canonical_key(c1, "1.0") != canonical_key(c1, "2.0")
+
+
+def test_predictor_hits_cache_and_still_logs(tmp_path, sample_customers):
+    writer = PredictionLogWriter(spill_path=tmp_path / "spill.jsonl")
+    predictor = ChurnPredictor(log_writer=writer, cache=PredictionCache(100))
+    customers = sample_customers(5)
+
+    first = predictor.predict_many(customers)
+    again = predictor.predict(customers[2])
+    assert again.churn_probability == first[2].churn_probability
+    assert again.customer_id != first[2].customer_id
+    assert predictor.cache.stats()["hits"] == 1
+    assert writer.stats()["queue_depth"] == 6
+
+    # mixed batch: only the new customer is scored
+    predictor.predict_many(customers[:2] + sample_customers(6)[5:])
+    assert predictor.cache.stats()["hits"] == 3
+    assert predictor.cache.stats()["misses"] == 6
+
+
+def test_reload_invalidates_cache(sample_customers):
+    predictor = ChurnPredictor(cache=PredictionCache(100))
+    customer = sample_customers(1)[0]
+    predictor.predict(customer)
+    predictor.loader.reload()
+    predictor.predict(customer)
+    stats = predictor.cache.stats()
+    assert stats["hits"] == 0
+    assert stats["invalidations"] == 1
@@ -0,0 +1,145 @@
+# tests/test_columnar.py
+import asyncio
+import gzip
+import json
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src import columnar
+from src.api import app
+from src.database import PredictionLog, SessionLocal
+from src.predictor import ChurnPredictor
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def customers(sample_customers):
+    return sample_customers(50)
+
+
+@pytest.fixture
+def columnar_payload(customers):
+    """**extra -> a /predict/columnar body for the sample customers"""
+
+    def build(**extra):
+        return {"columns": columnar.to_columns(customers), **extra}
+
+    return build
+
+
+def test_encode_codes_matches_encode_many(customers, columnar_payload):
+    predictor = ChurnPredictor()
+    encoder = predictor.loader.encoder
+    columns, n = columnar.validate_columns(columnar_payload())
+    for scaled in (True, False):
+        X = encoder.encode_codes(columns, columnar.INPUT_DICTIONARY, n, scaled=scaled)
+        assert np.array_equal(X, encoder.encode_many(customers, scaled=scaled))
+
+
+def test_columnar_matches_batch_endpoint_and_logs(customers, columnar_payload):
+    batch = client.post("/predict/batch", json={"customers": [c.model_dump() for c in customers]}).json()
+    r = client.post("/predict/columnar", json=columnar_payload(dictionary_id=columnar.DICTIONARY_ID))
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == len(customers)
+    names = columnar.OUTPUT_DICTIONARY
+    for i, expected in enumerate(batch["predictions"]):
+        assert data["churn_probability"][i] == expected["churn_probability"]
+        assert names["churn_prediction"][data["churn_prediction"][i]] == expected["churn_prediction"]
+        assert names["risk_level"][data["risk_level"][i]] == expected["risk_level"]
+
+    db = SessionLocal()
+    try:
+        logged = db.query(PredictionLog).filter(PredictionLog.prediction_id == data["customer_id"][7]).one()
+        assert logged.contract == customers[7].Contract
+        assert logged.senior_citizen == customers[7].SeniorCitizen
+        assert logged.tenure == customers[7].tenure
+    finally:
+        db.close()
+
+
+def test_msgpack_and_gzip_bodies(columnar_payload):
+    expected = client.post("/predict/columnar", json=columnar_payload()).json()
+    body = gzip.compress(msgpack.packb(columnar_payload()))
+    headers = {"Content-Type": columnar.MSGPACK, "Content-Encoding": "gzip", "Accept": columnar.MSGPACK}
+    r = client.post("/predict/columnar", content=body, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == columnar.MSGPACK
+    data = msgpack.unpackb(r.content)
+    assert data["churn_probability"] == expected["churn_probability"]
+
+    gz_json = gzip.compress(json.dumps(columnar_payload()).encode())
+    r = client.post("/predict/columnar", content=gz_json, headers={"Content-Encoding": "gzip"})
+    assert r.json()["risk_level"] == expected["risk_level"]
+
+
+def test_bulk_validation_errors(columnar_payload):
+    payload = columnar_payload()
+    payload["columns"]["Contract"][3] = 7
+    payload["columns"]["tenure"][5] = 101
+    payload["columns"]["MonthlyCharges"][0] = "abc"
+    r = client.post("/predict/columnar", json=payload)
+    assert r.status_code == 422
+    errors = {tuple(e["loc"][2:]): e["msg"] for e in r.json()["detail"]}
+    assert errors[("Contract", 3)].startswith("1 code(s) outside 0-2")
+    assert errors[("tenure", 5)].startswith("1 value(s) not an integer >= 0 <= 100")
+    assert errors[("MonthlyCharges",)] == "expected an array of numbers"
+
+    short = columnar_payload()
+    short["columns"]["gender"] = short["columns"]["gender"][:-1]
+    assert client.post("/predict/columnar", json=short).status_code == 422
+    del short["columns"]["gender"]
+    assert client.post("/predict/columnar", json=short).json()["detail"][0]["loc"] == ["body", "columns", "gender"]
+    assert client.post("/predict/columnar", json=columnar_payload(dictionary_id="stale")).status_code == 409
+    assert client.post("/predict/columnar", content=b"{not json").status_code == 400
+
+
+def test_nested_and_ragged_columns_are_422(columnar_payload):
+    for field, value in [
+        ("tenure", [[1, 2], [3, 4]]),
+        ("gender", [[0], [1]]),
+        ("gender", [[0], [1, 0]]),
+        ("MonthlyCharges", [[1.0], [2.0, 3.0]]),
+    ]:
+        payload = columnar_payload()
+        n = len(payload["columns"][field])
+        payload["columns"][field] = (value * n)[:n]
+        r = client.post("/predict/columnar", json=payload)
+        assert r.status_code == 422, (field, value)
+        assert r.json()["detail"][0]["loc"] == ["body", "columns", field]
+
+
+def test_oversized_bodies_are_refused_before_they_are_read(columnar_payload, monkeypatch):
+    monkeypatch.setattr(columnar, "MAX_BODY_BYTES", 1024)
+    r = client.post("/predict/columnar", json=columnar_payload())
+    assert r.status_code == 413
+    assert r.json()["detail"][0]["type"] == "too_large"
+
+    # no Content-Length (chunked): counted while streaming, so reading stops at the first chunk past the limit
+    pulled = []
+
+    async def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield b"x" * 512
+
+    with pytest.raises(columnar.ColumnarError) as e:
+        asyncio.run(columnar.read_body(chunks()))
+    assert e.value.status_code == 413 and len(pulled) == 3
+    assert asyncio.run(columnar.read_body(_aiter([b"{}", b" "]), "3")) == b"{} "
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def test_model_info_publishes_dictionary():
+    info = client.get("/model-info").json()["columnar"]
+    assert info["dictionary_id"] == columnar.DICTIONARY_ID
+    assert info["dictionary"]["PaymentMethod"][2] == "Bank transfer (automatic)"
+    assert info["numeric_fields"] == ["tenure", "MonthlyCharges", "TotalCharges"]
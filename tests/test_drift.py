@@ -0,0 +1,177 @@
+# tests/test_drift.py
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database import SessionLocal
+from src.drift import DATA_PATH, SCORE, DriftMonitor, Reference, load_reference, scan_logs, write_reference
+from src.log_writer import write_prediction_logs
+from src.model_loader import ModelArtifacts
+from src.predictor import log_row, new_prediction_id
+from src.preprocessing import RAW_DTYPES, clean_frame
+
+FRAME = clean_frame(pd.read_csv(DATA_PATH, dtype=RAW_DTYPES))
+
+
+@pytest.fixture(scope="module")
+def reference(active_artifacts):
+    return load_reference(active_artifacts)
+
+
+@pytest.fixture(scope="module")
+def columns(active_artifacts):
+    """frame -> the columns a drift monitor takes, scored by the checked-in model"""
+
+    def build(df):
+        return {**{c: df[c] for c in df.columns}, SCORE: active_artifacts.inference.score_columns(df, len(df))}
+
+    return build
+
+
+def test_training_data_has_no_drift_and_a_shift_is_flagged(reference, columns):
+    monitor = DriftMonitor(reference)
+    monitor.add(columns(FRAME))
+    report = monitor.report()
+    assert report["rows"] == len(FRAME) == report["reference_rows"]
+    assert report["status"] == "stable"
+    assert all(f["psi"] < 1e-9 for f in report["features"].values())
+
+    shifted = DriftMonitor(reference)
+    shifted.add(columns(FRAME[FRAME["Contract"] == "Month-to-month"]))
+    report = shifted.report()
+    assert report["status"] == "significant"
+    assert report["features"]["Contract"]["status"] == "significant"
+    assert report["features"]["gender"]["status"] == "stable"
+    assert report["churn_probability"]["ks"] > 0.1
+
+
+def test_hourly_buckets_expire_and_unseen_values_count_as_other(reference, columns):
+    monitor = DriftMonitor(reference, window_hours=2)
+    now = datetime.now(timezone.utc)
+    rows = FRAME.head(50)
+    monitor.add_timed(columns(rows), [now - timedelta(hours=5)] * 25 + [now] * 25)
+    assert monitor.report()["rows"] == 25
+    assert len(monitor._buckets) == 1
+
+    odd = columns(rows)
+    odd["Contract"] = ["Five year"] * 50
+    monitor.add(odd)
+    assert monitor.report()["features"]["Contract"]["unseen"] == 50
+    assert monitor.report(hours=1)["rows"] == 75
+
+
+def test_reference_round_trips_through_json(tmp_path, copy_artifacts, reference, columns):
+    copy_artifacts(tmp_path)
+    path = write_reference(ModelArtifacts("1.0", tmp_path, fmt="pickle"))
+    loaded = load_reference(ModelArtifacts("1.0", tmp_path, fmt="pickle"))
+    assert path.exists()
+    assert loaded.features == reference.features
+    assert np.array_equal(loaded.bin_counts(columns(FRAME)), reference.bin_counts(columns(FRAME)))
+
+
+def test_no_reference_and_no_data_is_a_typed_error(models_dir, sample_customers, monkeypatch, models_path):
+    from fastapi.testclient import TestClient
+
+    from src import api
+    from src.drift import REFERENCE_FILE, DriftMonitors, ReferenceUnavailable
+    from src.model_loader import ModelLoader
+    from src.predictor import ChurnPredictor
+
+    # the shipped model carries its reference, so it doesn't need data/ (which the image leaves out)
+    assert (models_path / REFERENCE_FILE).exists()
+
+    registry = ModelLoader.from_dir(models_dir(versions=()))
+    missing = registry.get().path / "no-such.csv"
+    monitors = DriftMonitors(registry, data_path=missing)
+    with pytest.raises(ReferenceUnavailable, match="no-such.csv"):
+        monitors.get()
+
+    # the stream hook skips counting rather than failing the request
+    predictor = ChurnPredictor(drift=monitors)
+    predictor.loader = registry
+    predictor.load()
+    assert predictor.predict(sample_customers(1)[0]).churn_probability >= 0
+
+    monkeypatch.setattr(api, "log_drift", monitors)
+    with TestClient(api.app) as client:
+        r = client.get("/drift")
+    assert r.status_code == 503
+    assert REFERENCE_FILE in r.json()["detail"]
+
+
+def test_scan_logs_reads_only_new_rows(reference, sample_customers):
+    # unique per run, so rows from earlier runs on the same database aren't scanned
+    version = f"drift-test-{uuid4().hex[:8]}"
+    monitor = DriftMonitor(Reference.from_json({**reference.to_json(), "model_version": version}))
+    customers = sample_customers(150)
+    db = SessionLocal()
+    try:
+        rows = [log_row(c, new_prediction_id(), "No", 0.2, "Low", version) for c in customers]
+        write_prediction_logs(db, rows[:120])
+        assert scan_logs(db, monitor, chunk_size=50) == 120
+        assert scan_logs(db, monitor, chunk_size=50) == 0
+        write_prediction_logs(db, rows[120:])
+        assert scan_logs(db, monitor, chunk_size=50) == 30
+    finally:
+        db.close()
+    report = monitor.report()
+    assert report["rows"] == 150
+    # every logged probability was 0.2
+    assert report["churn_probability"]["status"] == "significant"
+
+
+def test_scan_logs_counts_a_lower_id_that_commits_late(reference, sample_customers):
+    from sqlalchemy import delete, insert, select
+
+    from src.database import PredictionLog
+
+    version = f"drift-late-{uuid4().hex[:8]}"
+    monitor = DriftMonitor(Reference.from_json({**reference.to_json(), "model_version": version}))
+    db = SessionLocal()
+    try:
+        rows = [log_row(c, new_prediction_id(), "No", 0.2, "Low", version) for c in sample_customers(40)]
+        write_prediction_logs(db, rows)
+        late = db.execute(
+            select(PredictionLog).where(PredictionLog.model_version == version).order_by(PredictionLog.id)
+        )
+        late = late.scalars().all()[5]
+        values = {c.name: getattr(late, c.name) for c in PredictionLog.__table__.columns}
+        # its id was taken, but the row isn't visible yet when higher ids are scanned
+        db.execute(delete(PredictionLog).where(PredictionLog.id == values["id"]))
+        db.commit()
+        assert scan_logs(db, monitor, chunk_size=16) == 39
+        db.execute(insert(PredictionLog).values(**values))
+        db.commit()
+        assert scan_logs(db, monitor, chunk_size=16) == 1
+        assert scan_logs(db, monitor, chunk_size=16) == 0
+    finally:
+        db.close()
+    assert monitor.report()["rows"] == 40
+
+
+def test_scan_logs_resumes_a_pass_cut_short_by_max_rows(reference, sample_customers):
+    version = f"drift-max-{uuid4().hex[:8]}"
+    monitor = DriftMonitor(Reference.from_json({**reference.to_json(), "model_version": version}))
+    db = SessionLocal()
+    try:
+        write_prediction_logs(
+            db, [log_row(c, new_prediction_id(), "No", 0.2, "Low", version) for c in sample_customers(50)]
+        )
+        assert [scan_logs(db, monitor, chunk_size=16, max_rows=20) for _ in range(4)] == [20, 20, 10, 0]
+    finally:
+        db.close()
+    assert monitor.report()["rows"] == 50
+
+
+def test_stream_hook_counts_scored_customers(sample_customers):
+    from src.drift import DriftMonitors
+    from src.predictor import ChurnPredictor
+
+    predictor = ChurnPredictor(drift=DriftMonitors(ChurnPredictor().loader))
+    customers = sample_customers(40)
+    predictor.predict_many(customers)
+    predictor.predict(customers[0])
+    assert predictor.drift.get().report()["rows"] == 41
@@ -0,0 +1,28 @@
+# tests/test_encoder.py
+import numpy as np
+
+from src.predictor import ChurnPredictor
+
+predictor = ChurnPredictor()
+
+
+def test_encode_matches_preprocess_input(sample_customers):
+    for customer in sample_customers():
+        expected = predictor._preprocess_input(customer)
+        got = predictor.loader.encoder.encode(customer)
+        assert got.shape == expected.shape
+        assert np.array_equal(got, expected)
+
+
+def test_encode_many_matches_single_rows(sample_customers):
+    customers = sample_customers()
+    X = predictor.loader.encoder.encode_many(customers)
+    expected = np.vstack([predictor._preprocess_input(c) for c in customers])
+    assert np.array_equal(X, expected)
+
+
+def test_unseen_category_falls_back_like_preprocess_input(sample_customers):
+    # model_copy(update=...) skips validation so we can sneak in a value the encoders never saw
+    customer = sample_customers(1)[0].model_copy(update={"PaymentMethod": "Crypto"})
+    expected = predictor._preprocess_input(customer)
+    assert np.array_equal(predictor.loader.encoder.encode(customer), expected)
@@ -0,0 +1,64 @@
+# tests/test_explain.py
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from src.bundle import export_bundle
+from src.explain import ExplanationUnavailable
+from src.model_loader import ModelArtifacts
+from src.predictor import ChurnPredictor
+
+
+def test_linear_contributions_sum_to_decision(artifacts_with, sample_customers):
+    artifacts = artifacts_with()
+    X = artifacts.encoder.encode_many(sample_customers(300), scaled=False)
+    proba, contributions = artifacts.inference.churn_proba(X), artifacts.explainer.contributions(X)
+
+    assert artifacts.explainer.unit == "log_odds"
+    scaled = artifacts.encoder.encode_many(sample_customers(300))
+    model = artifacts.model
+    assert np.allclose(contributions, artifacts.inference.link * scaled * model.coef_[0])
+    assert np.allclose(contributions.sum(axis=1) + artifacts.explainer.base, np.log(proba / (1 - proba)))
+
+
+def test_tree_contributions_match_forest(tmp_path, artifacts_with, fit_model, sample_customers):
+    base = artifacts_with()
+    forest = fit_model(RandomForestClassifier, base, n_estimators=20, max_depth=6)
+    joblib.dump(forest, tmp_path / "model.pkl")
+    artifacts = ModelArtifacts("1.0", tmp_path, fmt="pickle")
+    X = artifacts.encoder.encode_many(sample_customers(300))
+    proba, contributions = forest.predict_proba(X)[:, 1], artifacts.explainer.contributions(X)
+
+    assert artifacts.explainer.unit == "probability"
+    assert np.allclose(contributions.sum(axis=1) + artifacts.explainer.base, proba)
+    # tenure drives the synthetic target; TotalCharges carries much of the same signal
+    assert np.isin(artifacts.explainer.top_k(contributions, 1)[:, 0], [4, 18]).mean() > 0.8
+
+    # the mmap bundle explains the same way
+    export_bundle(artifacts)
+    bundled = ModelArtifacts("1.0", tmp_path)
+    assert np.allclose(bundled.explainer.contributions(X), contributions)
+
+
+def test_explained_scores_are_the_engines(artifacts_with, sample_customers):
+    # explain=true must not change the probability, not even in the last bits
+    artifacts = artifacts_with()
+    customers = sample_customers(300)
+    explained, _ = ChurnPredictor()._explain_many(customers, artifacts, 3)
+    assert explained == artifacts.inference.score_many(customers).tolist()
+    assert explained[0] == artifacts.inference.score(customers[0])
+
+
+def test_top_k_orders_by_magnitude(artifacts_with):
+    artifacts = artifacts_with()
+    contributions = np.array([[0.1, -0.5, 0.3, 0.0], [2.0, 0.0, -3.0, 1.0]])
+    assert artifacts.explainer.top_k(contributions, 2).tolist() == [[1, 2], [2, 0]]
+    assert artifacts.explainer.top_k(contributions, 10).shape == (2, 4)
+
+
+def test_unsupported_model(artifacts_with, fit_model):
+    base = artifacts_with()
+    artifacts = artifacts_with(fit_model(GradientBoostingClassifier, base, n_estimators=5))
+    with pytest.raises(ExplanationUnavailable):
+        artifacts.explainer
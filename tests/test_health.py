@@ -0,0 +1,49 @@
+# tests/test_health.py
+import asyncio
+
+from src import db_pool
+from src.health import CachedCheck
+
+
+def test_cached_check_runs_once_per_ttl():
+    calls = 0
+
+    async def check():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls < 2
+
+    cached = CachedCheck(check, ttl=0.05)
+
+    async def probe():
+        first = await asyncio.gather(*(cached.get() for _ in range(10)))
+        await asyncio.sleep(0.06)
+        second = await cached.get()
+        return first, second
+
+    first, second = asyncio.run(probe())
+    # ten concurrent probes share a single check, the next one after the TTL re-runs it
+    assert calls == 2
+    assert all(ok for ok, _ in first)
+    assert second[0] is False
+
+
+def test_engine_options_for_postgres(monkeypatch):
+    # CI sets DB_ASYNC_POOL=null; the queue-pool options are the default being checked here
+    monkeypatch.delenv("DB_ASYNC_POOL", raising=False)
+    monkeypatch.setattr(db_pool, "POOL_SIZE", 20)
+    monkeypatch.setattr(db_pool, "STATEMENT_TIMEOUT_MS", 1500)
+    options = db_pool.engine_options("postgresql://u:p@db/churn")
+    assert options["poolclass"] is db_pool.TimedQueuePool
+    assert options["pool_size"] == 20
+    assert options["connect_args"] == {"options": "-c statement_timeout=1500"}
+
+    async_options = db_pool.engine_options("postgresql+asyncpg://u:p@db/churn", is_async=True)
+    assert async_options["poolclass"] is db_pool.TimedAsyncQueuePool
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "1500"}}
+    # in-memory SQLite keeps SQLAlchemy's default pool
+    assert "poolclass" not in db_pool.engine_options("sqlite://")
+
+    monkeypatch.setenv("DB_ASYNC_POOL", "null")
+    assert db_pool.engine_options("postgresql+asyncpg://u:p@db/churn", is_async=True)["poolclass"] is db_pool.NullPool
@@ -0,0 +1,34 @@
+# tests/test_inference.py
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from src.inference import InferenceEngine
+from src.model_loader import ModelLoader
+
+loader = ModelLoader()
+
+
+def test_native_engine_matches_sklearn(sample_customers):
+    customers = sample_customers()
+    engine = loader.inference
+    assert engine.native
+
+    X = loader.encoder.encode_many(customers)
+    expected = loader.model.predict_proba(X)[:, 1]
+    assert np.allclose(engine.score_many(customers), expected, rtol=0, atol=1e-12)
+    assert np.allclose([engine.score(c) for c in customers], expected, rtol=0, atol=1e-12)
+
+    # class derived from the probability agrees with model.predict
+    assert np.array_equal((engine.score_many(customers) > 0.5).astype(int), loader.model.predict(X))
+
+
+def test_non_linear_model_falls_back_to_sklearn(sample_customers):
+    customers = sample_customers()
+    X = loader.encoder.encode_many(customers)
+    y = np.arange(len(customers)) % 2
+    tree = DecisionTreeClassifier(max_depth=3, random_state=0).fit(X, y)
+
+    engine = InferenceEngine(tree, loader.scaler, loader.encoder)
+    assert not engine.native
+    assert np.array_equal(engine.score_many(customers), tree.predict_proba(X)[:, 1])
+    assert engine.score(customers[0]) == tree.predict_proba(X[:1])[0, 1]
@@ -0,0 +1,147 @@
+# tests/test_log_writer.py
+import json
+import threading
+import time
+
+from src.database import PredictionLog, SessionLocal
+from src.log_writer import PredictionLogWriter, write_prediction_logs
+from src.predictor import ChurnPredictor
+
+
+def _rows(n):
+    return [{"prediction_id": f"pred_lw_{time.time_ns()}_{i}", "tenure": i, "churn_prediction": "No"} for i in range(n)]
+
+
+def test_writer_flushes_in_bulk_on_stop(tmp_path):
+    writer = PredictionLogWriter(batch_size=50, flush_interval=0.05, spill_path=tmp_path / "spill.jsonl")
+    writer.start()
+    rows = _rows(120)
+    writer.submit(rows)
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 120
+    assert stats["queue_depth"] == 0
+    assert stats["flushes"] >= 3
+
+    db = SessionLocal()
+    try:
+        ids = [r["prediction_id"] for r in rows]
+        assert db.query(PredictionLog).filter(PredictionLog.prediction_id.in_(ids)).count() == 120
+    finally:
+        db.close()
+
+
+def test_drop_policy_counts_overflow(tmp_path):
+    # worker not started, so the queue fills up
+    writer = PredictionLogWriter(max_queue=5, overflow="drop", spill_path=tmp_path / "spill.jsonl")
+    writer.submit(_rows(8))
+    assert writer.stats()["enqueued"] == 5
+    assert writer.stats()["dropped"] == 3
+
+
+def test_spill_policy_writes_file_and_replays_on_start(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    writer = PredictionLogWriter(max_queue=1, overflow="spill", flush_interval=0.05, spill_path=spill)
+    rows = _rows(4)
+    writer.submit(rows)
+    assert writer.stats()["spilled"] == 3
+    assert len(spill.read_text().splitlines()) == 3
+
+    writer.start()
+    writer.stop()
+    assert not spill.exists()
+    assert writer.stats()["written"] == 4
+
+
+def test_leftover_replay_file_is_finished_before_the_next_spill(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    leftover, pending = _rows(6), _rows(3)
+    # a crash mid-replay: the first batch of the .replay file already made it to the DB
+    db = SessionLocal()
+    try:
+        write_prediction_logs(db, [dict(r) for r in leftover[:2]])
+    finally:
+        db.close()
+    spill.with_suffix(".replay").write_text("".join(json.dumps(r) + "\n" for r in leftover))
+    spill.write_text("".join(json.dumps(r) + "\n" for r in pending))
+
+    writer = PredictionLogWriter(batch_size=2, flush_interval=0.05, spill_path=spill)
+    writer.start()
+    writer.stop()
+    assert not spill.exists() and not spill.with_suffix(".replay").exists()
+    assert writer.stats()["failed"] == 0
+    assert writer.stats()["written"] == 7
+    db = SessionLocal()
+    try:
+        ids = [r["prediction_id"] for r in leftover + pending]
+        assert db.query(PredictionLog).filter(PredictionLog.prediction_id.in_(ids)).count() == 9
+    finally:
+        db.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _write_spill(path, rows):
+    # renamed into place, so the running writer never sees half a file
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    tmp.replace(path)
+
+
+def test_spill_is_retried_while_running_and_poison_files_are_quarantined(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    writer = PredictionLogWriter(flush_interval=0.01, spill_path=spill, spill_retry_interval=0.02, spill_max_attempts=3)
+    writer.start()
+    try:
+        # spilled after start: picked up without a restart
+        _write_spill(spill, _rows(2))
+        assert _wait_for(lambda: writer.stats()["written"] == 2 and not spill.exists())
+
+        # the same prediction_id twice fails the unique index on every attempt
+        _write_spill(spill, _rows(1) * 2)
+        assert _wait_for(lambda: writer.stats()["quarantined_files"] == 1)
+        assert not spill.exists() and not spill.with_suffix(".replay").exists()
+        [quarantined] = tmp_path.glob("spill.*.quarantine")
+        assert len(quarantined.read_text().splitlines()) == 2
+
+        # and the writer carries on
+        writer.submit(_rows(1))
+        assert _wait_for(lambda: writer.stats()["written"] == 3)
+    finally:
+        writer.stop()
+
+
+def test_stop_timeout_keeps_the_running_worker(tmp_path):
+    release = threading.Event()
+
+    def slow_session():
+        release.wait(5)
+        return SessionLocal()
+
+    writer = PredictionLogWriter(session_factory=slow_session, flush_interval=0.01, spill_path=tmp_path / "s.jsonl")
+    writer.start()
+    worker = writer._thread
+    writer.submit(_rows(1))
+    time.sleep(0.05)
+    writer.stop(timeout=0.05)
+    assert writer.stats()["running"]
+    writer.start()
+    assert writer._thread is worker
+
+    release.set()
+    writer.stop()
+    assert not writer.stats()["running"]
+    assert writer.stats()["written"] == 1
+
+
+def test_predictor_enqueues_instead_of_committing(tmp_path, sample_customers):
+    writer = PredictionLogWriter(spill_path=tmp_path / "spill.jsonl")
+    predictor = ChurnPredictor(log_writer=writer)
+    predictor.predict_many(sample_customers(10))
+    assert writer.stats()["queue_depth"] == 10
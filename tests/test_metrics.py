@@ -0,0 +1,32 @@
+# tests/test_metrics.py
+from src import metrics
+from src.predictor import ChurnPredictor
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("test_latency_seconds", "test histogram", ("stage",), buckets=(0.1, 1.0))
+    child = hist.labels(stage="x")
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+    text = "\n".join(hist.render())
+    assert 'test_latency_seconds_bucket{stage="x",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="x",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="x",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="x"} 3' in text
+
+
+def test_disabled_metrics_are_noops(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    counter = metrics.Counter("test_disabled_total", "never recorded", ("k",))
+    counter.labels(k="a").inc()
+    assert counter.render() == ["# HELP test_disabled_total never recorded", "# TYPE test_disabled_total counter"]
+
+
+def test_unseen_categories_are_counted(sample_customers):
+    child = metrics.UNSEEN_CATEGORIES.labels(feature="Contract")
+    before = child.value
+    customer = sample_customers(1)[0].model_copy(update={"Contract": "Ten year"})
+    predictor = ChurnPredictor()
+    predictor.predict(customer)
+    predictor.predict_many([customer, customer])
+    assert child.value == before + 3
@@ -0,0 +1,87 @@
+# tests/test_model_loader.py
+import time
+
+import pytest
+
+from src.model_loader import ModelLoader, UnknownModelVersion, available_versions
+
+
+def test_versions_and_activation(tmp_path, models_dir):
+    registry = ModelLoader.from_dir(models_dir())
+    assert available_versions(tmp_path) == ["1.0", "2.0", "3.0"]
+    assert registry.model_version == "1.0"
+
+    in_flight = registry.get()
+    registry.activate("2.0")
+    assert registry.model_version == "2.0"
+    # a request that already grabbed its artifacts keeps the old model
+    assert in_flight.version == "1.0"
+    assert registry.get("1.0") is in_flight
+
+    with pytest.raises(UnknownModelVersion):
+        registry.get("9.9")
+
+
+def test_version_names_never_leave_the_models_dir(tmp_path, models_dir):
+    registry = ModelLoader.from_dir(models_dir() / "2.0")
+    # "3.0" has artifacts one level up, but only names listed under the registry's own dir load
+    for bad in ("../3.0", "..", str(tmp_path / "3.0"), "3.0"):
+        with pytest.raises(UnknownModelVersion):
+            registry.get(bad)
+    with pytest.raises(UnknownModelVersion):
+        registry.get_requested("2.0")
+
+
+def test_resident_versions_are_capped(models_dir, monkeypatch):
+    monkeypatch.setenv("MODEL_RESIDENT_VERSIONS", "1")
+    registry = ModelLoader.from_dir(models_dir())
+    # the active version doesn't count, so the one just loaded stays
+    registry.get("2.0")
+    assert registry.status()["resident_versions"] == ["1.0", "2.0"]
+    registry.get("3.0")
+    # least recently used non-active version goes first
+    assert registry.status()["resident_versions"] == ["1.0", "3.0"]
+
+
+def test_active_file_and_watch(tmp_path, models_dir):
+    (models_dir() / "ACTIVE").write_text("3.0\n")
+    registry = ModelLoader.from_dir(tmp_path)
+    assert registry.model_version == "3.0"
+
+    registry.start_watching(0.01)
+    try:
+        (tmp_path / "ACTIVE").write_text("2.0\n")
+        deadline = time.monotonic() + 5
+        while registry.model_version != "2.0" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        registry.stop_watching()
+    assert registry.model_version == "2.0"
+
+
+def test_persisted_activation_reaches_other_watchers(tmp_path, models_dir):
+    # two workers sharing models/: the one that gets the admin call writes ACTIVE, the other follows
+    models_dir()
+    answering, other = ModelLoader.from_dir(tmp_path), ModelLoader.from_dir(tmp_path)
+    other.start_watching(0.01)
+    try:
+        answering.activate("3.0", persist=True)
+        deadline = time.monotonic() + 5
+        while other.model_version != "3.0" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        other.stop_watching()
+    assert (tmp_path / "ACTIVE").read_text() == "3.0\n"
+    assert other.model_version == "3.0"
+
+
+def test_watch_keeps_a_pinned_version_until_the_file_changes(tmp_path, models_dir, monkeypatch):
+    (models_dir() / "ACTIVE").write_text("3.0\n")
+    monkeypatch.setenv("MODEL_VERSION", "2.0")
+    registry = ModelLoader.from_dir(tmp_path)
+    registry.start_watching(0.01)
+    try:
+        time.sleep(0.1)
+        assert registry.model_version == "2.0"
+    finally:
+        registry.stop_watching()
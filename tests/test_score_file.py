@@ -0,0 +1,55 @@
+# tests/test_score_file.py
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from src.predictor import ChurnPredictor
+from src.schemas import CustomerInput
+from src.score_file import score_file
+
+
+def _small_input(tmp_path, n=250):
+    path = tmp_path / "churn_small.csv"
+    pd.read_csv("data/churn.csv").head(n).to_csv(path, index=False)
+    return path
+
+
+def test_score_file_matches_api_predictions(tmp_path):
+    src = _small_input(tmp_path)
+    out = tmp_path / "scores.csv"
+    summary = score_file(src, out, chunksize=60)
+    assert summary["rows"] == 250
+
+    scores = pd.read_csv(out)
+    raw = pd.read_csv(src)
+    assert list(scores["customerID"]) == list(raw["customerID"])
+
+    predictor = ChurnPredictor()
+    fields = list(CustomerInput.model_fields)
+    for i in range(0, 250, 50):
+        record = raw.loc[i, fields].to_dict()
+        record["TotalCharges"] = float(record["TotalCharges"] or 0)
+        expected = predictor.predict(CustomerInput(**record))
+        assert round(scores.loc[i, "churn_probability"], 3) == expected.churn_probability
+        assert scores.loc[i, "risk_level"] == expected.risk_level
+
+
+def test_workers_keep_input_order(tmp_path):
+    src = _small_input(tmp_path)
+    single = tmp_path / "single.csv"
+    multi = tmp_path / "multi.csv"
+    score_file(src, single, chunksize=40)
+    score_file(src, multi, chunksize=40, workers=2)
+    pd.testing.assert_frame_equal(pd.read_csv(single), pd.read_csv(multi))
+
+
+def test_workers_share_the_model_loaded_before_the_fork(tmp_path):
+    # a fresh interpreter, so the suite's already-loaded registry doesn't hide a load in the workers
+    src = _small_input(tmp_path)
+    code = f"from src.score_file import score_file; score_file({str(src)!r}, {str(tmp_path / 'out.csv')!r}, 40, 2)"
+    env = {**os.environ, "LOG_WRITER_ENABLED": "0"}
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr.count("loading model") == 1
@@ -0,0 +1,45 @@
+# tests/test_score_table.py
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.predictor import ChurnPredictor
+from src.score_table import ScoreTable, ScoreTableUnavailable, _domain_sample, check_parity
+
+
+def test_predict_responses_identical_with_tables_on(sample_customers):
+    customers = sample_customers(300) + _domain_sample(300, seed=1)
+    report = check_parity(ChurnPredictor(), customers)
+    assert report["single_mismatches"] == 0
+    assert report["batch_mismatches"] == 0
+    # the engine's products in the engine's order: raw probabilities (and so log rows) match exactly
+    assert report["raw_mismatches_single"] == 0
+    assert report["raw_mismatches_batch"] == 0
+
+
+def test_index_hits_and_misses_score_the_same(active_artifacts):
+    customers = _domain_sample(500, seed=2)
+    full = ScoreTable.from_artifacts(active_artifacts)
+    tiny = ScoreTable(active_artifacts, max_index=10)
+    expected = full.score_many(customers)
+    assert np.array_equal(tiny.score_many(customers), expected)
+    assert tiny.stats()["index_size"] == 10
+    # repeat rows now hit the index
+    assert np.array_equal(full.score_many(customers), expected)
+    assert [full.score(c) for c in customers[:50]] == [tiny.score(c) for c in customers[:50]]
+
+
+def test_engine_sums_in_a_fixed_order_for_any_batch_size(active_artifacts, sample_customers):
+    engine = active_artifacts.inference
+    X = active_artifacts.encoder.encode_many(sample_customers(600), scaled=False)
+    # the accumulate path (small batches) and the column loop (big ones) add in the same sequence
+    assert np.array_equal(engine.decision(X[:200]), engine.decision(X)[:200])
+    assert np.allclose(engine.decision(X), X @ engine.weights + engine.bias, rtol=0, atol=1e-12)
+
+
+def test_non_linear_model_has_no_table(artifacts_with, fit_model):
+    base = artifacts_with()
+    artifacts = artifacts_with(fit_model(RandomForestClassifier, base, n_estimators=5))
+    with pytest.raises(ScoreTableUnavailable):
+        ScoreTable(artifacts)
+    assert artifacts.score_table is None
@@ -0,0 +1,72 @@
+# tests/test_serve.py
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from src.api import app
+from src.benchmarks.load import _free_port
+from src.serve import THREAD_ENV_VARS, limit_threads
+
+
+def test_worker_stats_single_process():
+    client = TestClient(app)
+    before = client.get("/worker-stats").json()
+    client.get("/health/live")
+    after = client.get("/worker-stats").json()
+    assert after["mode"] == "single"
+    assert after["workers"][0]["requests"] == before["workers"][0]["requests"] + 2
+
+
+def test_limit_threads_keeps_explicit_settings(monkeypatch):
+    for var in THREAD_ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("MKL_NUM_THREADS", "3")
+    limit_threads(2)
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert os.environ["MKL_NUM_THREADS"] == "3"
+
+
+def test_prefork_workers_share_counts_and_restart():
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "src.serve", "--workers", "2", "--port", str(port)]
+        + ["--host", "127.0.0.1", "--log-level", "warning"],
+        env={**os.environ, "METRICS_ENABLED": "0"},
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    def wait_for_workers(exclude=()):
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                stats = httpx.get(f"{url}/worker-stats", timeout=1.0).json()
+                pids = [w["pid"] for w in stats["workers"]]
+                if all(pids) and not set(pids) & set(exclude):
+                    return stats
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        raise AssertionError("workers did not come up")
+
+    try:
+        stats = wait_for_workers()
+        assert stats["mode"] == "prefork"
+        assert len(stats["workers"]) == 2
+        for _ in range(10):
+            assert httpx.get(f"{url}/health/live").status_code == 200
+        total = sum(w["requests"] for w in httpx.get(f"{url}/worker-stats").json()["workers"])
+        assert total >= 12
+
+        # a killed worker is re-forked from the parent
+        dead = stats["workers"][0]["pid"]
+        os.kill(dead, signal.SIGKILL)
+        wait_for_workers(exclude=[dead])
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
@@ -0,0 +1,78 @@
+# tests/test_shadow.py
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from src.database import SessionLocal, ShadowPredictionLog
+from src.model_loader import ModelLoader
+from src.predictor import ChurnPredictor
+from src.shadow import ShadowScorer, TrafficSplit
+
+
+def test_shadow_scores_and_logs_in_bulk(sample_customers, models_dir):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    shadow = ShadowScorer(["2.0"], loader=registry, log_batch_size=10)
+    predictor = ChurnPredictor(shadow=shadow)
+    predictor.loader = registry
+
+    outputs = predictor.predict_many(sample_customers(25))
+    predictor.predict(sample_customers(1)[0])
+    shadow.stop()
+
+    stats = shadow.stats()
+    assert stats["submitted"] == 2
+    assert stats["logged"] == 26
+    assert 0 <= stats["versions"]["2.0"]["agreement_rate"] <= 1
+    with SessionLocal() as db:
+        logged = db.scalar(
+            select(func.count())
+            .select_from(ShadowPredictionLog)
+            .where(ShadowPredictionLog.prediction_id.in_([o.customer_id for o in outputs]))
+        )
+    assert logged == 25
+
+
+def test_buffered_rows_are_written_without_further_traffic(sample_customers, models_dir):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    shadow = ShadowScorer(["2.0"], loader=registry, log_batch_size=1000, flush_interval=0.05)
+    try:
+        assert shadow.submit("1.0", sample_customers(3), ["a", "b", "c"], [0.1, 0.6, 0.9])
+        deadline = time.monotonic() + 5
+        while shadow.stats()["logged"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert shadow.stats()["logged"] == 3
+        assert shadow.stats()["buffered_rows"] == 0
+    finally:
+        shadow.stop()
+
+
+def test_shadow_never_waits_for_a_busy_pool(sample_customers, models_dir):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    shadow = ShadowScorer(["2.0"], loader=registry, session_factory=None, max_workers=1, max_pending=1)
+    release = threading.Event()
+    shadow._run = lambda *args: release.wait(5)
+
+    customer = sample_customers(1)[0]
+    assert shadow.submit("1.0", [customer], ["p1"], [0.4])
+    assert not shadow.submit("1.0", [customer], ["p2"], [0.4])
+    assert not shadow.submit("1.0", [customer], ["p3"], [0.4])
+    # the version that answered is never shadowed against itself
+    assert not shadow.submit("2.0", [customer], ["p4"], [0.4])
+    release.set()
+    shadow.stop()
+    assert shadow.stats()["skipped_busy"] == 2
+
+
+def test_traffic_split_routes_unpinned_requests(sample_customers, models_dir):
+    registry = ModelLoader.from_dir(models_dir(versions=("2.0",)))
+    predictor = ChurnPredictor(traffic_split=TrafficSplit("2.0", 100))
+    predictor.loader = registry
+    customer = sample_customers(1)[0]
+
+    assert predictor.predict(customer).model_version == "2.0"
+    assert predictor.predict(customer, model_version="1.0").model_version == "1.0"
+
+    split = TrafficSplit("2.0", 25)
+    chosen = [split.choose() for _ in range(4000)]
+    assert 800 < chosen.count("2.0") < 1200
@@ -0,0 +1,67 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from src.predictor import ChurnPredictor
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _python(code: str, **env) -> subprocess.CompletedProcess:
+    # a fresh interpreter, so modules imported by the rest of the suite don't count
+    base = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    return subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code], cwd=ROOT, env={**base, **env}, capture_output=True, text=True
+    )
+
+
+def test_importing_the_api_loads_no_model_and_opens_no_database(tmp_path):
+    code = """
+import sys
+import src.api
+from src.database import built_engines
+from src.model_loader import ModelLoader
+assert ModelLoader._instance is None
+assert not src.api.predictor.loaded
+assert built_engines() == []
+heavy = [m for m in ("pandas", "pyarrow", "sklearn", "scipy") if m in sys.modules]
+assert not heavy, heavy
+"""
+    result = _python(code, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    assert result.returncode == 0, result.stderr
+    # shadow scoring and the traffic split are configured at import too, and must stay lazy as well
+    env = {"SHADOW_MODEL_VERSIONS": "2.0", "AB_CANDIDATE_VERSION": "2.0", "AB_TRAFFIC_PERCENT": "10"}
+    result = _python(code, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", **env)
+    assert result.returncode == 0, result.stderr
+
+
+def test_database_url_is_only_required_on_first_use():
+    code = """
+import src.database as database
+try:
+    database.SessionLocal()
+except RuntimeError as e:
+    assert "DATABASE_URL" in str(e)
+else:
+    raise SystemExit("no error")
+"""
+    result = _python(code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_lifespan_loads_and_warms_up_before_the_first_request(sample_customers):
+    from src.api import app, predictor
+
+    with TestClient(app) as client:
+        assert predictor.loaded
+        assert client.get("/health").json()["model_loaded"] is True
+
+    fresh = ChurnPredictor()
+    assert not fresh.loaded
+    fresh.load(warm_up=True)
+    assert fresh.loaded
+    assert fresh.predict(sample_customers(1)[0]).model_version == fresh.loader.model_version
@@ -0,0 +1,77 @@
+# tests/test_train.py
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from src import train
+from src.bundle import export_bundle
+from src.database import ModelMetrics, SessionLocal
+from src.model_loader import ModelArtifacts
+
+
+def _subsample(tmp_path, n=1500):
+    path = tmp_path / "churn.csv"
+    pd.read_csv(train.DATA_PATH).sample(n, random_state=0).to_csv(path, index=False)
+    return path
+
+
+def test_encoding_matches_label_encoder():
+    df, y = train.load_dataset()
+    X, encoders = train.encode_features(df)
+
+    raw = pd.read_csv(train.DATA_PATH)
+    assert y.sum() == (raw["Churn"] == "Yes").sum()
+    for i, col in enumerate(df.columns):
+        if col in encoders:
+            reference = LabelEncoder().fit(raw[col])
+            assert list(encoders[col].classes_) == list(reference.classes_)
+            assert np.array_equal(X[:, i], reference.transform(raw[col]))
+            assert np.array_equal(encoders[col].transform(raw[col][:5]), reference.transform(raw[col][:5]))
+    assert not np.isnan(X).any()
+
+
+def test_train_writes_loadable_version(tmp_path, monkeypatch, sample_customers, copy_artifacts):
+    # an earlier bundle of the same version must not be served over the retrained pickles
+    export_bundle(ModelArtifacts("2.0", copy_artifacts(tmp_path / "models" / "2.0"), fmt="pickle"))
+    monkeypatch.setitem(
+        train.CANDIDATES, "logistic_regression", (*train.CANDIDATES["logistic_regression"][:2], {"C": [0.1, 1.0]})
+    )
+    report = train.train(
+        _subsample(tmp_path),
+        version="2.0",
+        model_dir=tmp_path / "models",
+        candidates=["logistic_regression"],
+        folds=2,
+        workers=2,
+        record=False,
+    )
+
+    assert report["model_type"] == "LogisticRegression"
+    assert set(report["timings_s"]) >= {"load", "encode", "split", "search", "fit", "evaluate", "save", "drift"}
+    assert (tmp_path / "models" / "2.0" / "drift_reference.json").exists()
+    saved = json.loads((tmp_path / "models" / "2.0" / train.METRICS_FILE).read_text())
+    assert saved["metrics"] == report["metrics"] and saved["dataset_size"] == 1500
+
+    artifacts = ModelArtifacts("2.0", tmp_path / "models" / "2.0")
+    assert artifacts.format == "pickle" and not list(artifacts.path.glob("*.bin"))
+    assert artifacts.inference.native
+    proba = artifacts.inference.score_many(sample_customers(20))
+    assert ((proba >= 0) & (proba <= 1)).all()
+    assert train.version_metrics("2.0", tmp_path / "models")["f1_score"] == report["metrics"]["f1_score"]
+
+
+def test_shipped_model_is_evaluated_and_recorded():
+    metrics = train.version_metrics("1.0")
+    assert metrics["dataset_size"] == 7043
+    assert 0.7 < metrics["accuracy"] < 0.9
+
+    train.record_metrics("test-train", metrics, metrics["dataset_size"], metrics["notes"])
+    train.record_metrics("test-train", metrics, metrics["dataset_size"], metrics["notes"])
+    db = SessionLocal()
+    try:
+        rows = db.query(ModelMetrics).filter_by(model_version="test-train").all()
+        assert len(rows) == 1 and rows[0].accuracy == metrics["accuracy"]
+    finally:
+        db.close()